@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+End to end cleaning time of the pandas and the lazy Polars backends.
+
+Each backend goes from the source CSV file to the preprocessed CSV file: the
+pandas backend reads the file with read_teams_stats(), cleans it with
+clean_dataset() and writes it with to_csv(), the Polars backend streams the
+plan of big5_leagues.lazy with sink_preprocessed(). The real file is measured
+first, then synthetic files of growing size, and the two outputs are compared
+byte for byte. A projected query (two columns of one season) shows the scan
+pushdown.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_backends --sizes 100000 1000000
+"""
+
+# Import libraries
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+from big5_leagues.cleaning import clean_dataset
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH, read_teams_stats
+from big5_leagues.lazy import clean_lazy, sink_preprocessed
+from big5_leagues.qualification import load_corrections
+from big5_leagues.synthetic import generate_teams_stats, write_teams_stats
+from big5_leagues.teams import TeamIndex
+
+TEAMS = TeamIndex.load()
+CORRECTIONS = load_corrections(teams = TEAMS)
+
+
+def pandas_backend(path: str, output_path: str):
+    clean_dataset(read_teams_stats(path), CORRECTIONS, teams = TEAMS).to_csv(output_path, index = True)
+
+
+def polars_backend(path: str, output_path: str):
+    sink_preprocessed(output_path, path, CORRECTIONS, TEAMS)
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def compare(label: str, path: str, directory: str, repeat: int):
+    outputs = {name: os.path.join(directory, f"{name}.csv") for name in ("pandas", "polars")}
+    pandas_seconds = min(timed(pandas_backend, path, outputs["pandas"]) for _ in range(repeat))
+    polars_seconds = min(timed(polars_backend, path, outputs["polars"]) for _ in range(repeat))
+    identical = filecmp.cmp(outputs["pandas"], outputs["polars"], shallow = False)
+    print(f"{label:>12} {pandas_seconds:>10.3f} {polars_seconds:>10.3f} "
+          f"{pandas_seconds / polars_seconds:>8.1f}x {'yes' if identical else 'NO':>10}", flush = True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default = DEFAULT_DATASET_PATH)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100000, 1000000],
+                        help = "Numbers of rows of the synthetic files.")
+    parser.add_argument("--repeat", type = int, default = 3, help = "Best of this many runs on the real file.")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'pandas s':>10} {'polars s':>10} {'speedup':>9} {'identical':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        compare("real file", args.data, directory, args.repeat)
+        for size in args.sizes:
+            path = os.path.join(directory, "teams_stats.csv")
+            write_teams_stats(generate_teams_stats(size, seed = args.seed), path)
+            compare(f"{size}", path, directory, 1)
+
+            start = time.perf_counter()
+            dataset = read_teams_stats(path)
+            season = dataset["season"].iloc[0]
+            clean_dataset(dataset[dataset["season"] == season], CORRECTIONS,
+                          teams = TEAMS)[["squad", "adjusted_points"]]
+            pandas_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            clean_lazy(path, CORRECTIONS, TEAMS, columns = ["squad", "adjusted_points"],
+                       seasons = [season]).collect()
+            polars_seconds = time.perf_counter() - start
+            print(f"{'':>12} one season, 2 columns: pandas {pandas_seconds:.3f} s, "
+                  f"polars {polars_seconds:.3f} s", flush = True)
+
+
+if __name__ == "__main__":
+    main()
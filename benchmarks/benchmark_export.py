@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the CSV, Parquet and Feather exports of the preprocessed dataset.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_export --repeat 100
+"""
+
+# Import libraries
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from big5_leagues import export
+from big5_leagues.pipeline import run_stages
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type = int, default = 20,
+                        help = "Number of times the preprocessed dataset is stacked on itself.")
+    args = parser.parse_args()
+
+    dataset = run_stages()["flags"]
+    dataset = pd.concat([dataset] * args.repeat, ignore_index = True)
+
+    formats = {"csv": (lambda data, path: data.to_csv(path, index = True),
+                       lambda path: pd.read_csv(path, index_col = 0)),
+               "parquet": (export.export_parquet, export.read_parquet),
+               "feather": (export.export_feather, export.read_feather),
+               }
+    print(f"rows: {len(dataset)}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (write, read) in formats.items():
+            path = os.path.join(directory, f"preprocessed.{name}")
+            _, write_seconds = timed(write, dataset, path)
+            _, read_seconds = timed(read, path)
+            print(f"{name}: {os.path.getsize(path) / 1024 ** 2:.2f} MB, "
+                  f"write {write_seconds:.3f} s, load {read_seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
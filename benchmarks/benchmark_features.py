@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Time of the trajectory features against per-team groupby shift and rolling.
+
+The baseline computes the same lag, delta, rolling mean and streak features
+with groupby().shift(), groupby().rolling() and a cumulative count per run of
+consecutive seasons. Both run on synthetic tables of growing size.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_features --sizes 100000 1000000
+"""
+
+# Import libraries
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.features import season_start, trajectory_features
+from big5_leagues.synthetic import generate_teams_stats
+
+METRICS = ("points", "goals_for", "goals_against", "points_per_match")
+WINDOWS = (3, 5)
+
+
+def baseline(dataset: pd.DataFrame) -> pd.DataFrame:
+    dataset = dataset.assign(start = season_start(dataset["season"]))
+    dataset = dataset.sort_values(["squad", "competition", "start"]).reset_index(drop = True)
+    run = ((dataset["squad"] != dataset["squad"].shift())
+           | (dataset["competition"] != dataset["competition"].shift())
+           | (dataset["start"] != dataset["start"].shift() + 1)).cumsum()
+    grouped = dataset.groupby(run)
+    features = dataset[["squad", "competition", "season"]].copy()
+    features["seasons_in_league"] = grouped.cumcount() + 1
+    for metric in METRICS:
+        lag = grouped[metric].shift()
+        features[f"{metric}_lag1"] = lag
+        features[f"{metric}_delta1"] = dataset[metric] - lag
+        for window in WINDOWS:
+            features[f"{metric}_mean{window}"] = (lag.groupby(run).rolling(window, min_periods = 1).mean()
+                                                  .reset_index(level = 0, drop = True))
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100000, 1000000],
+                        help = "Numbers of rows of the synthetic tables.")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'groupby s':>10} {'features s':>11} {'speedup':>8}")
+    for size in args.sizes:
+        dataset = generate_teams_stats(size, seed = args.seed)
+        start = time.perf_counter()
+        expected = baseline(dataset)
+        baseline_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        features = trajectory_features(dataset, METRICS, WINDOWS)
+        features_seconds = time.perf_counter() - start
+        for column in expected.columns[4:]:
+            assert np.allclose(features[column].to_numpy(dtype = float, na_value = np.nan),
+                               expected[column].to_numpy(dtype = float, na_value = np.nan), equal_nan = True)
+        print(f"{size:>10} {baseline_seconds:>10.3f} {features_seconds:>11.3f} "
+              f"{baseline_seconds / features_seconds:>7.1f}x", flush = True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Time and peak memory of the fixtures aggregation, chunked and in one read.
+
+Synthetic fixtures files of growing size are written once and aggregated into
+team season rows with fixtures_to_teams_stats(), reading the whole file at once
+and in chunks of rows. Peak memory is the high water mark of tracemalloc. Both
+runs must give the same table.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_fixtures --sizes 100000 1000000 --chunk-rows 100000
+"""
+
+# Import libraries
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from big5_leagues.fixtures import DEFAULT_CHUNK_ROWS, fixtures_to_teams_stats
+from big5_leagues.synthetic import generate_fixtures
+
+
+def measure(function, *args, **kwargs) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100000, 1000000],
+                        help = "Numbers of matches of the synthetic files.")
+    parser.add_argument("--chunk-rows", type = int, default = DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'team seasons':>13} {'mode':<10} {'seconds':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, "fixtures.csv")
+            generate_fixtures(size, seed = args.seed).to_csv(path, index = False)
+            expected, seconds, peak = measure(fixtures_to_teams_stats, path, chunk_rows = size)
+            print(f"{size:>10} {len(expected):>13} {'one read':<10} {seconds:>9.3f} {peak:>9.1f}", flush = True)
+            teams, seconds, peak = measure(fixtures_to_teams_stats, path, chunk_rows = args.chunk_rows)
+            print(f"{size:>10} {len(teams):>13} {'chunked':<10} {seconds:>9.3f} {peak:>9.1f}", flush = True)
+            pd.testing.assert_frame_equal(teams.astype(str), expected.astype(str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the typed ingestion schema against inferred read_csv dtypes.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_ingestion --repeat 100
+"""
+
+# Import libraries
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from big5_leagues.ingestion import read_teams_stats
+
+
+def bytes_per_row(dataset: pd.DataFrame) -> float:
+    return dataset.memory_usage(index = False, deep = True).sum() / len(dataset)
+
+
+def timed_read(function, path: str):
+    start = time.perf_counter()
+    dataset = function(path)
+    return dataset, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default = "datasets/Big 5 European football leagues teams stats.csv")
+    parser.add_argument("--repeat", type = int, default = 20,
+                        help = "Number of times the file is stacked on itself.")
+    args = parser.parse_args()
+
+    dataset = pd.read_csv(args.data)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "teams_stats.csv")
+        pd.concat([dataset] * args.repeat).to_csv(path, index = False)
+
+        inferred, inferred_seconds = timed_read(pd.read_csv, path)
+        typed, typed_seconds = timed_read(read_teams_stats, path)
+
+    print(f"rows: {len(typed)}")
+    print(f"inferred dtypes: {bytes_per_row(inferred):.1f} bytes/row, {inferred_seconds:.3f} s")
+    print(f"ingestion schema: {bytes_per_row(typed):.1f} bytes/row, {typed_seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
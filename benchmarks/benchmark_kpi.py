@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the batched bootstrap of the KPI importance against a loop over resamples.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_kpi --resamples 200
+"""
+
+# Import libraries
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.incremental import DEFAULT_PREPROCESSED_PATH
+from big5_leagues.kpi import DEFAULT_KPIS, DEFAULT_TARGET, kpi_importance
+
+
+def loop_path(dataset: pd.DataFrame, resamples: int) -> np.ndarray:
+    # One pandas resample and two corrwith() per bootstrap draw
+    rng = np.random.default_rng(0)
+    kpis = list(DEFAULT_KPIS)
+    spearman = []
+    for _ in range(resamples):
+        sample = dataset.iloc[rng.integers(0, len(dataset), len(dataset))]
+        spearman.append(sample[kpis].corrwith(sample[DEFAULT_TARGET], method = "spearman"))
+        sample[kpis].corrwith(sample[DEFAULT_TARGET])
+    return np.array(spearman)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default = DEFAULT_PREPROCESSED_PATH)
+    parser.add_argument("--resamples", type = int, default = 200)
+    args = parser.parse_args()
+
+    dataset = pd.read_csv(args.data, index_col = 0)
+    start = time.perf_counter()
+    loop_path(dataset, args.resamples)
+    loop_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    kpi_importance(dataset, groups = [None], resamples = args.resamples)
+    batched_seconds = time.perf_counter() - start
+    print(f"rows: {len(dataset)}, resamples: {args.resamples}")
+    print(f"loop: {loop_seconds:.3f} s, batched: {batched_seconds:.3f} s, "
+          f"speedup: {loop_seconds / batched_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Time of the cross-validated KPI model against a loop over folds and permutations.
+
+The baseline fits every fold with a least squares solve of the ridge problem
+and predicts the held-out rows again for every KPI and permutation. The model
+runs on one process, on several, and again with a warm fold cache. Both run on
+synthetic standardized tables of growing size, the importances must agree.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_kpi_model --sizes 20000 100000 --workers 1 4
+"""
+
+# Import libraries
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from big5_leagues.kpi_model import DEFAULT_ALPHA, cross_validate, fold_splits
+from big5_leagues.pipeline import StageCache
+from big5_leagues.standardization import standardize
+from big5_leagues.synthetic import generate_teams_stats
+
+TARGET = "adjusted_points"
+KPIS = ["adjusted_goals_for", "adjusted_goals_against", "adjusted_assists", "adjusted_pens_made",
+        "adjusted_shots_on_target_against", "adjusted_saves", "adjusted_clean_sheets",
+        "adjusted_shots_on_target", "players_used", "cards_yellow", "cards_red"]
+
+
+def baseline(dataset, repeats: int, seed: int = 0) -> np.ndarray:
+    values = dataset[[TARGET] + KPIS].to_numpy(dtype = float, na_value = np.nan)
+    rng = np.random.default_rng(seed)
+    importances = []
+    for fold in fold_splits(dataset):
+        train, test = np.delete(values, fold.test, axis = 0), values[fold.test]
+        mean, scale = np.nanmean(train[:, 1:], axis = 0), np.nanstd(train[:, 1:], axis = 0)
+        z = np.nan_to_num((train[:, 1:] - mean) / scale)
+        design = np.vstack([z, np.sqrt(DEFAULT_ALPHA) * np.eye(len(KPIS))])
+        target = np.concatenate([train[:, 0] - train[:, 0].mean(), np.zeros(len(KPIS))])
+        coefficients = np.linalg.lstsq(design, target, rcond = None)[0]
+        z_test = np.nan_to_num((test[:, 1:] - mean) / scale)
+
+        def error(features):
+            return np.mean((test[:, 0] - train[:, 0].mean() - features @ coefficients) ** 2)
+
+        base = error(z_test)
+        increase = np.zeros(len(KPIS))
+        for column in range(len(KPIS)):
+            for _ in range(repeats):
+                permuted = z_test.copy()
+                permuted[:, column] = rng.permutation(permuted[:, column])
+                increase[column] += (error(permuted) - base) / repeats
+        importances.append(increase)
+    return np.concatenate(importances)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [20000, 100000],
+                        help = "Numbers of rows of the synthetic tables.")
+    parser.add_argument("--repeats", type = int, default = 20)
+    parser.add_argument("--workers", type = int, nargs = "+", default = [1])
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'folds':>6} {'mode':<16} {'seconds':>9}")
+    for size in args.sizes:
+        dataset = standardize(generate_teams_stats(size, seed = args.seed))
+        folds = len(fold_splits(dataset))
+        start = time.perf_counter()
+        expected = baseline(dataset, args.repeats)
+        print(f"{size:>10} {folds:>6} {'loop':<16} {time.perf_counter() - start:>9.3f}", flush = True)
+        for workers in args.workers:
+            start = time.perf_counter()
+            table = cross_validate(dataset, TARGET, KPIS, repeats = args.repeats, workers = workers)
+            print(f"{size:>10} {folds:>6} {f'model, {workers} proc':<16} {time.perf_counter() - start:>9.3f}",
+                  flush = True)
+            # Different permutations, the means agree within their spread
+            assert np.allclose(table["importance"], expected, rtol = 0.5, atol = 0.5)
+        with tempfile.TemporaryDirectory() as directory:
+            cross_validate(dataset, TARGET, KPIS, repeats = args.repeats, cache = StageCache(directory))
+            start = time.perf_counter()
+            cross_validate(dataset, TARGET, KPIS, repeats = args.repeats, cache = StageCache(directory))
+            print(f"{size:>10} {folds:>6} {'model, cached':<16} {time.perf_counter() - start:>9.3f}", flush = True)
+
+
+if __name__ == "__main__":
+    main()
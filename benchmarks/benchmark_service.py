@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Latency of the query service under concurrent requests, against re-reading the CSV per query.
+
+The service is started in this process on a free port. Every client thread
+sends the same mix of queries over HTTP; the first round misses the result
+cache, the later rounds hit it. The baseline reads and filters the
+preprocessed CSV again for every query, as the analysts did before.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_service --clients 8 --rounds 20
+"""
+
+# Import libraries
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.incremental import DEFAULT_PREPROCESSED_PATH
+from big5_leagues.service import QueryEngine, make_server
+
+QUERIES = ({"filters": {"competition": "Serie A", "Relegation": "Yes", "season": {">=": "2014-2015"}},
+            "columns": ["season", "squad", "points"]},
+           {"filters": {"squad": "Paris SG"}, "columns": ["season", "points", "goals_for"],
+            "sort": ["season"]},
+           {"filters": {"UEFA Champions League": "Yes"}, "group_by": ["competition"],
+            "aggregates": {"points": ["mean", "std"], "goals_for": "mean"}},
+           {"filters": {"season": ["2019-2020", "2020-2021"], "points": {">=": 70}},
+            "columns": ["season", "competition", "squad", "points"]},
+           )
+
+
+def baseline(path: str, query: dict) -> pd.DataFrame:
+    # Re-read the CSV and scan every row, the way each question was answered before
+    dataset = pd.read_csv(path, index_col = 0)
+    mask = np.ones(len(dataset), dtype = bool)
+    for column, condition in query["filters"].items():
+        if isinstance(condition, dict):
+            for name, value in condition.items():
+                mask &= (dataset[column] >= value).to_numpy()
+        elif isinstance(condition, list):
+            mask &= dataset[column].isin(condition).to_numpy()
+        else:
+            mask &= (dataset[column] == condition).to_numpy()
+    return dataset[mask]
+
+
+def post(url: str, query: dict) -> float:
+    start = time.perf_counter()
+    request = urllib.request.Request(url, data = json.dumps(query).encode("utf-8"),
+                                     headers = {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _percentiles(seconds: list) -> str:
+    milliseconds = np.array(seconds) * 1000
+    return (f"p50 {np.percentile(milliseconds, 50):.2f} ms, p99 {np.percentile(milliseconds, 99):.2f} ms, "
+            f"max {milliseconds.max():.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default = DEFAULT_PREPROCESSED_PATH)
+    parser.add_argument("--clients", type = int, default = 8)
+    parser.add_argument("--rounds", type = int, default = 20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for query in QUERIES:
+        baseline(args.data, query)
+    print(f"baseline (read CSV + scan per query): {(time.perf_counter() - start) / len(QUERIES) * 1000:.2f} ms"
+          " per query", flush = True)
+
+    engine = QueryEngine(args.data)
+    server = make_server(engine, port = 0)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/query"
+    try:
+        cold = [post(url, query) for query in QUERIES]
+        print(f"service, cache misses: {_percentiles(cold)}", flush = True)
+        requests = [query for _ in range(args.rounds) for query in QUERIES]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers = args.clients) as pool:
+            warm = list(pool.map(lambda query: post(url, query), requests))
+        elapsed = time.perf_counter() - start
+        print(f"service, {args.clients} concurrent clients, cache hits: {_percentiles(warm)}, "
+              f"{len(requests) / elapsed:.0f} requests/s", flush = True)
+        print(f"cache: {engine.statistics()['cache']}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
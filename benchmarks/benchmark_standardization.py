@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the vectorized standardization stage against the row-wise apply path.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_standardization --repeat 100
+"""
+
+# Import libraries
+import argparse
+import time
+
+import pandas as pd
+
+from big5_leagues.standardization import standardize
+
+# The fifteen row functions the cleaning script used before standardize()
+LEGACY_STANDARDIZATION = {
+    "adjusted_wins": lambda row: round((row["wins"]/row["games"]) * 38),
+    "adjusted_draws": lambda row: round((row["draws"]/row["games"]) * 38),
+    "adjusted_losses": lambda row: round((row["losses"]/row["games"]) * 38),
+    "adjusted_goals_for": lambda row: round((row["goals_for"]/row["games"]) * 38),
+    "adjusted_goals_against": lambda row: round((row["goals_against"]/row["games"]) * 38),
+    "adjusted_goal_diff": lambda row: round(((row["goals_for"]/row["games"]) * 38)
+                                            - ((row["goals_against"]/row["games"]) * 38), 2),
+    "adjusted_assists": lambda row: round((row["assists"]/row["games"]) * 38),
+    "adjusted_pens_made": lambda row: round((row["pens_made"]/row["games"]) * 38),
+    "adjusted_pens_att": lambda row: round((row["pens_att"]/row["games"]) * 38),
+    "adjusted_shots_on_target_against": lambda row: round((row["shots_on_target_against"]/row["games"]) * 38),
+    "adjusted_saves": lambda row: round((row["saves"]/row["games"]) * 38),
+    "adjusted_clean_sheets": lambda row: round((row["clean_sheets"]/row["games"]) * 38),
+    "adjusted_shots_on_target": lambda row: round((row["shots_on_target"]/row["games"]) * 38),
+    "adjusted_points": lambda row: round((3 * ((row["wins"]/row["games"]) * 38))
+                                         + ((row["draws"]/row["games"]) * 38)),
+    "adjusted_points_per_match": lambda row: round(((3 * ((row["wins"]/row["games"]) * 38))
+                                                    + ((row["draws"]/row["games"]) * 38)) / 38, 2),
+    }
+
+
+def apply_path(dataset: pd.DataFrame) -> pd.DataFrame:
+    dataset = dataset.copy()
+    for column, function in LEGACY_STANDARDIZATION.items():
+        dataset[column] = dataset.apply(function, axis = 1)
+    return dataset
+
+
+def timed(function, dataset: pd.DataFrame):
+    start = time.perf_counter()
+    result = function(dataset)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default = "datasets/Big 5 European football leagues teams stats.csv")
+    parser.add_argument("--repeat", type = int, default = 20,
+                        help = "Number of times the dataset is stacked on itself.")
+    args = parser.parse_args()
+
+    dataset = pd.read_csv(args.data)
+    dataset = pd.concat([dataset] * args.repeat, ignore_index = True)
+
+    legacy, legacy_seconds = timed(apply_path, dataset)
+    vectorized, vectorized_seconds = timed(standardize, dataset)
+    pd.testing.assert_frame_equal(legacy, vectorized)
+
+    print(f"rows: {len(dataset)}")
+    print(f"apply path: {legacy_seconds:.3f} s")
+    print(f"standardize: {vectorized_seconds:.4f} s")
+    print(f"speedup: {legacy_seconds / vectorized_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
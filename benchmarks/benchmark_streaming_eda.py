@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Time and peak memory of the streaming EDA against eda() on the whole file.
+
+Synthetic files of growing size are written once. The in-memory run loads the
+file with read_teams_stats() and computes the describe(), null count and
+corr() metrics of eda(); the streaming run summarizes the file chunk by chunk
+with stream_eda(). Peak memory is the high water mark of tracemalloc, which
+sees the numpy and pandas buffers. The largest relative difference of the
+describe() statistics between the two runs is printed with the distinct count
+error of the HyperLogLog sketches.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_streaming_eda --sizes 100000 1000000 --workers 1 2
+"""
+
+# Import libraries
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from big5_leagues.eda import eda
+from big5_leagues.ingestion import read_teams_stats
+from big5_leagues.streaming import DEFAULT_CHUNK_BYTES, stream_eda
+from big5_leagues.synthetic import generate_teams_stats, write_teams_stats
+
+
+def in_memory(path: str) -> tuple:
+    dataset = read_teams_stats(path)
+    result = eda(dataset, metrics = ["data_descriptive_stats", "data_count_null", "data_correlation_matrix"])
+    return result["data_descriptive_stats"], result["data_correlation_matrix"], dataset.nunique()
+
+
+def streaming(path: str, chunk_bytes: int, workers: int) -> tuple:
+    summary = stream_eda(path, chunk_bytes = chunk_bytes, workers = workers)
+    return summary.descriptive_stats(), summary.correlation_matrix(), summary.distinct_count()
+
+
+def measure(function, *args) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100000, 1000000],
+                        help = "Numbers of rows of the synthetic files.")
+    parser.add_argument("--chunk-mb", type = float, default = DEFAULT_CHUNK_BYTES / 1024 ** 2)
+    parser.add_argument("--workers", type = int, nargs = "+", default = [1])
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+    chunk_bytes = int(args.chunk_mb * 1024 ** 2)
+
+    print(f"{'rows':>10} {'mode':<14} {'seconds':>9} {'peak MB':>9} {'describe rel. error':>20} "
+          f"{'distinct rel. error':>20}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, "teams_stats.csv")
+            write_teams_stats(generate_teams_stats(size, seed = args.seed), path)
+            (describe, correlation, distinct), seconds, peak = measure(in_memory, path)
+            print(f"{size:>10} {'in memory':<14} {seconds:>9.3f} {peak:>9.1f}", flush = True)
+            scale = np.abs(describe.to_numpy(dtype = float)) + 1e-12
+            for workers in args.workers:
+                (stream_describe, stream_correlation, stream_distinct), seconds, peak = measure(
+                    streaming, path, chunk_bytes, workers)
+                describe_error = np.nanmax(np.abs(stream_describe.to_numpy(dtype = float)
+                                                  - describe.to_numpy(dtype = float)) / scale)
+                distinct_error = np.max(np.abs(stream_distinct - distinct) / np.maximum(distinct, 1))
+                print(f"{size:>10} {f'stream, {workers} proc':<14} {seconds:>9.3f} {peak:>9.1f} "
+                      f"{describe_error:>20.2e} {distinct_error:>20.2e}", flush = True)
+                assert np.allclose(stream_correlation, correlation, atol = 1e-9, equal_nan = True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmark of the pipeline stages on synthetic tables of growing size.
+
+Every stage is timed on its own, then run again under tracemalloc to measure
+its peak memory. The tables come from big5_leagues.synthetic, so sizes beyond
+the real dataset (10^3 to 10^7 rows) can be measured.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_suite --sizes 1000 10000 100000 1000000
+"""
+
+# Import libraries
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from big5_leagues.cleaning import apply_notes_flags, apply_renames
+from big5_leagues.eda import EDA_METRICS, eda
+from big5_leagues.qualification import load_corrections
+from big5_leagues.quality import check_quality, load_deductions
+from big5_leagues.standardization import standardize
+from big5_leagues.synthetic import generate_teams_stats
+from big5_leagues.teams import TeamIndex
+
+
+def _eda(dataset: pd.DataFrame, directory: str):
+    # Every metric is evaluated, eda() alone only builds the lazy result
+    return dict(eda(dataset, graphs = False, metrics = EDA_METRICS))
+
+
+def _quality(dataset: pd.DataFrame, directory: str):
+    return check_quality(dataset, deductions = DEDUCTIONS)
+
+
+def _standardize(dataset: pd.DataFrame, directory: str):
+    return standardize(dataset)
+
+
+def _flags(dataset: pd.DataFrame, directory: str):
+    return apply_notes_flags(apply_renames(dataset, TEAMS), CORRECTIONS)
+
+
+def _export_csv(dataset: pd.DataFrame, directory: str):
+    dataset.to_csv(os.path.join(directory, "Big5_PreProcessed.csv"), index = True)
+
+
+TEAMS = TeamIndex.load()
+CORRECTIONS = load_corrections(teams = TEAMS)
+DEDUCTIONS = load_deductions()
+BENCHMARKS = {"eda": _eda,
+              "quality": _quality,
+              "standardize": _standardize,
+              "flags": _flags,
+              "export_csv": _export_csv,
+              }
+
+
+def measure(function, dataset: pd.DataFrame, directory: str) -> dict:
+    start = time.perf_counter()
+    function(dataset, directory)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(dataset, directory)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1024 ** 2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1000, 10000, 100000, 1000000],
+                        help = "Numbers of rows of the synthetic tables.")
+    parser.add_argument("--stages", nargs = "+", choices = list(BENCHMARKS), default = list(BENCHMARKS))
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", help = "Optional JSON file the measurements are written to.")
+    args = parser.parse_args()
+
+    measurements = []
+    print(f"{'rows':>10} {'stage':<12} {'seconds':>10} {'peak MB':>10} {'MB/10^6 rows':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            dataset = generate_teams_stats(size, seed = args.seed)
+            for stage in args.stages:
+                result = {"rows": size, "stage": stage, **measure(BENCHMARKS[stage], dataset, directory)}
+                measurements.append(result)
+                print(f"{size:>10} {stage:<12} {result['seconds']:>10.3f} {result['peak_mb']:>10.1f} "
+                      f"{result['peak_mb'] / size * 1e6:>13.1f}", flush = True)
+            del dataset
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as file:
+            json.dump(measurements, file, indent = 2)
+
+
+if __name__ == "__main__":
+    main()
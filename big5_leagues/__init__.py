@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Reusable stages of the Big 5 European leagues data cleaning pipeline.
+
+Importing the package has no side effects and does not load the plotting
+libraries, they are imported when eda() is asked for graphs.
+"""
+
+from big5_leagues.cleaning import clean_dataset
+from big5_leagues.cube import HIERARCHIES, MEASURES, RATES, Hierarchy, Measure, Rate, build_cube
+from big5_leagues.eda import EDA_METRICS, EDAResult, eda
+from big5_leagues.export import (export_feather, export_parquet, read_feather,
+                                 read_parquet)
+from big5_leagues.features import read_features, trajectory_features
+from big5_leagues.fixtures import TIE_BREAKERS, fixtures_to_teams_stats, rank_teams
+from big5_leagues.incremental import RunningStatistics, append_season
+from big5_leagues.ingestion import SCHEMA, read_teams_stats
+from big5_leagues.instrumentation import Instrumentation
+from big5_leagues.kpi import kpi_importance
+from big5_leagues.kpi_model import Fold, RidgeModel, cross_validate, fit_ridge, fold_splits, model_summary
+from big5_leagues.lazy import clean_lazy, clean_polars, sink_preprocessed
+from big5_leagues.notes import parse_notes
+from big5_leagues.parallel import map_partitions
+from big5_leagues.pipeline import (BACKENDS, STAGES, Stage, StageCache, export_results, run_pipeline,
+                                   run_stages)
+from big5_leagues.qualification import (FLAG_COLUMNS, NOTES_COLUMNS, add_qualification_flags,
+                                        load_corrections)
+from big5_leagues.quality import RULES, Rule, check_quality, load_deductions, rule_masks
+from big5_leagues.service import INDEX_COLUMNS, QueryEngine, make_server
+from big5_leagues.sketches import HyperLogLog, QuantileSketch, TopK
+from big5_leagues.standardization import (ADJUSTED_METRICS, AdjustedMetric,
+                                          DEFAULT_TARGET_GAMES, standardize)
+from big5_leagues.streaming import StreamingSummary, stream_eda
+from big5_leagues.synthetic import generate_fixtures, generate_teams_stats, write_teams_stats
+from big5_leagues.teams import TeamIndex, normalize_name
+from big5_leagues.visuals import render_eda_figures
+
+__all__ = ["ADJUSTED_METRICS",
+           "AdjustedMetric",
+           "BACKENDS",
+           "DEFAULT_TARGET_GAMES",
+           "EDAResult",
+           "EDA_METRICS",
+           "FLAG_COLUMNS",
+           "Fold",
+           "HIERARCHIES",
+           "Hierarchy",
+           "HyperLogLog",
+           "INDEX_COLUMNS",
+           "Instrumentation",
+           "MEASURES",
+           "Measure",
+           "NOTES_COLUMNS",
+           "QuantileSketch",
+           "QueryEngine",
+           "RATES",
+           "RULES",
+           "Rate",
+           "RidgeModel",
+           "Rule",
+           "RunningStatistics",
+           "SCHEMA",
+           "STAGES",
+           "Stage",
+           "StageCache",
+           "StreamingSummary",
+           "TIE_BREAKERS",
+           "TeamIndex",
+           "TopK",
+           "add_qualification_flags",
+           "append_season",
+           "build_cube",
+           "check_quality",
+           "clean_dataset",
+           "clean_lazy",
+           "clean_polars",
+           "cross_validate",
+           "eda",
+           "export_feather",
+           "export_parquet",
+           "export_results",
+           "fit_ridge",
+           "fixtures_to_teams_stats",
+           "fold_splits",
+           "generate_fixtures",
+           "generate_teams_stats",
+           "kpi_importance",
+           "load_corrections",
+           "load_deductions",
+           "make_server",
+           "map_partitions",
+           "model_summary",
+           "normalize_name",
+           "parse_notes",
+           "rank_teams",
+           "read_feather",
+           "read_features",
+           "read_parquet",
+           "read_teams_stats",
+           "render_eda_figures",
+           "rule_masks",
+           "run_pipeline",
+           "run_stages",
+           "sink_preprocessed",
+           "standardize",
+           "stream_eda",
+           "trajectory_features",
+           "write_teams_stats",
+           ]
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Entry point of python -m big5_leagues, see big5_leagues/cli.py.
+"""
+
+from big5_leagues.cli import main
+
+main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Data Cleaning and Transformation
+
+- The rank column is specified as numeric. Should be categorical
+- Paris Saint German is specified as Paris S-G. Should be Paris SG. Every spelling of a team
+is mapped to its canonical name and team ID by the alias table of big5_leagues.teams
+- The notes column has alot of incorrect data. The teams that qualify for the UEFA Champions
+League, Europa League, and are Relegated, are not well specified across the 11 years in different
+seasons. We fix by fetching accurate data online. The new source gotten to fix this issue is a
+football website called FlashFootball. Also, to draw insights from the notes column, it is split
+into 3 new columns. The three new columns are:
+    - UEFA Champions League
+    - UEFA Europa League
+    - Relegation
+Their values are all Yes/No allowing us gain insight in a more organized way.
+The notes also give the UEFA Europa Conference League qualifications, the route to the European
+competition (league finish, cup win, ...) and the relegation playoffs, kept in the columns
+UEFA Europa Conference League, Qualification Route and Relegation Playoff.
+- Germany has 18 teams in the top flight while the remaining leagues have 20 teams. Also, the
+French league during the 2019-2020 season played a maximum of 28 matches. This imbalance will
+hinder certain overall analysis as this creates bias. For these, we create standardized entries
+for wins, draws, losses, points, and points_per_match.
+
+Every step only looks at the row it transforms, so new rows can be cleaned on
+their own and appended to an already cleaned dataset.
+"""
+
+# Import libraries
+from typing import Mapping, Optional, Union
+
+import pandas as pd
+
+from big5_leagues.qualification import add_qualification_flags
+from big5_leagues.standardization import ADJUSTED_METRICS, DEFAULT_TARGET_GAMES, standardize
+from big5_leagues.teams import TeamIndex
+
+
+def apply_renames(dataset: pd.DataFrame, teams: Optional[TeamIndex] = None) -> pd.DataFrame:
+    if teams is None:
+        teams = TeamIndex.load()
+    dataset = dataset.copy()
+    # Fixing Paris SG and the other spellings, only the categories are looked up
+    squad, team_id = teams.canonicalize(dataset["squad"])
+    dataset["squad"] = squad
+    dataset.insert(dataset.columns.get_loc("squad") + 1, "team_id", team_id)
+    # Rank column to Categorical
+    dataset["rank"] = dataset["rank"].astype(object)
+    return dataset
+
+
+def apply_notes_flags(dataset: pd.DataFrame, corrections: pd.DataFrame) -> pd.DataFrame:
+    # Fixing the notes column and dropping when done
+    dataset = add_qualification_flags(dataset, corrections)
+    return dataset.drop("notes", axis = 1)
+
+
+def clean_dataset(dataset: pd.DataFrame, corrections: pd.DataFrame,
+                  target_games: Union[int, Mapping[str, int]] = DEFAULT_TARGET_GAMES,
+                  teams: Optional[TeamIndex] = None) -> pd.DataFrame:
+    """
+    Clean and transform team season rows for visualization.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Team season statistics as loaded from the source file.
+    corrections : pd.DataFrame
+        FlashFootball corrections returned by load_corrections().
+    target_games : int or Mapping[str, int], optional
+        Number of matches the adjusted_* columns are rescaled to. The default is
+        DEFAULT_TARGET_GAMES.
+    teams : TeamIndex, optional
+        Alias table of the team names. The default is None, which loads
+        DEFAULT_ALIASES_PATH.
+
+    Returns
+    -------
+    pd.DataFrame
+        The cleaned dataset with canonical squad names, the team_id, adjusted_*
+        and flag columns and without the notes column.
+
+    """
+    # Creating standard metrics for overall unbiased analysis of Germany and France
+    dataset = standardize(dataset, metrics = ADJUSTED_METRICS, target_games = target_games)
+    dataset = apply_renames(dataset, teams)
+    return apply_notes_flags(dataset, corrections)
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Command line interface of the cleaning pipeline.
+
+Installed as the big5-leagues command, also available as python -m big5_leagues:
+    big5-leagues clean --dataset "datasets/Big 5 European football leagues teams stats.csv"
+    big5-leagues append "path/to/new season.csv"
+    big5-leagues figures --output figures --columns points goals_for goals_against
+    big5-leagues kpi --target points_per_match --resamples 5000
+    big5-leagues model --schemes season competition --workers 4
+    big5-leagues cube
+    big5-leagues features --metrics points adjusted_goals_for --windows 3 5
+    big5-leagues serve --port 8000
+    big5-leagues teams "path/to/other source.csv" --column team
+    big5-leagues eda "path/to/large teams stats.csv" --tables tables --workers 4
+    big5-leagues fixtures "path/to/fixtures.csv" --output "path/to/teams stats.csv"
+    big5-leagues clean --fixtures "path/to/fixtures.csv"
+
+Every input and output path can be given on the command line. The defaults are
+the files of the repository, relative to the working directory.
+"""
+
+# Import libraries
+import argparse
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from big5_leagues.cube import build_cube, cube_directory, write_cube
+from big5_leagues.features import (DEFAULT_METRICS, DEFAULT_WINDOWS, features_path, trajectory_features,
+                                   write_features)
+from big5_leagues.fixtures import DEFAULT_CHUNK_ROWS, fixtures_to_teams_stats
+from big5_leagues.incremental import (DEFAULT_PREPROCESSED_PATH, DEFAULT_STATISTICS_PATH,
+                                      DEFAULT_TABLES_DIRECTORY, append_season)
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH, read_teams_stats
+from big5_leagues.instrumentation import DEFAULT_REPORT_PATH, MEMORY_MODES
+from big5_leagues.kpi import (DEFAULT_KPI_TABLE_PATH, DEFAULT_KPIS, DEFAULT_RESAMPLES, DEFAULT_TARGET,
+                              kpi_importance)
+from big5_leagues.kpi_model import (DEFAULT_ALPHA, DEFAULT_MODEL_CACHE_DIRECTORY, DEFAULT_MODEL_TABLE_PATH,
+                                    DEFAULT_REPEATS, DEFAULT_SCHEMES, cross_validate, model_summary)
+from big5_leagues.pipeline import BACKENDS, DEFAULT_CACHE_DIRECTORY, StageCache, run_pipeline
+from big5_leagues.qualification import DEFAULT_CORRECTIONS_PATH, load_corrections
+from big5_leagues.quality import DEFAULT_DEDUCTIONS_PATH, load_deductions
+from big5_leagues.service import (DEFAULT_CACHE_SIZE, DEFAULT_HOST, DEFAULT_PORT, QueryEngine,
+                                  make_server)
+from big5_leagues.standardization import DEFAULT_TARGET_GAMES
+from big5_leagues.streaming import DEFAULT_CHUNK_BYTES, DEFAULT_MAX_VALUES, stream_eda, write_streaming_tables
+from big5_leagues.synthetic import write_teams_stats
+from big5_leagues.teams import DEFAULT_ALIASES_PATH, SUGGESTIONS, TeamIndex
+from big5_leagues.visuals import DEFAULT_MAX_ROWS, PAIRPLOT_MODES, render_eda_figures
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--corrections", default = DEFAULT_CORRECTIONS_PATH,
+                        help = "FlashFootball corrections table.")
+    parser.add_argument("--aliases", default = DEFAULT_ALIASES_PATH,
+                        help = "Alias table of the team names.")
+    parser.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                        help = "CSV file of the preprocessed dataset.")
+    parser.add_argument("--statistics", default = DEFAULT_STATISTICS_PATH,
+                        help = "Running statistics file.")
+    parser.add_argument("--tables", default = DEFAULT_TABLES_DIRECTORY,
+                        help = "Directory of the EDA tables.")
+
+
+def _clean(args: argparse.Namespace):
+    results = run_pipeline({"dataset_path": args.dataset,
+                            "corrections_path": args.corrections,
+                            "deductions_path": args.deductions,
+                            "aliases_path": args.aliases,
+                            "fixtures_path": args.fixtures,
+                            "target_games": args.target_games},
+                           tables_directory = args.tables,
+                           preprocessed_path = args.preprocessed,
+                           statistics_path = args.statistics,
+                           cache_directory = None if args.no_cache else args.cache,
+                           workers = args.workers,
+                           formats = args.formats,
+                           report_path = None if args.no_report else args.report,
+                           memory = args.memory,
+                           profile_stages = args.profile,
+                           cube_directory = args.cube,
+                           backend = args.backend,
+                           features_path = args.features)
+    print(f"Cleaned {len(results['flags'])} rows into {args.preprocessed}")
+
+
+def _append(args: argparse.Namespace):
+    teams = TeamIndex.load(args.aliases)
+    cleaned = append_season(read_teams_stats(args.new_rows), args.preprocessed, args.statistics,
+                            args.tables, load_corrections(args.corrections, teams), teams,
+                            cube_directory = args.cube, features_path = args.features)
+    print(f"Appended {len(cleaned)} rows to {args.preprocessed}")
+
+
+def _figures(args: argparse.Namespace):
+    paths = render_eda_figures(read_teams_stats(args.dataset), args.output,
+                               pairplot_columns = args.columns, max_rows = args.max_rows,
+                               pairplot_mode = args.pairplot_mode, workers = args.workers,
+                               file_format = args.file_format)
+    for path in paths.values():
+        print(f"Saved {path}")
+
+
+def _kpi(args: argparse.Namespace):
+    dataset = pd.read_csv(args.preprocessed, index_col = 0)
+    importance = kpi_importance(dataset, target = args.target, kpis = args.kpis,
+                                groups = [None if group == "all" else group for group in args.groups],
+                                resamples = args.resamples, confidence = args.confidence,
+                                seed = args.seed, workers = args.workers)
+    importance.to_csv(args.output, index = False)
+    print(importance[importance["group_by"] == "all"].to_string(index = False))
+    print(f"Saved {args.output}")
+
+
+def _model(args: argparse.Namespace):
+    dataset = pd.read_csv(args.preprocessed, index_col = 0)
+    cache = None if args.no_cache else StageCache(args.cache)
+    folds = cross_validate(dataset, target = args.target, kpis = args.kpis, schemes = args.schemes,
+                           alpha = args.alpha, repeats = args.repeats, seed = args.seed,
+                           workers = args.workers, cache = cache)
+    folds.to_csv(args.output, index = False)
+    print(model_summary(folds).to_string(index = False))
+    if cache is not None:
+        print(f"{len(cache.hits)} folds cached, {len(cache.misses)} folds fitted")
+    print(f"Saved {args.output}")
+
+
+def _cube(args: argparse.Namespace):
+    directory = args.output or cube_directory(args.preprocessed)
+    cube = build_cube(pd.read_csv(args.preprocessed, index_col = 0))
+    write_cube(cube, directory)
+    for name, table in cube.items():
+        print(f"Saved {len(table)} groups to {name}.csv")
+    print(f"Fact tables in {directory}")
+
+
+def _features(args: argparse.Namespace):
+    path = args.output or features_path(args.preprocessed)
+    features = trajectory_features(pd.read_csv(args.preprocessed, index_col = 0), args.metrics, args.windows)
+    write_features(features, path)
+    print(f"Saved {len(features)} team seasons with {features.shape[1]} columns to {path}")
+
+
+def _serve(args: argparse.Namespace):
+    engine = QueryEngine(args.preprocessed, cache_size = args.cache_size)
+    server = make_server(engine, host = args.host, port = args.port, verbose = args.verbose)
+    print(f"Serving {len(engine.dataset)} rows of {args.preprocessed} on "
+          f"http://{args.host}:{server.server_address[1]}/query")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _teams(args: argparse.Namespace):
+    teams = TeamIndex.load(args.aliases)
+    names = pd.read_csv(args.source, usecols = [args.column], dtype = str)[args.column].dropna()
+    unknown = teams.report_unknown(names, limit = args.suggestions)
+    for name, suggestions in unknown.items():
+        matches = ", ".join(f"{canonical} ({team_id}, {score:.2f})" for team_id, canonical, score in suggestions)
+        print(f"{name}: {matches or 'no match'}")
+    print(f"{names.nunique() - len(unknown)} known and {len(unknown)} unknown names in {args.source}")
+
+
+def _eda(args: argparse.Namespace):
+    summary = stream_eda(args.source, chunk_bytes = int(args.chunk_mb * 1024 ** 2), workers = args.workers,
+                         max_values = args.max_values)
+    write_streaming_tables(summary, args.tables)
+    print(f"Summarized {summary.statistics.rows} rows of {args.source} into {args.tables}")
+    print("Distinct values (estimated):")
+    print(summary.distinct_count().to_string())
+    for column, counts in summary.category_count(args.top).items():
+        print(f"Most frequent {column}:")
+        print(counts.to_string())
+
+
+def _fixtures(args: argparse.Namespace):
+    dataset = fixtures_to_teams_stats(args.source, load_deductions(args.deductions), chunk_rows = args.chunk_rows)
+    write_teams_stats(dataset, args.output)
+    print(f"Aggregated {args.source} into {len(dataset)} team seasons in {args.output}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog = "big5-leagues",
+                                     description = "Big 5 European leagues data cleaning pipeline.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    clean = commands.add_parser("clean", help = "Run the whole pipeline and write every output.")
+    clean.add_argument("--dataset", default = DEFAULT_DATASET_PATH, help = "Teams stats CSV file.")
+    clean.add_argument("--fixtures", help = "Fixtures CSV file, one row per match, "
+                                            "loaded instead of the teams stats file.")
+    _add_output_arguments(clean)
+    clean.add_argument("--deductions", default = DEFAULT_DEDUCTIONS_PATH,
+                       help = "Points deductions allowed by the data quality rules.")
+    clean.add_argument("--target-games", type = int, default = DEFAULT_TARGET_GAMES,
+                       help = "Season length the adjusted_* columns are scaled to.")
+    clean.add_argument("--cache", default = DEFAULT_CACHE_DIRECTORY, help = "Stage cache directory.")
+    clean.add_argument("--no-cache", action = "store_true", help = "Run every stage without caching.")
+    clean.add_argument("--workers", type = int, default = 1,
+                       help = "Processes the partitioned stages are spread across.")
+    clean.add_argument("--formats", nargs = "+", choices = ["csv", "parquet", "feather"],
+                       default = ["csv"], help = "Formats of the preprocessed dataset.")
+    clean.add_argument("--report", default = DEFAULT_REPORT_PATH,
+                       help = "JSON report of the time, memory and rows of every stage.")
+    clean.add_argument("--no-report", action = "store_true", help = "Skip the instrumentation.")
+    clean.add_argument("--memory", choices = MEMORY_MODES, default = "tracemalloc",
+                       help = "How the report measures the peak memory of a stage.")
+    clean.add_argument("--profile", nargs = "+", default = [], metavar = "STAGE",
+                       help = "Stages to run under cProfile, dumped to .cache/profiles/<stage>.prof.")
+    clean.add_argument("--cube", help = "Directory of the dashboard fact tables, "
+                                        "next to the preprocessed dataset by default.")
+    clean.add_argument("--features", help = "CSV file of the trajectory features, "
+                                            "next to the preprocessed dataset by default.")
+    clean.add_argument("--backend", choices = sorted(BACKENDS), default = "pandas",
+                       help = "Backend of the cleaning stages, polars needs pip install polars.")
+    clean.set_defaults(function = _clean)
+
+    append = commands.add_parser("append", help = "Append new seasons to the preprocessed dataset.")
+    append.add_argument("new_rows", help = "CSV file with the new rows, in the source file format.")
+    _add_output_arguments(append)
+    append.add_argument("--cube", help = "Directory of the dashboard fact tables rebuilt after the append, "
+                                         "next to the preprocessed dataset by default.")
+    append.add_argument("--features", help = "CSV file of the trajectory features rebuilt after the append, "
+                                             "next to the preprocessed dataset by default.")
+    append.set_defaults(function = _append)
+
+    figures = commands.add_parser("figures", help = "Save the EDA visuals to files.")
+    figures.add_argument("--dataset", default = DEFAULT_DATASET_PATH, help = "Teams stats CSV file.")
+    figures.add_argument("--output", default = "figures", help = "Directory of the figures.")
+    figures.add_argument("--columns", nargs = "+", help = "Pairplot columns, every numeric column by default.")
+    figures.add_argument("--max-rows", type = int, default = DEFAULT_MAX_ROWS,
+                         help = "Rows above which the pairplot is sampled or aggregated.")
+    figures.add_argument("--pairplot-mode", choices = PAIRPLOT_MODES, default = "sample")
+    figures.add_argument("--workers", type = int, help = "Processes the figures are rendered on.")
+    figures.add_argument("--file-format", default = "png", help = "Image format of the figures.")
+    figures.set_defaults(function = _figures)
+
+    kpi = commands.add_parser("kpi", help = "Rank the KPIs against a success target with bootstrap intervals.")
+    kpi.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                     help = "CSV file of the preprocessed dataset.")
+    kpi.add_argument("--output", default = DEFAULT_KPI_TABLE_PATH, help = "CSV file of the KPI table.")
+    kpi.add_argument("--target", default = DEFAULT_TARGET, help = "Measure of success.")
+    kpi.add_argument("--kpis", nargs = "+", default = list(DEFAULT_KPIS))
+    kpi.add_argument("--groups", nargs = "+", default = ["all", "competition", "season"],
+                     help = "Breakdowns of the results, all for every row together.")
+    kpi.add_argument("--resamples", type = int, default = DEFAULT_RESAMPLES)
+    kpi.add_argument("--confidence", type = float, default = 0.95)
+    kpi.add_argument("--seed", type = int, default = 0)
+    kpi.add_argument("--workers", type = int, default = 1, help = "Processes the groups are spread across.")
+    kpi.set_defaults(function = _kpi)
+
+    model = commands.add_parser("model", help = "Cross-validate a ridge model of a success target on the KPIs "
+                                                "with leave one season or league out folds.")
+    model.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                       help = "CSV file of the preprocessed dataset.")
+    model.add_argument("--output", default = DEFAULT_MODEL_TABLE_PATH, help = "CSV file of the fold table.")
+    model.add_argument("--target", default = DEFAULT_TARGET, help = "Measure of success.")
+    model.add_argument("--kpis", nargs = "+", default = list(DEFAULT_KPIS))
+    model.add_argument("--schemes", nargs = "+", default = list(DEFAULT_SCHEMES),
+                       help = "Columns whose groups are held out one at a time.")
+    model.add_argument("--alpha", type = float, default = DEFAULT_ALPHA, help = "Ridge penalty.")
+    model.add_argument("--repeats", type = int, default = DEFAULT_REPEATS,
+                       help = "Permutations per KPI and fold of the permutation importance.")
+    model.add_argument("--seed", type = int, default = 0)
+    model.add_argument("--workers", type = int, default = 1, help = "Processes the folds are spread across.")
+    model.add_argument("--cache", default = DEFAULT_MODEL_CACHE_DIRECTORY, help = "Fold cache directory.")
+    model.add_argument("--no-cache", action = "store_true", help = "Fit every fold without caching.")
+    model.set_defaults(function = _model)
+
+    cube = commands.add_parser("cube", help = "Rebuild the dashboard fact tables from the preprocessed dataset.")
+    cube.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                      help = "CSV file of the preprocessed dataset.")
+    cube.add_argument("--output", help = "Directory of the fact tables, next to the preprocessed dataset "
+                                         "by default.")
+    cube.set_defaults(function = _cube)
+
+    features = commands.add_parser("features", help = "Rebuild the season over season features of every team.")
+    features.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                          help = "CSV file of the preprocessed dataset.")
+    features.add_argument("--output", help = "CSV file of the features, next to the preprocessed dataset "
+                                             "by default.")
+    features.add_argument("--metrics", nargs = "+", default = list(DEFAULT_METRICS),
+                          help = "Columns of the lag, delta and rolling mean features.")
+    features.add_argument("--windows", nargs = "+", type = int, default = list(DEFAULT_WINDOWS),
+                          help = "Numbers of previous seasons of the rolling means.")
+    features.set_defaults(function = _features)
+
+    serve = commands.add_parser("serve", help = "Answer JSON queries over HTTP from the preprocessed dataset.")
+    serve.add_argument("--preprocessed", default = DEFAULT_PREPROCESSED_PATH,
+                       help = "Preprocessed dataset, CSV, Parquet or Feather.")
+    serve.add_argument("--host", default = DEFAULT_HOST, help = "Address to listen on.")
+    serve.add_argument("--port", type = int, default = DEFAULT_PORT, help = "Port to listen on.")
+    serve.add_argument("--cache-size", type = int, default = DEFAULT_CACHE_SIZE,
+                       help = "Number of query results kept in the cache.")
+    serve.add_argument("--verbose", action = "store_true", help = "Log every request.")
+    serve.set_defaults(function = _serve)
+
+    teams = commands.add_parser("teams", help = "List the team names of a source missing from the alias "
+                                                "table, with the closest known teams.")
+    teams.add_argument("source", help = "CSV file of the source to merge.")
+    teams.add_argument("--column", default = "squad", help = "Column of the team names.")
+    teams.add_argument("--aliases", default = DEFAULT_ALIASES_PATH, help = "Alias table of the team names.")
+    teams.add_argument("--suggestions", type = int, default = SUGGESTIONS,
+                       help = "Known teams suggested per unknown name.")
+    teams.set_defaults(function = _teams)
+
+    eda = commands.add_parser("eda", help = "Write the EDA tables of a file larger than memory in one pass.")
+    eda.add_argument("source", nargs = "?", default = DEFAULT_DATASET_PATH, help = "Teams stats CSV file.")
+    eda.add_argument("--tables", default = DEFAULT_TABLES_DIRECTORY, help = "Directory of the EDA tables.")
+    eda.add_argument("--chunk-mb", type = float, default = DEFAULT_CHUNK_BYTES / 1024 ** 2,
+                     help = "Size of the chunks of the file read at once.")
+    eda.add_argument("--workers", type = int, default = 1, help = "Processes the chunks are summarized on.")
+    eda.add_argument("--max-values", type = int, default = DEFAULT_MAX_VALUES,
+                     help = "Distinct values of a column counted exactly for the quantiles.")
+    eda.add_argument("--top", type = int, default = 5, help = "Most frequent values shown per text column.")
+    eda.set_defaults(function = _eda)
+
+    fixtures = commands.add_parser("fixtures", help = "Aggregate a fixtures file into a teams stats file.")
+    fixtures.add_argument("source", help = "Fixtures CSV file, one row per match.")
+    fixtures.add_argument("--output", required = True, help = "Teams stats CSV file written.")
+    fixtures.add_argument("--deductions", default = DEFAULT_DEDUCTIONS_PATH,
+                          help = "Points deductions taken off the points before ranking.")
+    fixtures.add_argument("--chunk-rows", type = int, default = DEFAULT_CHUNK_ROWS, help = "Matches read at once.")
+    fixtures.set_defaults(function = _fixtures)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = build_parser().parse_args(argv)
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregate cube of the dashboard pages.
+
+The dashboard has a League, a Season and a Team view of the General, Offensive
+and Defensive statistics. Instead of re-aggregating the row level dataset on
+every refresh, the pages read small fact tables with the totals, means,
+standard deviations and rates of every group.
+
+Each view is a hierarchy of grouping columns, e.g. season then competition.
+The rows are grouped once per hierarchy, at its finest level, into mergeable
+aggregates: the count and sum of every measure and the sum of squared
+deviations from the group mean. The coarser levels (every season, then all
+rows) are rolled up from those group aggregates, the squared deviations with
+the pairwise formula of Chan et al. rather than from sums of squares, which
+cancel on large groups. The means, standard deviations and rates are derived
+from them, so only the single groupby depends on the number of rows.
+
+A measure that is already a ratio per match, like points_per_match, has no
+meaningful total: its fact table columns are its mean, standard deviation and
+count only.
+
+The fact tables are written to a dashboard_cube directory next to the
+preprocessed dataset, one CSV per view and page, e.g.
+Season_Offensive_Statistics.csv. Rolled up levels have "All" in the grouping
+columns they aggregate over.
+"""
+
+# Import libraries
+import os
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PAGES = ("General", "Offensive", "Defensive")
+ALL = "All"
+CUBE_DIRECTORY_NAME = "dashboard_cube"
+
+
+class Hierarchy(NamedTuple):
+    """
+    A view of the dashboard.
+
+    Attributes
+    ----------
+    name : str
+        View name, the first part of the fact table names.
+    keys : tuple of str
+        Grouping columns from the coarsest to the finest level.
+
+    """
+    name: str
+    keys: Tuple[str, ...]
+
+
+class Measure(NamedTuple):
+    """
+    A column aggregated into its total, mean and standard deviation.
+
+    Attributes
+    ----------
+    name : str
+        Name of the measure in the fact tables.
+    page : str
+        Dashboard page the measure is shown on, one of PAGES.
+    column : str, optional
+        Column of the preprocessed dataset, numeric or a Yes/No flag counted
+        as 1/0. The default is None, which uses the name.
+    ratio : bool, optional
+        The values are ratios, e.g. per match, whose total means nothing. The
+        default is False.
+
+    """
+    name: str
+    page: str
+    column: Optional[str] = None
+    ratio: bool = False
+
+
+class Rate(NamedTuple):
+    """
+    A ratio of the totals of two measures within each group.
+
+    Attributes
+    ----------
+    name : str
+        Name of the rate in the fact tables.
+    page : str
+        Dashboard page the rate is shown on, one of PAGES.
+    numerator : str
+        Measure name of the numerator.
+    denominator : str
+        Measure name of the denominator.
+
+    """
+    name: str
+    page: str
+    numerator: str
+    denominator: str
+
+
+HIERARCHIES = (Hierarchy("League", ("competition",)),
+               Hierarchy("Season", ("season", "competition")),
+               Hierarchy("Team", ("squad",)),
+               )
+
+MEASURES = (Measure("games", "General"),
+            Measure("wins", "General"),
+            Measure("draws", "General"),
+            Measure("losses", "General"),
+            Measure("points", "General"),
+            Measure("points_per_match", "General", ratio = True),
+            Measure("adjusted_wins", "General"),
+            Measure("adjusted_draws", "General"),
+            Measure("adjusted_losses", "General"),
+            Measure("adjusted_points", "General"),
+            Measure("adjusted_points_per_match", "General", ratio = True),
+            Measure("champions_league", "General", "UEFA Champions League"),
+            Measure("europa_league", "General", "UEFA Europa League"),
+            Measure("conference_league", "General", "UEFA Europa Conference League"),
+            Measure("relegation", "General", "Relegation"),
+            Measure("goals_for", "Offensive"),
+            Measure("assists", "Offensive"),
+            Measure("shots_on_target", "Offensive"),
+            Measure("pens_made", "Offensive"),
+            Measure("pens_att", "Offensive"),
+            Measure("adjusted_goals_for", "Offensive"),
+            Measure("adjusted_assists", "Offensive"),
+            Measure("adjusted_shots_on_target", "Offensive"),
+            Measure("adjusted_pens_made", "Offensive"),
+            Measure("adjusted_pens_att", "Offensive"),
+            Measure("goals_against", "Defensive"),
+            Measure("shots_on_target_against", "Defensive"),
+            Measure("saves", "Defensive"),
+            Measure("clean_sheets", "Defensive"),
+            Measure("cards_yellow", "Defensive"),
+            Measure("cards_red", "Defensive"),
+            Measure("adjusted_goals_against", "Defensive"),
+            Measure("adjusted_shots_on_target_against", "Defensive"),
+            Measure("adjusted_saves", "Defensive"),
+            Measure("adjusted_clean_sheets", "Defensive"),
+            )
+
+RATES = (Rate("win_rate", "General", "wins", "games"),
+         Rate("draw_rate", "General", "draws", "games"),
+         Rate("loss_rate", "General", "losses", "games"),
+         Rate("goals_per_game", "Offensive", "goals_for", "games"),
+         Rate("shot_conversion", "Offensive", "goals_for", "shots_on_target"),
+         Rate("penalty_conversion", "Offensive", "pens_made", "pens_att"),
+         Rate("assists_per_goal", "Offensive", "assists", "goals_for"),
+         Rate("goals_against_per_game", "Defensive", "goals_against", "games"),
+         Rate("save_rate", "Defensive", "saves", "shots_on_target_against"),
+         Rate("clean_sheet_rate", "Defensive", "clean_sheets", "games"),
+         )
+
+
+def cube_directory(preprocessed_path: str) -> str:
+    """Directory of the fact tables, next to the preprocessed dataset."""
+    return os.path.join(os.path.dirname(preprocessed_path), CUBE_DIRECTORY_NAME)
+
+
+def _measure_values(dataset: pd.DataFrame, measure: Measure) -> np.ndarray:
+    # Float values of the measure column, NaN where missing, Yes/No flags as 1/0
+    column = dataset[measure.column or measure.name]
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return column.to_numpy(dtype = float, na_value = np.nan)
+    return np.where(column.isna().to_numpy(), np.nan, (column == "Yes").to_numpy(dtype = float))
+
+
+def hierarchy_aggregates(dataset: pd.DataFrame, hierarchy: Hierarchy,
+                         measures: Iterable[Measure] = MEASURES) -> pd.DataFrame:
+    """
+    Additive aggregates of every level of a hierarchy.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset.
+    hierarchy : Hierarchy
+        Grouping columns of the view.
+    measures : Iterable[Measure], optional
+        Measures to aggregate. The default is MEASURES.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per group of every level, from all rows to the finest level,
+        with the grouping columns ("All" where rolled up), the number of team
+        seasons, and the <measure>_count, <measure>_sum and <measure>_m2 (sum
+        of squared deviations from the group mean) of every measure over its
+        non-missing rows.
+
+    """
+    keys = list(hierarchy.keys)
+    measures = tuple(measures)
+    # The only grouping of the rows: the group code of every row at the finest level, then one
+    # bincount per aggregate. The coarser levels are combined from the finest groups.
+    grouped = dataset.groupby(keys, sort = True, observed = True)
+    sizes = grouped.size()
+    codes = grouped.ngroup().to_numpy()
+    aggregates = {"team_seasons": sizes.to_numpy()}
+    deviations = {}
+    for measure in measures:
+        values = _measure_values(dataset, measure)
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0)
+        count = np.bincount(codes, weights = present, minlength = len(sizes))
+        total = np.bincount(codes, weights = values, minlength = len(sizes))
+        with np.errstate(all = "ignore"):
+            mean = np.where(count > 0, total / count, 0)
+        aggregates[f"{measure.name}_count"] = count
+        aggregates[f"{measure.name}_sum"] = total
+        centered = np.where(present, values - mean[codes], 0)
+        deviations[f"{measure.name}_m2"] = np.bincount(codes, weights = centered * centered,
+                                                       minlength = len(sizes))
+    additive = list(aggregates)
+    finest = pd.DataFrame(aggregates, index = sizes.index)
+
+    levels = []
+    for depth in range(len(keys) + 1):
+        if depth == len(keys):
+            level = finest.reset_index().assign(**deviations)
+        else:
+            # Sums of the finest groups and the code of the coarser group of every finest group
+            if depth == 0:
+                level = finest.sum().to_frame().T
+                parents = np.zeros(len(finest), dtype = np.int64)
+            else:
+                coarse = finest.groupby(level = keys[:depth], sort = True, observed = True)
+                level = coarse.sum().reset_index()
+                parents = coarse.ngroup().to_numpy()
+            for measure in measures:
+                level[f"{measure.name}_m2"] = _combined_m2(
+                    finest[f"{measure.name}_count"].to_numpy(), finest[f"{measure.name}_sum"].to_numpy(),
+                    deviations[f"{measure.name}_m2"], parents, len(level))
+        for position, key in enumerate(keys):
+            level[key] = level[key].astype(str) if position < depth else ALL
+        levels.append(level[keys + additive + list(deviations)])
+    aggregates = pd.concat(levels, ignore_index = True)
+    return aggregates.astype({column: np.int64 for column in additive if not column.endswith("_sum")})
+
+
+def _combined_m2(count: np.ndarray, total: np.ndarray, m2: np.ndarray, parents: np.ndarray,
+                 size: int) -> np.ndarray:
+    # Squared deviations of the union of groups: their own plus count * (group mean - union mean) ** 2
+    parent_count = np.bincount(parents, weights = count, minlength = size)
+    parent_total = np.bincount(parents, weights = total, minlength = size)
+    with np.errstate(all = "ignore"):
+        mean = np.where(count > 0, total / count, 0)
+        parent_mean = np.where(parent_count > 0, parent_total / parent_count, 0)
+    between = np.where(count > 0, count * (mean - parent_mean[parents]) ** 2, 0)
+    return np.bincount(parents, weights = m2 + between, minlength = size)
+
+
+def fact_tables(aggregates: pd.DataFrame, hierarchy: Hierarchy,
+                measures: Iterable[Measure] = MEASURES,
+                rates: Iterable[Rate] = RATES) -> Dict[str, pd.DataFrame]:
+    """
+    Totals, means, standard deviations and rates of every page of a view.
+
+    Parameters
+    ----------
+    aggregates : pd.DataFrame
+        Aggregates returned by hierarchy_aggregates() for the hierarchy.
+    hierarchy : Hierarchy
+        Grouping columns of the view.
+    measures : Iterable[Measure], optional
+        The measures of the aggregates. The default is MEASURES.
+    rates : Iterable[Rate], optional
+        Ratios of measure totals. The default is RATES.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        One table per page, named <view>_<page>_Statistics, with the grouping
+        columns, the team seasons and the <measure> total, <measure>_mean and
+        <measure>_std (sample standard deviation over the team seasons) of the
+        page measures, followed by its rates. A ratio measure has a
+        <measure>_count of the team seasons with a value instead of a total.
+
+    """
+    keys = list(hierarchy.keys)
+    derived = {}
+    with np.errstate(all = "ignore"):
+        for measure in measures:
+            count = aggregates[f"{measure.name}_count"].to_numpy(dtype = float)
+            total = aggregates[f"{measure.name}_sum"].to_numpy()
+            variance = np.maximum(aggregates[f"{measure.name}_m2"].to_numpy(), 0) / (count - 1)
+            # Totals of counts stay integers, groups without a value have no total
+            derived[measure.name] = pd.array(np.where(count > 0, total, np.nan))
+            if np.array_equal(total, np.round(total)):
+                derived[measure.name] = derived[measure.name].astype("Int64")
+            derived[f"{measure.name}_mean"] = total / count
+            derived[f"{measure.name}_std"] = np.where(count > 1, np.sqrt(variance), np.nan)
+            derived[f"{measure.name}_count"] = aggregates[f"{measure.name}_count"].to_numpy()
+        for rate in rates:
+            derived[rate.name] = (aggregates[f"{rate.numerator}_sum"].to_numpy()
+                                  / aggregates[f"{rate.denominator}_sum"].to_numpy())
+
+    tables = {}
+    for page in PAGES:
+        columns = [name for measure in measures if measure.page == page
+                   for name in ((f"{measure.name}_mean", f"{measure.name}_std", f"{measure.name}_count")
+                                if measure.ratio else
+                                (measure.name, f"{measure.name}_mean", f"{measure.name}_std"))]
+        columns += [rate.name for rate in rates if rate.page == page]
+        table = aggregates[keys + ["team_seasons"]].copy()
+        for column in columns:
+            table[column] = derived[column]
+        tables[f"{hierarchy.name}_{page}_Statistics"] = table
+    return tables
+
+
+def build_cube(dataset: pd.DataFrame, hierarchies: Iterable[Hierarchy] = HIERARCHIES,
+               measures: Iterable[Measure] = MEASURES,
+               rates: Iterable[Rate] = RATES) -> Dict[str, pd.DataFrame]:
+    """
+    Build the fact tables of every view and page of the dashboard.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset.
+    hierarchies : Iterable[Hierarchy], optional
+        Views of the dashboard. The default is HIERARCHIES.
+    measures : Iterable[Measure], optional
+        Aggregated measures. The default is MEASURES.
+    rates : Iterable[Rate], optional
+        Ratios of measure totals. The default is RATES.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        The fact_tables() of every view, by table name.
+
+    """
+    measures, rates = tuple(measures), tuple(rates)
+    cube = {}
+    for hierarchy in hierarchies:
+        aggregates = hierarchy_aggregates(dataset, hierarchy, measures)
+        cube.update(fact_tables(aggregates, hierarchy, measures, rates))
+    return cube
+
+
+def write_cube(cube: Dict[str, pd.DataFrame], directory: str):
+    """Write every fact table as <directory>/<name>.csv, creating the directory if missing."""
+    os.makedirs(directory, exist_ok = True)
+    for name, table in cube.items():
+        table.to_csv(os.path.join(directory, f"{name}.csv"), index = False)
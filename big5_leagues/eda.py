@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Exploratory data analysis (EDA) of the teams stats dataset.
+"""
+
+# Import libraries
+from collections.abc import Mapping
+from functools import cached_property
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from big5_leagues.visuals import render_eda_figures
+
+EDA_METRICS = ("data_head",
+               "data_tail",
+               "data_mode",
+               "data_descriptive_stats",
+               "data_more_descriptive_stats",
+               "data_correlation_matrix",
+               "data_distinct_count",
+               "data_count_duplicates",
+               "data_count_null",
+               "data_total_null",
+               "data_unique",
+               "data_category_count",
+               )
+
+
+class EDAResult(Mapping):
+    """
+    Read-only mapping of EDA metrics computed on first access.
+
+    Intermediates shared by several metrics (the null mask, the numeric and the
+    non-numeric sub-frames) are computed once and reused.
+    """
+
+    def __init__(self, dataset: pd.DataFrame, metrics: Iterable[str] = EDA_METRICS):
+        # Materialized once, a generator of metrics would be consumed by the first use
+        metrics = set(metrics)
+        unknown = metrics - set(EDA_METRICS)
+        if unknown:
+            raise KeyError(f"Unknown EDA metrics: {sorted(unknown)}")
+        self._dataset = dataset
+        self._metrics = tuple(metric for metric in EDA_METRICS if metric in metrics)
+        self._results = {}
+
+    def __getitem__(self, metric: str):
+        if metric not in self._metrics:
+            raise KeyError(metric)
+        if metric not in self._results:
+            self._results[metric] = getattr(self, f"_{metric}")()
+        return self._results[metric]
+
+    def __iter__(self):
+        return iter(self._metrics)
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+    def __repr__(self) -> str:
+        return f"EDAResult(metrics={list(self._metrics)})"
+
+    # Shared intermediates
+    @cached_property
+    def _null_mask(self) -> pd.DataFrame:
+        return self._dataset.isnull()
+
+    @cached_property
+    def _numeric(self) -> pd.DataFrame:
+        return self._dataset.select_dtypes("number")
+
+    @cached_property
+    def _non_numeric(self) -> pd.DataFrame:
+        return self._dataset.drop(columns = self._numeric.columns)
+
+    # Metrics
+    def _data_head(self) -> pd.DataFrame:
+        return self._dataset.head()
+
+    def _data_tail(self) -> pd.DataFrame:
+        return self._dataset.tail()
+
+    def _data_mode(self) -> pd.Series:
+        return self._dataset.mode().iloc[0]
+
+    def _data_descriptive_stats(self) -> pd.DataFrame:
+        return self._numeric.describe()
+
+    def _data_more_descriptive_stats(self) -> pd.DataFrame:
+        # Same table as describe(include = "all"), reusing the numeric description
+        numeric = self["data_descriptive_stats"] if "data_descriptive_stats" in self._metrics \
+            else self._numeric.describe()
+        if self._non_numeric.empty:
+            return numeric
+        if numeric.empty:
+            return self._non_numeric.describe()
+        non_numeric = self._non_numeric.describe()
+        rows = list(dict.fromkeys(["count", *non_numeric.index, *numeric.index]))
+        combined = pd.concat([non_numeric, numeric], axis = 1)
+        return combined.reindex(index = rows, columns = self._dataset.columns)
+
+    def _data_correlation_matrix(self) -> pd.DataFrame:
+        return self._numeric.corr()
+
+    def _data_distinct_count(self) -> pd.Series:
+        return self._dataset.nunique()
+
+    def _data_count_duplicates(self) -> int:
+        return self._dataset.duplicated().sum()
+
+    def _data_count_null(self) -> pd.Series:
+        return self._null_mask.sum()
+
+    def _data_total_null(self) -> int:
+        count_null = self["data_count_null"] if "data_count_null" in self._metrics \
+            else self._null_mask.sum()
+        return count_null.sum()
+
+    def _data_unique(self) -> dict:
+        # Loop through each column and get the unique values
+        return {each_column: self._dataset[each_column].unique()
+                for each_column in self._dataset.columns}
+
+    def _data_category_count(self) -> dict:
+        # Loop through the categorical columns and count how many values are in each category
+        return {each_column: self._non_numeric[each_column].value_counts()
+                for each_column in self._non_numeric.columns}
+
+
+def eda(dataset: pd.DataFrame, graphs: bool = False,
+        metrics: Optional[Iterable[str]] = None,
+        graphs_directory: Optional[str] = None,
+        pairplot_columns: Optional[Iterable[str]] = None) -> EDAResult:
+    """
+    Perform exploratory data analysis on the dataset.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Dataset to perform EDA.
+    graphs : bool, optional
+        Choose to display exploratory data analysis visuals. The default is False.
+    metrics : Iterable[str], optional
+        Names from EDA_METRICS to compute. The default is None, which makes every
+        metric available and prints dataset.info().
+    graphs_directory : str, optional
+        With graphs, save the visuals to files in this directory instead of
+        showing them, see big5_leagues.visuals.render_eda_figures(). The default
+        is None, which shows them.
+    pairplot_columns : Iterable[str], optional
+        Numeric columns of the pairplot. The default is None, which uses every
+        numeric column.
+
+    Returns
+    -------
+    EDAResult
+        A mapping containing different evaluation metrics for exploring the
+        columns and understanding how values in the dataset are distributed.
+        Each metric is computed the first time it is read.
+
+    """
+    if metrics is None:
+        dataset.info()
+        metrics = EDA_METRICS
+    result = EDAResult(dataset, metrics)
+
+    if graphs == True:
+        correlation_matrix = result["data_correlation_matrix"] if "data_correlation_matrix" in result \
+            else dataset.corr(numeric_only = True)
+        if graphs_directory is not None:
+            render_eda_figures(dataset, graphs_directory, pairplot_columns = pairplot_columns,
+                               correlation_matrix = correlation_matrix)
+            return result
+
+        # Visuals. The plotting libraries are only imported when a visual is requested
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        dataset.hist(figsize = (25, 20), bins = 10)
+        plt.figure(figsize = (15, 10))
+        sns.heatmap(correlation_matrix, annot = True, cmap = 'coolwarm')
+        plt.show()
+        plt.figure(figsize = (50, 30))
+        # Graph of correlation across each numerical feature
+        sns.pairplot(dataset, vars = None if pairplot_columns is None else list(pairplot_columns))
+        plt.show()
+
+    return result
+
+
+def descriptive_statistics_table(descriptive_stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format describe() output as the Descriptive_Statistics_Table.
+
+    Parameters
+    ----------
+    descriptive_stats : pd.DataFrame
+        Output of describe(), one column per numeric feature.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per feature with its statistics and range, rounded to 2 decimals.
+
+    """
+    desc_stats = descriptive_stats.astype(float).T.reset_index()
+    desc_stats["range"] = desc_stats["max"] - desc_stats["min"]
+    return round(desc_stats, 2)
+
+
+def missing_values_table(count_null: pd.Series, total_rows: int) -> pd.DataFrame:
+    """
+    Format null counts as the Missing_Values_Table.
+
+    Parameters
+    ----------
+    count_null : pd.Series
+        Number of nulls per column.
+    total_rows : int
+        Number of rows the nulls were counted over.
+
+    Returns
+    -------
+    pd.DataFrame
+        The columns with missing values, their count and percentage of rows.
+
+    """
+    def get_percentage(row):
+        return round((row/total_rows) * 100, 2)
+
+    missing_val = count_null[count_null > 0].reset_index()
+    missing_val.columns = ["Column", "Number_Missing"]
+    missing_val["Percentage"] = missing_val["Number_Missing"].apply(get_percentage)
+    return missing_val
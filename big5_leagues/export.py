@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar export of the preprocessed dataset.
+
+Next to the CSV, the preprocessed dataset can be written as Parquet (compressed,
+with dictionary encoded categoricals) and as an uncompressed Arrow/Feather file
+that can be memory-mapped. Both keep the dtypes of the adjusted_* and flag
+columns, so readers do not parse text back into numbers.
+
+Both formats need the optional pyarrow package.
+"""
+
+# Import libraries
+import os
+from typing import Iterable, Optional
+
+import pandas as pd
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as error:
+        raise ImportError("Parquet and Feather export need pyarrow: pip install pyarrow") from error
+
+
+def columnar_path(csv_path: str, extension: str) -> str:
+    """Path of the columnar file written next to a CSV file."""
+    return f"{os.path.splitext(csv_path)[0]}.{extension}"
+
+
+def to_columnar_frame(dataset: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prepare the preprocessed dataset for a columnar file.
+
+    Text columns, including the Yes/No flags and the categorical rank, become
+    categoricals so that they are dictionary encoded. The index is dropped since
+    it only numbers the rows.
+    """
+    text_columns = dataset.select_dtypes(exclude = ["number", "bool", "category"]).columns
+    return dataset.astype({column: "category" for column in text_columns}).reset_index(drop = True)
+
+
+def export_parquet(dataset: pd.DataFrame, path: str, compression: str = "zstd"):
+    """
+    Write the dataset as Parquet.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset.
+    path : str
+        Parquet file to write.
+    compression : str, optional
+        Parquet compression codec. The default is "zstd".
+
+    """
+    _require_pyarrow()
+    to_columnar_frame(dataset).to_parquet(path, engine = "pyarrow", compression = compression,
+                                          index = False)
+
+
+def export_feather(dataset: pd.DataFrame, path: str):
+    """
+    Write the dataset as an uncompressed Arrow IPC (Feather v2) file.
+
+    Uncompressed buffers are what allows read_feather() to memory-map the file
+    instead of copying it.
+    """
+    _require_pyarrow()
+    to_columnar_frame(dataset).to_feather(path, compression = "uncompressed")
+
+
+def read_parquet(path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Read a Parquet export back, optionally only some columns."""
+    _require_pyarrow()
+    from pyarrow import parquet
+
+    # Parquet only keeps dictionaries of strings, so categoricals of numbers (rank) are
+    # restored from the pandas metadata stored in the file
+    metadata = parquet.read_schema(path).pandas_metadata or {"columns": []}
+    categories = [column["name"] for column in metadata["columns"]
+                  if column["pandas_type"] == "categorical"]
+    table = parquet.read_table(path, columns = None if columns is None else list(columns))
+    return table.to_pandas(categories = [column for column in categories
+                                         if column in table.column_names])
+
+
+def read_feather(path: str, columns: Optional[Iterable[str]] = None,
+                 memory_map: bool = True) -> pd.DataFrame:
+    """Read a Feather export back, memory-mapping the file by default."""
+    _require_pyarrow()
+    from pyarrow import feather
+
+    table = feather.read_table(path, columns = None if columns is None else list(columns),
+                               memory_map = memory_map)
+    return table.to_pandas()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Season over season trajectory features of every team.
+
+Explaining success needs each team's history: the points of its previous
+season, the change of its adjusted goals, whether it was just promoted, how
+many Champions League seasons it has played in a row. The rows are sorted once
+by (squad, competition, season) and every feature is computed on the whole
+sorted columns:
+
+- a run is a sequence of consecutive seasons of a squad in a competition, it
+  starts at the first row of the squad, at a change of competition, or after a
+  season missing from the dataset (the team was in a lower league);
+- <metric>_lag1 is the value of the previous season of the run, missing at the
+  start of a run, and <metric>_delta1 the change from it;
+- <metric>_mean<w> is the mean over the w previous seasons of the run, from
+  running sums so the cost does not depend on w;
+- <flag>_streak counts the consecutive seasons up to the current one with the
+  Yes/No flag set;
+- seasons_in_league is the position of the season in its run, and promoted is
+  Yes when the run starts after the first season of the competition in the
+  dataset.
+
+The features table is keyed by squad and season, with team_id and competition,
+and written next to the preprocessed dataset as Trajectory_Features.csv.
+"""
+
+# Import libraries
+import os
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_METRICS = ("points", "adjusted_points", "adjusted_goals_for", "adjusted_goals_against",
+                   "adjusted_goal_diff", "points_per_match")
+DEFAULT_WINDOWS = (3,)
+STREAK_FLAGS = {"champions_league": "UEFA Champions League",
+                "europa_league": "UEFA Europa League",
+                "relegation": "Relegation",
+                }
+DELTA_DECIMALS = 12
+KEY_COLUMNS = ["squad", "team_id", "competition", "season"]
+FEATURES_FILE_NAME = "Trajectory_Features.csv"
+
+
+def features_path(preprocessed_path: str) -> str:
+    """Features table file, next to the preprocessed dataset."""
+    return os.path.join(os.path.dirname(preprocessed_path), FEATURES_FILE_NAME)
+
+
+def season_start(season: pd.Series) -> np.ndarray:
+    """First year of every season written as "2010-2011", parsed once per distinct season."""
+    codes, distinct = pd.factorize(season)
+    starts = np.array([int(str(value)[:4]) for value in distinct], dtype = np.int64)
+    return starts[codes]
+
+
+def _run_starts(squad: np.ndarray, competition: np.ndarray, start: np.ndarray) -> np.ndarray:
+    # True where a run begins in rows sorted by squad, competition and season
+    first = np.ones(len(start), dtype = bool)
+    first[1:] = ((squad[1:] != squad[:-1]) | (competition[1:] != competition[:-1])
+                 | (start[1:] != start[:-1] + 1))
+    return first
+
+
+def _window_means(values: np.ndarray, run_position: np.ndarray, windows: Iterable[int]) -> dict:
+    # Means of the non-missing values over the window previous rows of the run, from running sums
+    present = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0))])
+    counts = np.concatenate([[0], np.cumsum(present)])
+    rows = np.arange(len(values))
+    means = {}
+    for window in windows:
+        previous = rows - np.minimum(run_position, window)
+        count = counts[rows] - counts[previous]
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            means[window] = np.where(count > 0, (sums[rows] - sums[previous]) / count, np.nan)
+    return means
+
+
+def _streaks(flag: np.ndarray, first: np.ndarray) -> np.ndarray:
+    # Consecutive flagged rows of the run ending at every row, 0 where the flag is not set
+    rows = np.arange(len(flag))
+    resets = np.maximum.accumulate(np.where(first | ~flag, rows, 0))
+    return np.where(flag, rows - resets + flag[resets], 0)
+
+
+def trajectory_features(dataset: pd.DataFrame, metrics: Iterable[str] = DEFAULT_METRICS,
+                        windows: Iterable[int] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    """
+    Lag, change, rolling mean and streak features of every team season.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset, with one row per squad, competition and season.
+    metrics : Iterable[str], optional
+        Numeric columns to compute the lag, delta and rolling mean features of.
+        The default is DEFAULT_METRICS.
+    windows : Iterable[int], optional
+        Numbers of previous seasons of the rolling means. The default is
+        DEFAULT_WINDOWS.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per team season sorted by squad, competition and season, with
+        the KEY_COLUMNS present in the dataset, seasons_in_league, promoted,
+        the <metric>_lag1, <metric>_delta1 and <metric>_mean<w> of every metric
+        and window, and the streak of every STREAK_FLAGS column present.
+
+    """
+    metrics, windows = list(metrics), list(windows)
+    start = season_start(dataset["season"])
+    # The only sort: squad and competition by their codes, then the season start year
+    squad = pd.factorize(dataset["squad"], sort = True)[0]
+    competition = pd.factorize(dataset["competition"], sort = True)[0]
+    order = np.lexsort((start, competition, squad))
+    squad, competition, start = squad[order], competition[order], start[order]
+    duplicated = (squad[1:] == squad[:-1]) & (competition[1:] == competition[:-1]) & (start[1:] == start[:-1])
+    if duplicated.any():
+        rows = dataset.iloc[order[1:][duplicated]]
+        raise ValueError("Several rows for the same squad, competition and season: "
+                         f"{rows[['squad', 'competition', 'season']].values.tolist()[:5]}")
+
+    first = _run_starts(squad, competition, start)
+    rows = np.arange(len(order))
+    run_position = rows - np.maximum.accumulate(np.where(first, rows, 0))
+    league_first_season = pd.Series(start).groupby(competition).transform("min").to_numpy()
+
+    features = dataset.iloc[order][[column for column in KEY_COLUMNS if column in dataset.columns]]
+    features = features.reset_index(drop = True)
+    features["seasons_in_league"] = run_position + 1
+    features["promoted"] = pd.Categorical.from_codes((first & (start > league_first_season)).astype(np.int8),
+                                                     ["No", "Yes"])
+    for metric in metrics:
+        values = dataset[metric].to_numpy(dtype = float, na_value = np.nan)[order]
+        lag = np.concatenate([[np.nan], values[:-1]])
+        lag[first] = np.nan
+        delta = values - lag
+        if pd.api.types.is_integer_dtype(dataset[metric].dtype):
+            features[f"{metric}_lag1"] = pd.array(lag, dtype = "Float64").astype("Int64")
+            features[f"{metric}_delta1"] = pd.array(delta, dtype = "Float64").astype("Int64")
+        else:
+            # Without the representation error of the difference, 1.08 - 1.11 is -0.03
+            features[f"{metric}_lag1"] = lag
+            features[f"{metric}_delta1"] = np.round(delta, DELTA_DECIMALS)
+        for window, means in _window_means(values, run_position, windows).items():
+            features[f"{metric}_mean{window}"] = means
+    for name, column in STREAK_FLAGS.items():
+        if column in dataset.columns:
+            flag = (dataset[column] == "Yes").to_numpy(dtype = bool)[order]
+            features[f"{name}_streak"] = _streaks(flag, first)
+    return features
+
+
+def write_features(features: pd.DataFrame, path: str):
+    """Write the features table as a CSV file keyed by squad and season."""
+    features.to_csv(path, index = False)
+
+
+def read_features(path: str) -> pd.DataFrame:
+    """Read a features table written by write_features(), indexed by squad and season."""
+    return pd.read_csv(path).set_index(["squad", "season"])
+
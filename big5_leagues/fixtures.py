@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Match-level ingestion: team season rows aggregated from fixtures.
+
+A fixtures file has one row per match with the competition, season, home_team,
+away_team, home_goals and away_goals columns, and optionally home_<statistic>
+and away_<statistic> columns for the SIDE_STATISTICS. The file is read in
+chunks of rows and every chunk is turned into two views with one row per team
+and match, the home view and the away view, which are summed with a groupby on
+(competition, season, squad). The sums of the chunks are added up, so the
+memory depends on the chunk size and the number of team seasons, not on the
+number of matches.
+
+From the sums come the columns of the Big 5 teams stats file: games, wins,
+draws, losses, goals_for, goals_against, goal_diff, points (less the points
+deductions), clean_sheets, points_per_match, the sums of the statistics,
+shots_on_target_against from the opponents' shots on target and saves from
+them less the goals conceded. A statistic is missing for a team season when it
+is missing for any of its matches, and the columns fixtures do not hold
+(players_used, games_starts, ...) are missing.
+
+The rank follows the tie-breakers of every competition in TIE_BREAKERS: La
+Liga and Serie A separate the teams level on points by their head-to-head
+results first, the other leagues by goal difference and goals scored. The
+head-to-head keys are computed on the mini-league of the teams level on points
+with the pairwise sums of their matches. Teams level on every key are ordered
+by name. Seasons cut short and ranked by points per match are not handled.
+
+The result has the columns and dtypes of read_teams_stats(), so it goes
+through the standardization, renames and flags stages like the source file,
+and write_teams_stats() saves it in the source file format:
+    big5-leagues fixtures "path/to/fixtures.csv" --output "path/to/teams stats.csv"
+"""
+
+# Import libraries
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.ingestion import COLUMNS, SCHEMA
+from big5_leagues.quality import DEDUCTION_KEYS
+
+DEFAULT_CHUNK_ROWS = 500000
+
+FIXTURE_KEYS = ["competition", "season", "home_team", "away_team"]
+TEAM_KEYS = ["competition", "season", "squad"]
+
+# Statistics of every side of a match, read from the home_<name> and away_<name> columns
+SIDE_STATISTICS = ["assists", "pens_made", "pens_att", "cards_yellow", "cards_red", "shots_on_target"]
+
+# Sums of the side views
+RESULT_COLUMNS = ["games", "wins", "draws", "losses", "goals_for", "goals_against", "clean_sheets"]
+
+HEAD_TO_HEAD = {"head_to_head_points": "points",
+                "head_to_head_goal_diff": "goal_diff",
+                "head_to_head_goals_for": "goals_for",
+                }
+DEFAULT_TIE_BREAKERS = ("points", "goal_diff", "goals_for")
+TIE_BREAKERS = {"La Liga": ("points", "head_to_head_points", "head_to_head_goal_diff", "goal_diff", "goals_for"),
+                "Serie A": ("points", "head_to_head_points", "head_to_head_goal_diff", "goal_diff", "goals_for"),
+                }
+
+
+def read_fixtures(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a fixtures CSV file in chunks.
+
+    Parameters
+    ----------
+    path : str
+        CSV file with one row per match.
+    chunk_rows : int, optional
+        Matches read at once. The default is DEFAULT_CHUNK_ROWS.
+
+    Returns
+    -------
+    Iterator[pd.DataFrame]
+        Chunks with categorical keys. The C parser is slow at filling nullable
+        integers, so the counts are left to inference, float64 where some are
+        missing.
+
+    """
+    categories = {column: "category" for column in FIXTURE_KEYS}
+    return pd.read_csv(path, dtype = categories, encoding = "utf-8", chunksize = chunk_rows)
+
+
+def _validate(fixtures: pd.DataFrame):
+    missing = [column for column in FIXTURE_KEYS + ["home_goals", "away_goals"] if column not in fixtures.columns]
+    if missing:
+        raise ValueError(f"The fixtures have no {missing} columns")
+    unknown = fixtures[FIXTURE_KEYS + ["home_goals", "away_goals"]].isna().any(axis = 1)
+    if unknown.any():
+        raise ValueError(f"Fixtures without teams or score at rows: {np.flatnonzero(unknown)[:5].tolist()}")
+
+
+def side_views(fixtures: pd.DataFrame) -> pd.DataFrame:
+    """
+    Home and away views of the fixtures, one row per team and match.
+
+    Parameters
+    ----------
+    fixtures : pd.DataFrame
+        Matches with the FIXTURE_KEYS, home_goals and away_goals columns.
+
+    Returns
+    -------
+    pd.DataFrame
+        The home view followed by the away view, with the TEAM_KEYS, the
+        opponent, the RESULT_COLUMNS of the match, the SIDE_STATISTICS of the
+        team and shots_on_target_against, and a <statistic>_missing count of
+        every statistic.
+
+    """
+    _validate(fixtures)
+    # Both team columns share their categories, so the views concatenate as categoricals
+    # and the teams are compared by their codes
+    home_team = fixtures["home_team"].astype("category")
+    away_team = fixtures["away_team"].astype("category")
+    teams = pd.api.types.union_categoricals([home_team, away_team]).categories
+    team = {"home": home_team.cat.set_categories(teams).array, "away": away_team.cat.set_categories(teams).array}
+    same = team["home"].codes == team["away"].codes
+    if same.any():
+        raise ValueError(f"Fixtures of a team against itself at rows: {np.flatnonzero(same)[:5].tolist()}")
+    statistics = [name for name in SIDE_STATISTICS
+                  if f"home_{name}" in fixtures.columns and f"away_{name}" in fixtures.columns]
+    views = []
+    for side, other in (("home", "away"), ("away", "home")):
+        goals_for = fixtures[f"{side}_goals"].to_numpy(dtype = np.int64)
+        goals_against = fixtures[f"{other}_goals"].to_numpy(dtype = np.int64)
+        view = {"competition": fixtures["competition"].astype("category").array,
+                "season": fixtures["season"].astype("category").array,
+                "squad": team[side],
+                "opponent": team[other],
+                "games": np.ones(len(fixtures), dtype = np.int64),
+                "wins": (goals_for > goals_against).astype(np.int64),
+                "draws": (goals_for == goals_against).astype(np.int64),
+                "losses": (goals_for < goals_against).astype(np.int64),
+                "goals_for": goals_for,
+                "goals_against": goals_against,
+                "clean_sheets": (goals_against == 0).astype(np.int64),
+                }
+        sides = [(name, f"{side}_{name}") for name in statistics]
+        if "shots_on_target" in statistics:
+            sides.append(("shots_on_target_against", f"{other}_shots_on_target"))
+        for name, column in sides:
+            values = fixtures[column]
+            view[name] = values.fillna(0).to_numpy(dtype = np.int64)
+            view[f"{name}_missing"] = values.isna().to_numpy(dtype = np.int64)
+        views.append(pd.DataFrame(view))
+    return pd.concat(views, ignore_index = True)
+
+
+def _sum_by(table: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    # Sums of every other column per key, with the keys as columns
+    return table.groupby(list(keys), observed = True, sort = False).sum().reset_index()
+
+
+def _head_to_head_keys(tie_breakers: Mapping[str, Sequence[str]]) -> list:
+    # Competitions whose ranks need the pairwise sums
+    return [competition for competition, keys in tie_breakers.items()
+            if any(key in HEAD_TO_HEAD for key in keys)]
+
+
+def aggregate_fixtures(chunks: Iterable[pd.DataFrame],
+                       tie_breakers: Mapping[str, Sequence[str]] = TIE_BREAKERS) -> tuple:
+    """
+    Sum the side views of chunks of fixtures per team season.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        Chunks of matches, see read_fixtures().
+    tie_breakers : Mapping[str, Sequence[str]], optional
+        Tie-breakers per competition, the pairwise sums are only kept for the
+        competitions with head-to-head keys. The default is TIE_BREAKERS.
+
+    Returns
+    -------
+    tuple
+        The sums per (competition, season, squad), and the sums per
+        (competition, season, squad, opponent) of the RESULT_COLUMNS.
+
+    """
+    head_to_head = _head_to_head_keys(tie_breakers)
+    team_sums, pair_sums = [], []
+    for chunk in chunks:
+        views = side_views(chunk)
+        team_sums.append(_sum_by(views.drop(columns = "opponent"), TEAM_KEYS))
+        pairs = views.loc[views["competition"].isin(head_to_head), TEAM_KEYS + ["opponent"] + RESULT_COLUMNS]
+        pair_sums.append(_sum_by(pairs, TEAM_KEYS + ["opponent"]))
+        del views, pairs
+    if not team_sums:
+        raise ValueError("The fixtures have no rows")
+    # The chunk sums have different categories, the few rows of their sums are keyed by strings
+    keys = TEAM_KEYS + ["opponent"]
+    teams = _sum_by(pd.concat(team_sums, ignore_index = True).astype({key: str for key in TEAM_KEYS}), TEAM_KEYS)
+    pairs = _sum_by(pd.concat(pair_sums, ignore_index = True).astype({key: str for key in keys}), keys)
+    return teams, pairs
+
+
+def _refine(group: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Codes of the rows level on the previous keys and on values
+    return np.unique(np.column_stack([group, values]), axis = 0, return_inverse = True)[1].ravel()
+
+
+def rank_teams(teams: pd.DataFrame, pairs: Optional[pd.DataFrame] = None,
+               tie_breakers: Mapping[str, Sequence[str]] = TIE_BREAKERS) -> np.ndarray:
+    """
+    Rank of every team in its competition season.
+
+    Parameters
+    ----------
+    teams : pd.DataFrame
+        One row per team season with the TEAM_KEYS and the columns of the
+        tie-breakers.
+    pairs : pd.DataFrame, optional
+        Sums per (competition, season, squad, opponent) with the points,
+        goals_for and goals_against, needed by the head-to-head keys. The
+        default is None.
+    tie_breakers : Mapping[str, Sequence[str]], optional
+        Keys ordering the teams of every competition, higher first, a column of
+        teams or one of the HEAD_TO_HEAD keys. Competitions without an entry
+        use DEFAULT_TIE_BREAKERS. The default is TIE_BREAKERS.
+
+    Returns
+    -------
+    np.ndarray
+        The rank of every row, from 1.
+
+    """
+    size = len(teams)
+    rank = np.zeros(size, dtype = np.int64)
+    league = teams.groupby(["competition", "season"], observed = True, sort = False).ngroup().to_numpy()
+    squad = pd.factorize(teams["squad"].astype(str), sort = True)[0]
+    if pairs is not None and len(pairs):
+        # Row of the team and of the opponent of every pair
+        index = pd.MultiIndex.from_frame(teams[TEAM_KEYS].astype(str))
+        pair_team = index.get_indexer(pd.MultiIndex.from_frame(pairs[TEAM_KEYS].astype(str)))
+        pair_opponent = index.get_indexer(pd.MultiIndex.from_frame(
+            pairs[["competition", "season", "opponent"]].astype(str)))
+        known = (pair_team >= 0) & (pair_opponent >= 0)
+        pair_team, pair_opponent = pair_team[known], pair_opponent[known]
+        pair_values = {"points": 3 * pairs["wins"].to_numpy()[known] + pairs["draws"].to_numpy()[known],
+                       "goals_for": pairs["goals_for"].to_numpy()[known]}
+        pair_values["goal_diff"] = pair_values["goals_for"] - pairs["goals_against"].to_numpy()[known]
+
+    competition = teams["competition"].astype(str).to_numpy()
+    for competitions in pd.unique(competition):
+        keys = tuple(tie_breakers.get(competitions, DEFAULT_TIE_BREAKERS))
+        rows = np.flatnonzero(competition == competitions)
+        group = league[rows]
+        mini_league = None
+        values = []
+        for key in keys:
+            if key in HEAD_TO_HEAD:
+                if pairs is None or not len(pairs):
+                    raise ValueError(f"The {key} tie-breaker needs the pairwise sums of the fixtures")
+                if mini_league is None:
+                    # The head-to-head keys are computed among the teams level before the first one
+                    mini_league = np.full(size, -1, dtype = np.int64)
+                    mini_league[rows] = group
+                    local = np.full(size, -1, dtype = np.int64)
+                    local[rows] = np.arange(len(rows))
+                same = (mini_league[pair_team] >= 0) & (mini_league[pair_team] == mini_league[pair_opponent])
+                key_values = np.bincount(local[pair_team[same]], weights = pair_values[HEAD_TO_HEAD[key]][same],
+                                         minlength = len(rows)).astype(np.int64)
+            else:
+                key_values = teams[key].to_numpy(dtype = np.int64)[rows]
+            values.append(key_values)
+            group = _refine(group, key_values)
+        # Higher values first, the league season as the outermost key and the name as the last one
+        order = np.lexsort((squad[rows], *[-value for value in reversed(values)], league[rows]))
+        sorted_league = league[rows][order]
+        positions = np.arange(len(rows))
+        first = np.ones(len(rows), dtype = bool)
+        first[1:] = sorted_league[1:] != sorted_league[:-1]
+        rank[rows[order]] = positions - np.maximum.accumulate(np.where(first, positions, 0)) + 1
+    return rank
+
+
+def _with_schema(teams: pd.DataFrame) -> pd.DataFrame:
+    # Columns of the teams stats file with the dtypes of read_teams_stats()
+    dataset = {}
+    for column in COLUMNS:
+        dtype = SCHEMA[column]
+        if column not in teams.columns:
+            values = pd.Series(pd.NA, index = teams.index, dtype = "float64" if dtype == "float64" else dtype)
+        else:
+            values = teams[column].astype(dtype)
+        dataset[column] = values
+    return pd.DataFrame(dataset)
+
+
+def fixtures_to_teams_stats(source: Union[str, pd.DataFrame], deductions: Optional[pd.DataFrame] = None,
+                            tie_breakers: Mapping[str, Sequence[str]] = TIE_BREAKERS,
+                            chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Aggregate fixtures into team season rows of the Big 5 teams stats file.
+
+    Parameters
+    ----------
+    source : str or pd.DataFrame
+        Fixtures CSV file, read in chunks, or the fixtures themselves.
+    deductions : pd.DataFrame, optional
+        Points deductions returned by load_deductions(), taken off the points
+        before ranking. The default is None.
+    tie_breakers : Mapping[str, Sequence[str]], optional
+        Tie-breakers per competition, see rank_teams(). The default is
+        TIE_BREAKERS.
+    chunk_rows : int, optional
+        Matches read at once from a file. The default is DEFAULT_CHUNK_ROWS.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per team season sorted by competition, season and rank, with
+        the columns and dtypes of read_teams_stats().
+
+    """
+    chunks = [source] if isinstance(source, pd.DataFrame) else read_fixtures(source, chunk_rows)
+    teams, pairs = aggregate_fixtures(chunks, tie_breakers)
+
+    teams["goal_diff"] = teams["goals_for"] - teams["goals_against"]
+    teams["points"] = 3 * teams["wins"] + teams["draws"]
+    if deductions is not None:
+        deducted = teams[DEDUCTION_KEYS].astype(str).merge(deductions, how = "left", on = DEDUCTION_KEYS,
+                                                           validate = "many_to_one")
+        teams["points"] -= deducted["points_deduction"].fillna(0).to_numpy(dtype = np.int64)
+    teams["points_per_match"] = np.round(teams["points"] / teams["games"], 2)
+    if "shots_on_target_against" in teams.columns:
+        teams["saves"] = teams["shots_on_target_against"] - teams["goals_against"]
+        teams["saves_missing"] = teams["shots_on_target_against_missing"]
+    for column in [column for column in teams.columns if column.endswith("_missing")]:
+        name = column[:-len("_missing")]
+        teams[name] = teams[name].astype("Int64").mask(teams[column] > 0)
+    teams["rank"] = rank_teams(teams, pairs, tie_breakers)
+
+    teams = teams.sort_values(["competition", "season", "rank"]).reset_index(drop = True)
+    return _with_schema(teams)
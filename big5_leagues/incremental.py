@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Appending a new season without recomputing the whole history.
+
+A full run of the cleaning script stores running statistics of the raw dataset
+next to the EDA tables. Appending a season then only cleans the new rows, appends
+them to the preprocessed dataset and updates the running statistics. The
+Descriptive_Statistics_Table, Missing_Values_Table and Correlation_Matrix_Table
+are rebuilt from those statistics, so the work depends on the size of the new
+data rather than on the whole history. The dashboard fact tables and the
+trajectory features are rebuilt from the whole appended dataset, as by the cube
+and features commands.
+
+Every output is first written to a temporary file next to it, and the old files
+are only replaced once all of them are written: an append that fails leaves the
+outputs as they were.
+
+Run from the repository root:
+    big5-leagues append "path/to/new season.csv"
+"""
+
+# Import libraries
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues import cube, features
+from big5_leagues.cleaning import clean_dataset
+from big5_leagues.eda import descriptive_statistics_table, missing_values_table
+from big5_leagues.qualification import DEFAULT_CORRECTIONS_PATH, load_corrections
+from big5_leagues.sketches import QuantileSketch
+from big5_leagues.teams import TeamIndex
+
+DEFAULT_PREPROCESSED_PATH = "datasets/PreProcessed Dataset - Big 5 European football leagues teams stats.csv"
+DEFAULT_TABLES_DIRECTORY = "datasets/exploratory_data_analysis_tables"
+DEFAULT_STATISTICS_PATH = f"{DEFAULT_TABLES_DIRECTORY}/Running_Statistics.json"
+
+PARTITION_COLUMNS = ["competition", "season"]
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class RunningStatistics:
+    """
+    Mergeable summary of a dataset that rebuilds the three EDA tables.
+
+    For every pair of numeric columns it keeps the number of rows where both are
+    present together with the sums, sums of squares and sums of products over
+    those rows, so correlations use pairwise complete rows like DataFrame.corr().
+    Values are shifted by a fixed reference per column before they are summed to
+    keep the sums numerically stable. Quantiles come from exact value counts,
+    whose size is bounded by the number of distinct values, not by the rows.
+    With max_values, the counts of a column with more distinct values are
+    bucketed, see big5_leagues.sketches.QuantileSketch.
+    """
+
+    def __init__(self, columns: Iterable[str], numeric_columns: Iterable[str],
+                 shift: Optional[np.ndarray] = None, max_values: Optional[int] = None):
+        self.columns = list(columns)
+        self.numeric_columns = list(numeric_columns)
+        size = len(self.numeric_columns)
+        self.shift = np.zeros(size) if shift is None else np.asarray(shift, dtype = float)
+        self.rows = 0
+        self.count_null = np.zeros(len(self.columns), dtype = np.int64)
+        self.pair_count = np.zeros((size, size))
+        self.pair_sum = np.zeros((size, size))
+        self.pair_sum_squares = np.zeros((size, size))
+        self.pair_sum_products = np.zeros((size, size))
+        self.minimum = np.full(size, np.nan)
+        self.maximum = np.full(size, np.nan)
+        self.max_values = max_values
+        self.sketches = [QuantileSketch(max_values) for _ in range(size)]
+        self.partitions = set()
+
+    @classmethod
+    def from_frame(cls, dataset: pd.DataFrame) -> "RunningStatistics":
+        numeric = dataset.select_dtypes("number")
+        shift = numeric.mean().fillna(0).to_numpy(dtype = float)
+        statistics = cls(dataset.columns, numeric.columns, shift)
+        statistics.update(dataset)
+        return statistics
+
+    def update(self, dataset: pd.DataFrame) -> "RunningStatistics":
+        """Add the rows of the dataset to the statistics."""
+        if list(dataset.columns) != self.columns:
+            raise ValueError("The new rows do not have the columns the statistics were built on")
+        values = dataset[self.numeric_columns].to_numpy(dtype = float, na_value = np.nan)
+        present = ~np.isnan(values)
+        shifted = np.where(present, values - self.shift, 0.0)
+        weights = present.astype(float)
+
+        self.rows += len(dataset)
+        self.count_null += dataset.isnull().sum().to_numpy(dtype = np.int64)
+        # Entry [i, j] sums column i over the rows where column j is present
+        self.pair_count += weights.T @ weights
+        self.pair_sum += shifted.T @ weights
+        self.pair_sum_squares += (shifted ** 2).T @ weights
+        self.pair_sum_products += shifted.T @ shifted
+        self.minimum = np.fmin(self.minimum,
+                               np.where(present, values, np.inf).min(axis = 0, initial = np.inf))
+        self.maximum = np.fmax(self.maximum,
+                               np.where(present, values, -np.inf).max(axis = 0, initial = -np.inf))
+        self.minimum[np.isinf(self.minimum)] = np.nan
+        self.maximum[np.isinf(self.maximum)] = np.nan
+        for position, sketch in enumerate(self.sketches):
+            sketch.update(values[present[:, position], position])
+        if set(PARTITION_COLUMNS) <= set(dataset.columns):
+            self.partitions |= set(dataset[PARTITION_COLUMNS].drop_duplicates().astype(str)
+                                   .itertuples(index = False, name = None))
+        return self
+
+    def merge(self, other: "RunningStatistics") -> "RunningStatistics":
+        """Combine with the statistics of other rows built with the same columns and shift."""
+        if self.columns != other.columns or not np.array_equal(self.shift, other.shift):
+            raise ValueError("Only statistics with the same columns and shift can be merged")
+        self.rows += other.rows
+        self.count_null += other.count_null
+        self.pair_count += other.pair_count
+        self.pair_sum += other.pair_sum
+        self.pair_sum_squares += other.pair_sum_squares
+        self.pair_sum_products += other.pair_sum_products
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        self.partitions |= other.partitions
+        return self
+
+    # Tables
+    def descriptive_stats(self) -> pd.DataFrame:
+        """Same table as describe() on the numeric columns."""
+        count = np.diag(self.pair_count)
+        total = np.diag(self.pair_sum)
+        with np.errstate(all = "ignore"):
+            mean = self.shift + total / count
+            variance = (np.diag(self.pair_sum_squares) - total ** 2 / count) / (count - 1)
+        statistics = {"count": count,
+                      "mean": mean,
+                      "std": np.sqrt(np.maximum(variance, 0)),
+                      "min": self.minimum}
+        for quantile in QUANTILES:
+            statistics[f"{quantile:.0%}"] = [sketch.quantile(quantile) for sketch in self.sketches]
+        statistics["max"] = self.maximum
+        return pd.DataFrame(statistics, index = self.numeric_columns).T
+
+    def count_null_series(self) -> pd.Series:
+        return pd.Series(self.count_null, index = self.columns)
+
+    def correlation_matrix(self) -> pd.DataFrame:
+        """Same table as corr() with pairwise complete rows."""
+        count = self.pair_count
+        with np.errstate(all = "ignore"):
+            covariance = self.pair_sum_products - self.pair_sum * self.pair_sum.T / count
+            variance = self.pair_sum_squares - self.pair_sum ** 2 / count
+            correlation = covariance / np.sqrt(variance * variance.T)
+        correlation[count < 2] = np.nan
+        correlation = np.clip(correlation, -1, 1)
+        np.fill_diagonal(correlation, np.where(np.diag(count) >= 2, 1.0, np.nan))
+        return pd.DataFrame(correlation, index = self.numeric_columns, columns = self.numeric_columns)
+
+    # Persistence
+    def save(self, path: str = DEFAULT_STATISTICS_PATH):
+        state = {"columns": self.columns,
+                 "numeric_columns": self.numeric_columns,
+                 "shift": self.shift.tolist(),
+                 "rows": self.rows,
+                 "count_null": self.count_null.tolist(),
+                 "pair_count": self.pair_count.tolist(),
+                 "pair_sum": self.pair_sum.tolist(),
+                 "pair_sum_squares": self.pair_sum_squares.tolist(),
+                 "pair_sum_products": self.pair_sum_products.tolist(),
+                 "minimum": self.minimum.tolist(),
+                 "maximum": self.maximum.tolist(),
+                 "value_counts": [sketch.items() for sketch in self.sketches],
+                 "partitions": sorted(self.partitions),
+                 }
+        if self.max_values is not None:
+            state["max_values"] = self.max_values
+            state["bucketed"] = [sketch.bucketed for sketch in self.sketches]
+        with open(path, "w", encoding = "utf-8") as file:
+            json.dump(state, file)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_STATISTICS_PATH) -> "RunningStatistics":
+        with open(path, encoding = "utf-8") as file:
+            state = json.load(file)
+        statistics = cls(state["columns"], state["numeric_columns"], state["shift"],
+                         state.get("max_values"))
+        statistics.rows = state["rows"]
+        statistics.count_null = np.array(state["count_null"], dtype = np.int64)
+        for name in ("pair_count", "pair_sum", "pair_sum_squares", "pair_sum_products",
+                     "minimum", "maximum"):
+            setattr(statistics, name, np.array(state[name], dtype = float))
+        bucketed = state.get("bucketed", [False] * len(state["value_counts"]))
+        statistics.sketches = [QuantileSketch.from_items(items, statistics.max_values, bucketed = column_bucketed)
+                               for items, column_bucketed in zip(state["value_counts"], bucketed)]
+        statistics.partitions = {tuple(partition) for partition in state["partitions"]}
+        return statistics
+
+
+def _eda_tables(statistics: RunningStatistics) -> Dict[str, pd.DataFrame]:
+    # The three EDA tables by file name
+    return {"Descriptive_Statistics_Table.csv": descriptive_statistics_table(statistics.descriptive_stats()),
+            "Missing_Values_Table.csv": missing_values_table(statistics.count_null_series(), statistics.rows),
+            "Correlation_Matrix_Table.csv": statistics.correlation_matrix(),
+            }
+
+
+def write_eda_tables(statistics: RunningStatistics,
+                     tables_directory: str = DEFAULT_TABLES_DIRECTORY):
+    """Write the three EDA tables from running statistics."""
+    for name, table in _eda_tables(statistics).items():
+        table.to_csv(os.path.join(tables_directory, name), index = True)
+
+
+def _replace_files(writers: Mapping[str, Callable[[str], None]]):
+    # Call every writer with a temporary file next to its output, then move them all over the outputs
+    temporary = {}
+    try:
+        for path, write in writers.items():
+            descriptor, temporary[path] = tempfile.mkstemp(dir = os.path.dirname(path) or ".", suffix = ".tmp")
+            os.close(descriptor)
+            if os.path.exists(path):
+                shutil.copymode(path, temporary[path])
+            write(temporary[path])
+    except BaseException:
+        for name in temporary.values():
+            if os.path.exists(name):
+                os.remove(name)
+        raise
+    for path, name in temporary.items():
+        os.replace(name, path)
+
+
+def append_season(new_rows: pd.DataFrame,
+                  preprocessed_path: str = DEFAULT_PREPROCESSED_PATH,
+                  statistics_path: str = DEFAULT_STATISTICS_PATH,
+                  tables_directory: str = DEFAULT_TABLES_DIRECTORY,
+                  corrections: Optional[pd.DataFrame] = None,
+                  teams: Optional[TeamIndex] = None,
+                  cube_directory: Optional[str] = None,
+                  features_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Clean new team season rows and append them to the preprocessed dataset.
+
+    The EDA tables and running statistics are updated, the dashboard fact
+    tables and the trajectory features rebuilt, and all the outputs replaced
+    together once every one is written.
+
+    Parameters
+    ----------
+    new_rows : pd.DataFrame
+        Raw rows of the new season(s), with the columns of the source file.
+    preprocessed_path : str, optional
+        Preprocessed dataset the cleaned rows are appended to.
+    statistics_path : str, optional
+        Running statistics written by the last full run or append.
+    tables_directory : str, optional
+        Directory of the EDA tables to update.
+    corrections : pd.DataFrame, optional
+        FlashFootball corrections. The default is None, which loads
+        DEFAULT_CORRECTIONS_PATH.
+    teams : TeamIndex, optional
+        Alias table of the team names. The default is None, which loads
+        DEFAULT_ALIASES_PATH.
+    cube_directory : str, optional
+        Directory of the dashboard fact tables. The default is None, next to
+        the preprocessed dataset.
+    features_path : str, optional
+        CSV file of the trajectory features, rebuilt with the DEFAULT_METRICS
+        and DEFAULT_WINDOWS of big5_leagues.features. The default is None, next
+        to the preprocessed dataset.
+
+    Returns
+    -------
+    pd.DataFrame
+        The cleaned rows that were appended.
+
+    """
+    statistics = RunningStatistics.load(statistics_path)
+    partitions = set(new_rows[PARTITION_COLUMNS].astype(str).itertuples(index = False, name = None))
+    already_loaded = partitions & statistics.partitions
+    if already_loaded:
+        raise ValueError(f"These seasons are already in the dataset: {sorted(already_loaded)}")
+
+    if teams is None:
+        teams = TeamIndex.load()
+    if corrections is None:
+        corrections = load_corrections(DEFAULT_CORRECTIONS_PATH, teams)
+    cleaned = clean_dataset(new_rows.reset_index(drop = True), corrections, teams = teams)
+    # Continue the index of the rows already written
+    cleaned.index = pd.RangeIndex(statistics.rows, statistics.rows + len(cleaned))
+    header = pd.read_csv(preprocessed_path, nrows = 0, index_col = 0).columns
+    cleaned = cleaned[header]
+
+    statistics.update(new_rows)
+
+    # The appended dataset as the cube and features commands would read it
+    with open(preprocessed_path, encoding = "utf-8", newline = "") as file:
+        text = file.read() + cleaned.to_csv(header = False, index = True)
+    dataset = pd.read_csv(io.StringIO(text), index_col = 0)
+    if cube_directory is None:
+        cube_directory = cube.cube_directory(preprocessed_path)
+    if features_path is None:
+        features_path = features.features_path(preprocessed_path)
+    os.makedirs(cube_directory, exist_ok = True)
+
+    def write_text(path: str):
+        with open(path, "w", encoding = "utf-8", newline = "") as file:
+            file.write(text)
+
+    writers = {preprocessed_path: write_text}
+    for name, table in _eda_tables(statistics).items():
+        writers[os.path.join(tables_directory, name)] = (
+            lambda path, table = table: table.to_csv(path, index = True))
+    for name, table in cube.build_cube(dataset).items():
+        writers[os.path.join(cube_directory, f"{name}.csv")] = (
+            lambda path, table = table: table.to_csv(path, index = False))
+    trajectories = features.trajectory_features(dataset)
+    writers[features_path] = lambda path: features.write_features(trajectories, path)
+    writers[statistics_path] = statistics.save
+    _replace_files(writers)
+    return cleaned
+
+
+def main():
+    # Kept for python -m big5_leagues.incremental, same as big5-leagues append
+    from big5_leagues.cli import main as cli_main
+
+    cli_main(["append", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Typed loading of the Big 5 European football leagues teams stats file.
+
+Left to inference, read_csv stores the league, season, team and notes columns as
+Python strings and turns every count with a blank into float64. The schema below
+stores the repeated strings as categoricals and the counts as small nullable
+integers, which cuts the resident memory of every loaded season.
+"""
+
+# Import libraries
+import importlib.util
+from typing import Iterable, Optional
+
+import pandas as pd
+
+DEFAULT_DATASET_PATH = "datasets/Big 5 European football leagues teams stats.csv"
+
+# Columns of the teams stats file, in the file order
+COLUMNS = ["competition", "season", "rank", "squad", "games", "wins", "draws", "losses",
+           "goals_for", "goals_against", "goal_diff", "points", "notes", "players_used",
+           "assists", "pens_made", "pens_att", "cards_yellow", "cards_red",
+           "shots_on_target_against", "saves", "clean_sheets", "shots_on_target",
+           "games_starts", "games_complete", "games_subs", "unused_subs", "points_per_match"]
+
+# Low cardinality text columns
+CATEGORICAL_COLUMNS = ["competition", "season", "squad", "notes"]
+
+# Counts that stay below 128 in a season
+SMALL_COUNT_COLUMNS = ["rank", "games", "wins", "draws", "losses", "players_used",
+                       "pens_made", "pens_att", "cards_red", "clean_sheets"]
+
+# Counts that can go above 127 in a season
+COUNT_COLUMNS = ["goals_for", "goals_against", "goal_diff", "points", "assists",
+                 "cards_yellow", "shots_on_target_against", "saves", "shots_on_target",
+                 "games_starts", "games_complete", "games_subs", "unused_subs"]
+
+SCHEMA = {**{column: "category" for column in CATEGORICAL_COLUMNS},
+          **{column: "Int8" for column in SMALL_COUNT_COLUMNS},
+          **{column: "Int16" for column in COUNT_COLUMNS},
+          "points_per_match": "float64",
+          }
+
+
+def read_teams_stats(path: str = DEFAULT_DATASET_PATH,
+                     columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Load the teams stats CSV with the ingestion schema.
+
+    Parameters
+    ----------
+    path : str, optional
+        CSV file with one row per team and season. The default is
+        DEFAULT_DATASET_PATH.
+    columns : Iterable[str], optional
+        Only parse these columns. The default is None, which loads every column.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataset with categorical text columns, nullable integer counts and
+        goal_diff parsed from its signed text form ("+41") to a number.
+
+    """
+    usecols = None if columns is None else list(columns)
+    if importlib.util.find_spec("pyarrow") is not None:
+        # The multithreaded pyarrow parser builds the typed columns directly
+        dataset = pd.read_csv(path, usecols = usecols, dtype = SCHEMA, encoding = "utf-8",
+                              engine = "pyarrow")
+    else:
+        # The C parser is slow at filling nullable integers, so only the categoricals
+        # are parsed to their final dtype and the counts are cast afterwards
+        categories = {column: "category" for column in CATEGORICAL_COLUMNS}
+        dataset = pd.read_csv(path, usecols = usecols, dtype = categories, encoding = "utf-8")
+        dataset = dataset.astype({column: dtype for column, dtype in SCHEMA.items()
+                                  if column in dataset.columns})
+    if usecols is not None:
+        # Keep the column order asked for rather than the file order
+        dataset = dataset[usecols]
+    return dataset
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Timing and memory instrumentation of the pipeline stages.
+
+For every stage run through an Instrumentation, the report records the wall
+time, the CPU time (of this process and of the worker processes it waited
+for), the peak memory, the rows in and out and whether the result came from
+the stage cache. The report is written as JSON so that scheduled runs can be
+compared and alerted on.
+
+Peak memory is measured with tracemalloc by default: the peak of the memory
+allocated while the stage ran, reset before each stage. Tracing slows
+allocation heavy code down, so memory="rss" only reads the peak resident set
+size of the process, which is free but never goes down between stages. The
+RSS and the CPU time of worker processes are not available on Windows.
+
+Stages named in profile_stages are also run under cProfile and their
+statistics dumped to <profile_directory>/<stage>.prof, to be read with pstats
+or snakeviz.
+"""
+
+# Import libraries
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_REPORT_PATH = ".cache/pipeline_report.json"
+DEFAULT_PROFILE_DIRECTORY = ".cache/profiles"
+MEMORY_MODES = ("tracemalloc", "rss")
+
+
+def _rows(value: Any) -> Optional[int]:
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+def _total_rows(values: Iterable[Any]) -> Optional[int]:
+    rows = [_rows(value) for value in values if _rows(value) is not None]
+    return sum(rows) if rows else None
+
+
+def _rss_peak_mb() -> Optional[float]:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** (2 if sys.platform == "darwin" else 1)
+
+
+def _children_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Instrumentation:
+    """
+    Collects one record per stage and writes them as a JSON report.
+
+    Parameters
+    ----------
+    memory : str, optional
+        "tracemalloc" for the peak allocated memory of each stage, "rss" for the
+        peak resident set size of the process. The default is "tracemalloc".
+    profile_stages : Iterable[str], optional
+        Names of the stages to run under cProfile. The default is none.
+    profile_directory : str, optional
+        Directory the cProfile statistics are dumped to. The default is
+        DEFAULT_PROFILE_DIRECTORY.
+
+    """
+
+    def __init__(self, memory: str = "tracemalloc", profile_stages: Iterable[str] = (),
+                 profile_directory: str = DEFAULT_PROFILE_DIRECTORY):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"memory must be one of {MEMORY_MODES}")
+        self.memory = memory
+        self.profile_stages = set(profile_stages)
+        self.profile_directory = profile_directory
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.records = []
+
+    def run(self, name: str, function: Callable, *args, **kwargs) -> Any:
+        """Call function(*args, **kwargs) and record it as the stage name."""
+        # The frame of a bound method such as DataFrame.to_csv counts as an input too
+        inputs = [getattr(function, "__self__", None), *args, *kwargs.values()]
+        tracing = self.memory == "tracemalloc"
+        if tracing:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        children_before = _children_cpu_seconds()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+
+        try:
+            if profiler is not None:
+                value = profiler.runcall(function, *args, **kwargs)
+            else:
+                value = function(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - wall_before
+            cpu = time.process_time() - cpu_before + _children_cpu_seconds() - children_before
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - traced_before
+                if started_tracing:
+                    tracemalloc.stop()
+
+        record = {"stage": name,
+                  "cached": False,
+                  "wall_seconds": wall,
+                  "cpu_seconds": cpu,
+                  "rows_in": _total_rows(inputs),
+                  "rows_out": _rows(value),
+                  "rss_peak_mb": _rss_peak_mb(),
+                  }
+        if tracing:
+            record["peak_mb"] = peak / 1024 ** 2
+        if profiler is not None:
+            os.makedirs(self.profile_directory, exist_ok = True)
+            record["profile"] = os.path.join(self.profile_directory, f"{name}.prof")
+            profiler.dump_stats(record["profile"])
+        self.records.append(record)
+        return value
+
+    def record_cached(self, name: str, inputs: Iterable[Any], value: Any, wall_seconds: float):
+        """Record a stage whose result was read from the stage cache in wall_seconds."""
+        self.records.append({"stage": name,
+                             "cached": True,
+                             "wall_seconds": wall_seconds,
+                             "cpu_seconds": None,
+                             "rows_in": _total_rows(inputs),
+                             "rows_out": _rows(value),
+                             "rss_peak_mb": _rss_peak_mb(),
+                             })
+
+    def report(self) -> dict:
+        return {"started": self.started.isoformat(),
+                "memory": self.memory,
+                "wall_seconds": sum(record["wall_seconds"] for record in self.records),
+                "cpu_seconds": sum(record["cpu_seconds"] or 0 for record in self.records),
+                "rss_peak_mb": _rss_peak_mb(),
+                "stages": self.records,
+                }
+
+    def write(self, path: str = DEFAULT_REPORT_PATH):
+        """Write the report as JSON, creating the directory if missing."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(path, "w", encoding = "utf-8") as file:
+            json.dump(self.report(), file, indent = 2)
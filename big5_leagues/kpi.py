@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Importance of the KPIs for success, with bootstrap confidence intervals.
+
+Every KPI is ranked by the strength of its rank (Spearman) correlation with a
+success target, adjusted_points by default, overall and for every competition
+and every season. The uncertainty comes from a bootstrap: the rows of a group
+are resampled with replacement thousands of times and the correlations, and
+the rank of every KPI among the others, are computed again on each resample.
+
+The resamples are drawn as one (resamples x rows) index array per batch and
+every statistic is computed on the whole batch with array operations. Rank
+correlations need the average ranks of every resample; they come from the
+counts of each distinct value in the resample (one bincount per batch)
+instead of sorting every resample. A row whose KPI is missing is left out of
+the correlations of that KPI.
+"""
+
+# Import libraries
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TARGET = "adjusted_points"
+DEFAULT_KPIS = ("adjusted_goals_for",
+                "adjusted_goals_against",
+                "adjusted_goal_diff",
+                "adjusted_assists",
+                "adjusted_pens_made",
+                "adjusted_pens_att",
+                "adjusted_shots_on_target_against",
+                "adjusted_saves",
+                "adjusted_clean_sheets",
+                "adjusted_shots_on_target",
+                "players_used",
+                "cards_yellow",
+                "cards_red",
+                )
+DEFAULT_GROUPS = (None, "competition", "season")
+DEFAULT_KPI_TABLE_PATH = "datasets/exploratory_data_analysis_tables/KPI_Importance_Table.csv"
+DEFAULT_RESAMPLES = 2000
+# Resampled values per batch, bounds the memory of a batch to a few hundred MB
+BATCH_ELEMENTS = 2 ** 21
+
+
+def _dense_codes(values: np.ndarray):
+    # Code of every value among the sorted distinct values, missing values get code 0
+    present = ~np.isnan(values)
+    distinct, inverse = np.unique(np.where(present, values, 0), return_inverse = True)
+    return inverse, len(distinct)
+
+
+def _average_ranks(codes: np.ndarray, size: int, present: Optional[np.ndarray]) -> np.ndarray:
+    # Average rank (ties share the mean of their positions) of every element of every row
+    # of codes, counting only the present elements
+    resamples = len(codes)
+    if present is not None:
+        codes = np.where(present, codes, size)
+    width = size + 1
+    counts = np.bincount((codes + np.arange(resamples)[:, None] * width).ravel(),
+                         minlength = resamples * width).reshape(resamples, width)[:, :size]
+    average = np.cumsum(counts, axis = 1) - (counts - 1) / 2
+    return np.take_along_axis(average, np.minimum(codes, size - 1), axis = 1)
+
+
+def _centered(x: np.ndarray, weights: Optional[np.ndarray] = None):
+    # Rows of x minus their mean and the norms of the result, over the weighted elements
+    if weights is None:
+        x = x - x.mean(axis = 1, keepdims = True)
+    else:
+        with np.errstate(all = "ignore"):
+            mean = np.einsum("ij,ij->i", x, weights) / weights.sum(axis = 1)
+        x = (x - mean[:, None]) * weights
+    return x, np.sqrt(np.einsum("ij,ij->i", x, x))
+
+
+def _correlations(x: tuple, y: tuple) -> np.ndarray:
+    # Pearson correlation of every row of x with the same row of y, both _centered()
+    with np.errstate(all = "ignore"):
+        return np.einsum("ij,ij->i", x[0], y[0]) / (x[1] * y[1])
+
+
+def _batch_statistics(target: np.ndarray, kpis: np.ndarray, index: np.ndarray):
+    # Spearman and Pearson correlations of every KPI on every resample of the batch
+    target_codes, target_size = _dense_codes(target)
+    resampled_codes = target_codes[index]
+    # Target ranks and values shared by the KPIs without missing values
+    target_ranks = _centered(_average_ranks(resampled_codes, target_size, None))
+    target_values = _centered(target[index])
+    spearman = np.empty((len(index), kpis.shape[1]))
+    pearson = np.empty((len(index), kpis.shape[1]))
+    for column in range(kpis.shape[1]):
+        values = kpis[:, column]
+        present = ~np.isnan(values)
+        codes, size = _dense_codes(values)
+        if present.all():
+            spearman[:, column] = _correlations(_centered(_average_ranks(codes[index], size, None)),
+                                                target_ranks)
+            pearson[:, column] = _correlations(_centered(values[index]), target_values)
+            continue
+        resampled_present = present[index]
+        weights = resampled_present.astype(float)
+        spearman[:, column] = _correlations(
+            _centered(_average_ranks(codes[index], size, resampled_present), weights),
+            _centered(_average_ranks(resampled_codes, target_size, resampled_present), weights))
+        pearson[:, column] = _correlations(
+            _centered(np.where(resampled_present, values[index], 0), weights),
+            _centered(target[index], weights))
+    return spearman, pearson
+
+
+def _importance_ranks(spearman: np.ndarray) -> np.ndarray:
+    # 1 for the KPI with the strongest correlation of each row, undefined correlations last
+    strength = np.nan_to_num(np.abs(spearman), nan = -1.0)
+    return np.argsort(np.argsort(-strength, axis = 1, kind = "stable"), axis = 1) + 1
+
+
+def group_importance(values: np.ndarray, kpis: List[str], resamples: int = DEFAULT_RESAMPLES,
+                     confidence: float = 0.95,
+                     seed: Union[int, np.random.SeedSequence] = 0) -> pd.DataFrame:
+    """
+    Bootstrap the KPI importance of one group of rows.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Rows of the group, the target in the first column and the KPIs after,
+        NaN where missing. Rows without a target are ignored.
+    kpis : List[str]
+        Names of the KPI columns.
+    resamples : int, optional
+        Number of bootstrap resamples. The default is DEFAULT_RESAMPLES.
+    confidence : float, optional
+        Level of the percentile confidence intervals. The default is 0.95.
+    seed : int or np.random.SeedSequence, optional
+        Seed of the resamples. The default is 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per KPI with the rows used, the Spearman and Pearson
+        correlations with the target and their confidence intervals, and the
+        importance rank (1 for the strongest Spearman correlation) with its
+        interval.
+
+    """
+    values = values[~np.isnan(values[:, 0])]
+    target, kpi_values = values[:, 0], values[:, 1:]
+    rows = len(values)
+    rng = np.random.default_rng(seed)
+
+    spearman, pearson = _batch_statistics(target, kpi_values, np.arange(rows)[None, :])
+    batch = max(1, BATCH_ELEMENTS // max(rows, 1))
+    boot_spearman, boot_pearson = [], []
+    for start in range(0, resamples if rows else 0, batch):
+        index = rng.integers(0, rows, size = (min(batch, resamples - start), rows))
+        batch_spearman, batch_pearson = _batch_statistics(target, kpi_values, index)
+        boot_spearman.append(batch_spearman)
+        boot_pearson.append(batch_pearson)
+    boot_spearman = np.concatenate(boot_spearman) if boot_spearman else np.full((1, len(kpis)), np.nan)
+    boot_pearson = np.concatenate(boot_pearson) if boot_pearson else np.full((1, len(kpis)), np.nan)
+
+    tails = [(1 - confidence) / 2, (1 + confidence) / 2]
+    # KPIs missing from every row of the group have no interval
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spearman_interval = np.nanquantile(boot_spearman, tails, axis = 0)
+        pearson_interval = np.nanquantile(boot_pearson, tails, axis = 0)
+    rank_interval = np.quantile(_importance_ranks(boot_spearman), tails, axis = 0)
+    return pd.DataFrame({"kpi": kpis,
+                         "rows": (~np.isnan(kpi_values)).sum(axis = 0),
+                         "spearman": spearman[0],
+                         "spearman_low": spearman_interval[0],
+                         "spearman_high": spearman_interval[1],
+                         "pearson": pearson[0],
+                         "pearson_low": pearson_interval[0],
+                         "pearson_high": pearson_interval[1],
+                         "importance": _importance_ranks(spearman)[0],
+                         "importance_low": rank_interval[0],
+                         "importance_high": rank_interval[1],
+                         })
+
+
+def kpi_importance(dataset: pd.DataFrame, target: str = DEFAULT_TARGET,
+                   kpis: Optional[Iterable[str]] = None,
+                   groups: Iterable[Optional[str]] = DEFAULT_GROUPS,
+                   resamples: int = DEFAULT_RESAMPLES,
+                   confidence: float = 0.95,
+                   seed: int = 0,
+                   workers: int = 1) -> pd.DataFrame:
+    """
+    Rank the KPIs by their rank correlation with the target, with bootstrap intervals.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset.
+    target : str, optional
+        Measure of success, e.g. adjusted_points or points_per_match. The
+        default is DEFAULT_TARGET.
+    kpis : Iterable[str], optional
+        KPI columns. The default is None, which uses the DEFAULT_KPIS present
+        in the dataset.
+    groups : Iterable[Optional[str]], optional
+        Columns the results are broken down by, None for every row together.
+        The default is DEFAULT_GROUPS: all rows, by competition and by season.
+    resamples : int, optional
+        Number of bootstrap resamples per group. The default is DEFAULT_RESAMPLES.
+    confidence : float, optional
+        Level of the confidence intervals. The default is 0.95.
+    seed : int, optional
+        Seed of the resamples. The results do not depend on the workers. The
+        default is 0.
+    workers : int, optional
+        Number of processes the groups are spread across. The default is 1.
+
+    Returns
+    -------
+    pd.DataFrame
+        The group_importance() table of every group, with the grouping column
+        (group_by, "all" for every row) and the group value, sorted by group
+        and importance.
+
+    """
+    kpis = [kpi for kpi in DEFAULT_KPIS if kpi in dataset.columns] if kpis is None else list(kpis)
+    values = dataset[[target] + kpis].to_numpy(dtype = float, na_value = np.nan)
+    tasks = []
+    for group_by in groups:
+        if group_by is None:
+            tasks.append(("all", "all", values))
+            continue
+        for group, positions in dataset.groupby(group_by, sort = True, observed = True).indices.items():
+            tasks.append((group_by, group, values[positions]))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    arguments = [(task_values, kpis, resamples, confidence, task_seed)
+                 for (_, _, task_values), task_seed in zip(tasks, seeds)]
+    if workers == 1:
+        tables = [group_importance(*task_arguments) for task_arguments in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            tables = list(pool.map(group_importance, *zip(*arguments)))
+
+    tables = [table.assign(group_by = group_by, group = str(group))
+              for (group_by, group, _), table in zip(tasks, tables)]
+    importance = pd.concat(tables, ignore_index = True)
+    columns = ["group_by", "group"] + [column for column in importance.columns
+                                       if column not in ("group_by", "group")]
+    return importance[columns].sort_values(["group_by", "group", "importance"], kind = "stable",
+                                           ignore_index = True)
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-validated ridge model of a success target on the KPIs.
+
+The correlations of big5_leagues.kpi rank the KPIs one at a time; the model
+ranks them by how much they add to the prediction of the target together. A
+ridge regression of the target on the standardized KPIs is validated with
+folds that hold out whole groups of rows:
+
+- "season": leave one season out, every season is predicted by a model fitted
+  on the others;
+- "competition": leave one league out.
+
+A missing KPI value is replaced by the mean of the training rows. The fit only
+needs sums over the training rows (counts, sums and squares of every KPI, cross
+products over the rows where two KPIs are present, products with the target),
+which add up over rows: they are computed once per held-out group and the
+training sums of a fold are the sums of all the groups less those of its own,
+so the cost of the fits does not grow with the number of folds.
+
+On the held-out rows of every fold, the permutation importance of a KPI is the
+increase of the mean squared error when its values are shuffled. Shuffling
+one KPI only moves the prediction by its coefficient times the change of its
+values, so the errors of every KPI and every permutation of a batch are
+computed from the residuals with array operations, without predicting again.
+The folds are scored in parallel on several processes.
+
+With a cache, the result of every fold is stored under the hashes of its
+training groups and held-out group, each group of rows hashed once, and the
+hyperparameters. A re-run only refits the folds whose rows or settings
+changed, so adding a scheme only fits its own folds; as every row is in every
+fold, a change of the rows refits them all. The seed of a fold's permutations
+comes from the seed and the fold, not from its position, so the folds of the
+other schemes stay cached.
+"""
+
+# Import libraries
+import hashlib
+import inspect
+import json
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.kpi import BATCH_ELEMENTS, DEFAULT_KPIS, DEFAULT_TARGET
+from big5_leagues.pipeline import StageCache
+
+DEFAULT_SCHEMES = ("season", "competition")
+DEFAULT_ALPHA = 1.0
+DEFAULT_REPEATS = 100
+DEFAULT_MODEL_CACHE_DIRECTORY = ".cache/kpi_model"
+DEFAULT_MODEL_TABLE_PATH = "datasets/exploratory_data_analysis_tables/KPI_Model_Table.csv"
+
+
+class Fold(NamedTuple):
+    """
+    Rows of one cross-validation fold, trained on every row but the held-out ones.
+
+    Attributes
+    ----------
+    scheme : str
+        Column whose groups are held out, e.g. season.
+    held_out : str
+        Group predicted by the fold.
+    test : np.ndarray
+        Positions of the held-out rows.
+
+    """
+    scheme: str
+    held_out: str
+    test: np.ndarray
+
+
+class RidgeModel(NamedTuple):
+    """
+    Ridge regression on standardized features.
+
+    Attributes
+    ----------
+    mean, scale : np.ndarray
+        Mean and standard deviation of every feature on the training rows, 1
+        for a constant feature.
+    coefficients : np.ndarray
+        Coefficient of every standardized feature.
+    intercept : float
+        Mean of the target on the training rows.
+
+    """
+    mean: np.ndarray
+    scale: np.ndarray
+    coefficients: np.ndarray
+    intercept: float
+
+    def standardize(self, x: np.ndarray) -> np.ndarray:
+        """Standardized features, missing values at the training mean (0)."""
+        return np.nan_to_num((x - self.mean) / self.scale, nan = 0.0)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        return self.intercept + self.standardize(x) @ self.coefficients
+
+
+def fold_splits(dataset: pd.DataFrame, schemes: Iterable[str] = DEFAULT_SCHEMES) -> List[Fold]:
+    """
+    Leave one group out folds of every scheme.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Rows to split.
+    schemes : Iterable[str], optional
+        Columns whose groups are held out one at a time. The default is
+        DEFAULT_SCHEMES.
+
+    Returns
+    -------
+    List[Fold]
+        One fold per scheme and group, groups in sorted order.
+
+    """
+    folds = []
+    for scheme in schemes:
+        codes, groups = pd.factorize(dataset[scheme], sort = True)
+        # Positions of the rows of every group, from one stable sort of the codes
+        order = np.argsort(codes, kind = "stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+        for code, group in enumerate(groups):
+            folds.append(Fold(scheme, str(group), order[bounds[code]:bounds[code + 1]]))
+    return folds
+
+
+def _sums(x: np.ndarray, y: np.ndarray) -> dict:
+    # Sums the ridge fit needs, additive over rows: the counts, sums and squares of the present
+    # values of every feature and the cross products over the rows where both features are present
+    present = ~np.isnan(x)
+    weights = present.astype(float)
+    values = np.where(present, x, 0)
+    return {"rows": len(y),
+            "y": y.sum(),
+            "count": weights.sum(axis = 0),
+            "x": values.sum(axis = 0),
+            "xx": np.einsum("ij,ij->j", values, values),
+            "cross": values.T @ values,
+            "cross_present": values.T @ weights,
+            "pairs": weights.T @ weights,
+            "xy": values.T @ y,
+            "y_present": weights.T @ y,
+            }
+
+
+def _ridge(sums: dict, alpha: float, shift: np.ndarray, target_shift: float) -> RidgeModel:
+    # Ridge fit from the _sums() of rows shifted by shift and target_shift, missing values at the mean
+    count = np.maximum(sums["count"], 1)
+    mean = sums["x"] / count
+    variance = sums["xx"] / count - mean ** 2
+    scale = np.where(variance > 0, np.sqrt(np.maximum(variance, 0)), 1.0)
+    intercept = sums["y"] / sums["rows"]
+    # Cross products of the centered features over the rows where both are present
+    centered = (sums["cross"] - sums["cross_present"] * mean[None, :] - sums["cross_present"].T * mean[:, None]
+                + sums["pairs"] * np.outer(mean, mean))
+    centered_target = (sums["xy"] - intercept * sums["x"] - mean * sums["y_present"]
+                       + mean * intercept * sums["count"])
+    coefficients = np.linalg.solve(centered / np.outer(scale, scale) + alpha * np.eye(len(mean)),
+                                   centered_target / scale)
+    return RidgeModel(mean + shift, scale, coefficients, float(intercept + target_shift))
+
+
+def _shifts(x: np.ndarray, y: np.ndarray) -> tuple:
+    # Means the values are shifted by before the sums, so that the variances keep their precision
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        shift = np.nan_to_num(np.nanmean(x, axis = 0))
+    return shift, float(y.mean()) if len(y) else 0.0
+
+
+def fit_ridge(x: np.ndarray, y: np.ndarray, alpha: float = DEFAULT_ALPHA) -> RidgeModel:
+    """
+    Fit a ridge regression with the closed form solution.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Features of the training rows, NaN where missing.
+    y : np.ndarray
+        Target of the training rows.
+    alpha : float, optional
+        Penalty on the squared coefficients of the standardized features. The
+        default is DEFAULT_ALPHA.
+
+    Returns
+    -------
+    RidgeModel
+        The fitted model.
+
+    """
+    shift, target_shift = _shifts(x, y)
+    return _ridge(_sums(x - shift, y - target_shift), alpha, shift, target_shift)
+
+
+def permutation_importance(model: RidgeModel, x: np.ndarray, y: np.ndarray,
+                           repeats: int = DEFAULT_REPEATS, seed: Union[int, Sequence[int]] = 0) -> tuple:
+    """
+    Increase of the mean squared error when every feature is shuffled.
+
+    Parameters
+    ----------
+    model : RidgeModel
+        Fitted model.
+    x : np.ndarray
+        Features of the held-out rows.
+    y : np.ndarray
+        Target of the held-out rows.
+    repeats : int, optional
+        Permutations of the rows per feature. The default is DEFAULT_REPEATS.
+    seed : int or sequence of int, optional
+        Seed of the permutations. The default is 0.
+
+    Returns
+    -------
+    tuple
+        The mean and the standard deviation over the permutations of the
+        increase of every feature.
+
+    """
+    z = model.standardize(x)
+    residuals = y - model.intercept - z @ model.coefficients
+    baseline = np.mean(residuals ** 2)
+    rng = np.random.default_rng(seed)
+    rows, features = z.shape
+    batch = max(1, BATCH_ELEMENTS // max(rows * features, 1))
+    increases = []
+    for start in range(0, repeats, batch):
+        permutations = rng.permuted(np.tile(np.arange(rows), (min(batch, repeats - start), 1)), axis = 1)
+        # Change of the prediction of every row when a feature takes the values of the permuted rows,
+        # (permutations, rows, features)
+        shifts = (z[permutations] - z) * model.coefficients
+        increases.append(np.mean((residuals[:, None] - shifts) ** 2, axis = 1) - baseline)
+    increases = np.concatenate(increases)
+    return increases.mean(axis = 0), increases.std(axis = 0)
+
+
+def _fold_seed(seed: int, fold: Fold) -> list:
+    # Seed of the fold's permutations from its scheme and group, whatever the other folds
+    digest = hashlib.sha256(f"{fold.scheme}={fold.held_out}".encode("utf-8")).digest()
+    return [seed, int.from_bytes(digest[:8], "little")]
+
+
+def _hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.tobytes() if isinstance(part, np.ndarray)
+                      else json.dumps(part, sort_keys = True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _score_fold(model: RidgeModel, test: np.ndarray, repeats: int, seed: list) -> tuple:
+    # Task of a worker: the scores and permutation importances of the held-out rows of a fold
+    y = test[:, 0]
+    residuals = y - model.predict(test[:, 1:])
+    total = np.sum((y - y.mean()) ** 2)
+    scores = {"rmse": float(np.sqrt(np.mean(residuals ** 2))),
+              "r2": float(1 - np.sum(residuals ** 2) / total) if total > 0 else np.nan}
+    importance, importance_std = permutation_importance(model, test[:, 1:], y, repeats, seed)
+    return model, scores, importance, importance_std
+
+
+def cross_validate(dataset: pd.DataFrame, target: str = DEFAULT_TARGET,
+                   kpis: Optional[Iterable[str]] = None,
+                   schemes: Iterable[str] = DEFAULT_SCHEMES,
+                   alpha: float = DEFAULT_ALPHA,
+                   repeats: int = DEFAULT_REPEATS,
+                   seed: int = 0,
+                   workers: int = 1,
+                   cache: Optional[StageCache] = None) -> pd.DataFrame:
+    """
+    Fit and score the ridge model on every fold, with permutation importances.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Preprocessed dataset.
+    target : str, optional
+        Measure of success. The default is DEFAULT_TARGET.
+    kpis : Iterable[str], optional
+        Feature columns. The default is None, which uses the DEFAULT_KPIS of
+        big5_leagues.kpi present in the dataset.
+    schemes : Iterable[str], optional
+        Columns whose groups are held out, see fold_splits(). The default is
+        DEFAULT_SCHEMES.
+    alpha : float, optional
+        Ridge penalty. The default is DEFAULT_ALPHA.
+    repeats : int, optional
+        Permutations per KPI and fold. The default is DEFAULT_REPEATS.
+    seed : int, optional
+        Seed of the permutations. The results do not depend on the workers. The
+        default is 0.
+    workers : int, optional
+        Number of processes the folds are spread across. The default is 1.
+    cache : StageCache, optional
+        Where the fitted models and fold results are stored. The folds whose
+        results were found are listed in cache.hits and the folds scored
+        again, refitting their model unless it was found, in cache.misses. The
+        default is None, which fits every fold.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per scheme, held-out group and KPI with the training and
+        held-out rows, the RMSE and R2 of the fold, the standardized
+        coefficient, the permutation importance and its standard deviation,
+        and the importance rank of the KPI in the fold.
+
+    """
+    kpis = [kpi for kpi in DEFAULT_KPIS if kpi in dataset.columns] if kpis is None else list(kpis)
+    # Rows without a target are left out of every fold
+    dataset = dataset[dataset[target].notna()]
+    values = dataset[[target] + kpis].to_numpy(dtype = float, na_value = np.nan)
+    folds = fold_splits(dataset, schemes)
+    code = _hash(inspect.getsource(sys.modules[__name__]))
+
+    # Every fold is keyed by the hashes of its groups of rows, each hashed once
+    group_hashes = [_hash(values[fold.test]) for fold in folds]
+    keys = []
+    for position, fold in enumerate(folds):
+        training = [group_hash for other, group_hash in zip(folds, group_hashes)
+                    if other.scheme == fold.scheme and other is not fold]
+        keys.append(_hash(code, [target] + kpis, alpha, repeats, _fold_seed(seed, fold),
+                          training, group_hashes[position]))
+
+    results = [None] * len(folds)
+    pending = []
+    for position, fold in enumerate(folds):
+        if cache is not None:
+            hit, results[position] = cache.get(keys[position])
+            if hit:
+                cache.hits.append(f"{fold.scheme}={fold.held_out}")
+                continue
+            cache.misses.append(f"{fold.scheme}={fold.held_out}")
+        pending.append(position)
+
+    # The training sums of a fold are the sums of every row of its scheme less those of its group
+    shift, target_shift = _shifts(values[:, 1:], values[:, 0])
+    shifted = values - np.concatenate([[target_shift], shift])
+    group_sums, scheme_sums = {}, {}
+    for position in pending:
+        fold = folds[position]
+        if fold.scheme not in scheme_sums:
+            for other in folds:
+                if other.scheme == fold.scheme:
+                    group_sums[id(other)] = _sums(shifted[other.test, 1:], shifted[other.test, 0])
+            scheme_sums[fold.scheme] = {name: sum(group_sums[id(other)][name] for other in folds
+                                                  if other.scheme == fold.scheme)
+                                        for name in group_sums[id(fold)]}
+    tasks = []
+    for position in pending:
+        fold = folds[position]
+        training = {name: total - group_sums[id(fold)][name] for name, total in scheme_sums[fold.scheme].items()}
+        tasks.append((_ridge(training, alpha, shift, target_shift), values[fold.test], repeats,
+                      _fold_seed(seed, fold)))
+
+    if workers == 1:
+        scored = [_score_fold(*arguments) for arguments in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            scored = list(pool.map(_score_fold, *zip(*tasks)))
+    for position, result in zip(pending, scored):
+        results[position] = result
+        if cache is not None:
+            cache.put(keys[position], result)
+
+    tables = []
+    for fold, (model, scores, importance, importance_std) in zip(folds, results):
+        tables.append(pd.DataFrame({"scheme": fold.scheme,
+                                    "held_out": fold.held_out,
+                                    "kpi": kpis,
+                                    "train_rows": len(values) - len(fold.test),
+                                    "test_rows": len(fold.test),
+                                    "rmse": scores["rmse"],
+                                    "r2": scores["r2"],
+                                    "coefficient": model.coefficients,
+                                    "importance": importance,
+                                    "importance_std": importance_std,
+                                    "importance_rank": pd.Series(-importance).rank(method = "min")
+                                    .astype(np.int64).to_numpy(),
+                                    }))
+    return pd.concat(tables, ignore_index = True)
+
+
+def model_summary(folds: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mean over the folds of every scheme of the cross_validate() table.
+
+    Parameters
+    ----------
+    folds : pd.DataFrame
+        Table returned by cross_validate().
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per scheme and KPI with the mean RMSE and R2 of the scheme, the
+        mean coefficient, importance and importance rank, sorted by scheme and
+        mean importance.
+
+    """
+    summary = folds.groupby(["scheme", "kpi"], sort = False).agg(
+        folds = ("held_out", "nunique"),
+        rmse = ("rmse", "mean"),
+        r2 = ("r2", "mean"),
+        coefficient = ("coefficient", "mean"),
+        importance = ("importance", "mean"),
+        importance_rank = ("importance_rank", "mean"),
+    ).reset_index()
+    return summary.sort_values(["scheme", "importance"], ascending = [True, False], kind = "stable",
+                               ignore_index = True)
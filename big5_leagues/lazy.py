@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy Polars execution of the cleaning.
+
+The cleaning rules are declared once and compiled for each backend: the
+adjusted_* columns come from ADJUSTED_METRICS, the flags from the notes
+parser and the corrections table, the squad names from the alias table. The
+pandas backend applies them stage by stage (standardize, apply_renames,
+apply_notes_flags). This module compiles the same declarations into one lazy
+Polars plan over the CSV scan:
+
+- only the columns and rows the result needs are read, the projection and the
+  season/competition filters are pushed down into the scan;
+- the adjusted_* columns, the canonical names and the flags are expressions of
+  one plan, evaluated together on every batch without intermediate frames;
+- the plan runs on every core, and sink_preprocessed() streams it to the CSV
+  file without holding the dataset in memory.
+
+The parts that must give exactly the pandas result reuse the pandas backend
+code on the distinct values only: the builtin-compatible rounding of the
+adjusted columns, the notes parser and the alias lookups. Both backends write
+the same preprocessed CSV, byte for byte.
+
+Polars is an optional dependency: pip install polars.
+"""
+
+# Import libraries
+from typing import Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH, SCHEMA
+from big5_leagues.notes import EUROPEAN_COMPETITIONS, ROUTES, _parse_note
+from big5_leagues.qualification import CORRECTION_KEYS, FLAG_COLUMNS, NOTES_COLUMNS
+from big5_leagues.standardization import (ADJUSTED_METRICS, DEFAULT_TARGET_GAMES, AdjustedMetric,
+                                          _round_half_even)
+from big5_leagues.teams import TeamIndex
+
+# Name of the row number column, written as the unnamed index column of the pandas CSV
+INDEX_COLUMN = ""
+
+
+def _require_polars():
+    try:
+        import polars
+    except ImportError as error:
+        raise ImportError("The polars backend needs polars: pip install polars") from error
+    return polars
+
+
+def _polars_schema(pl) -> dict:
+    # Ingestion SCHEMA in Polars types, goal_diff is read as text for its "+41" form
+    types = {"category": pl.String, "Int8": pl.Int8, "Int16": pl.Int16, "float64": pl.Float64}
+    schema = {column: types[dtype] for column, dtype in SCHEMA.items()}
+    schema["goal_diff"] = pl.String
+    return schema
+
+
+def _on_distinct(function, return_dtype):
+    # Elementwise batch function applying function to every distinct value of the batch once
+    def apply(values):
+        distinct = values.unique()
+        mapped = [function(value) for value in distinct.to_list()]
+        return values.replace_strict(distinct, mapped, return_dtype = return_dtype)
+    return apply
+
+
+def _adjusted(pl, name: str, metric: AdjustedMetric, target):
+    # Same float operations, in the same order, as standardize()
+    games = pl.col("games").cast(pl.Float64)
+    values = None
+    for column, weight in metric.terms:
+        term = pl.col(column).cast(pl.Float64) / games * target
+        if weight != 1:
+            term = weight * term
+        values = term if values is None else values + term
+    if metric.per_match:
+        values = values / target
+    rounded = values.map_batches(
+        lambda series: pl.Series(_round_half_even(series.to_numpy().astype(float), metric.decimals)),
+        return_dtype = pl.Float64, is_elementwise = True)
+    if metric.decimals == 0:
+        rounded = rounded.fill_nan(None).cast(pl.Int64)
+    return rounded.alias(name)
+
+
+def _notes_struct(pl):
+    # Competition and route codes (-1 for none), relegated and playoff of every note
+    dtype = pl.Struct({"competition": pl.Int64, "route": pl.Int64, "relegated": pl.Boolean,
+                       "playoff": pl.Boolean})
+
+    def parse(note):
+        if note is None:
+            return {"competition": -1, "route": -1, "relegated": False, "playoff": False}
+        competition, route, relegated, playoff = _parse_note(note)
+        return {"competition": competition, "route": route, "relegated": relegated, "playoff": playoff}
+    return pl.col("notes").map_batches(_on_distinct(parse, dtype), return_dtype = dtype,
+                                       is_elementwise = True)
+
+
+def _yes_no(pl, condition):
+    return pl.when(condition).then(pl.lit("Yes")).otherwise(pl.lit("No"))
+
+
+def clean_lazy(path: str = DEFAULT_DATASET_PATH,
+               corrections: Optional[pd.DataFrame] = None,
+               teams: Optional[TeamIndex] = None,
+               target_games: Union[int, Mapping[str, int]] = DEFAULT_TARGET_GAMES,
+               columns: Optional[Iterable[str]] = None,
+               seasons: Optional[Iterable[str]] = None,
+               competitions: Optional[Iterable[str]] = None):
+    """
+    Lazy Polars plan of the cleaned dataset.
+
+    Parameters
+    ----------
+    path : str, optional
+        Teams stats CSV file. The default is DEFAULT_DATASET_PATH.
+    corrections : pd.DataFrame, optional
+        FlashFootball corrections returned by load_corrections() with the same
+        alias table. The default is None, which applies no correction.
+    teams : TeamIndex, optional
+        Alias table of the team names. The default is None, which loads
+        DEFAULT_ALIASES_PATH.
+    target_games : int or Mapping[str, int], optional
+        Number of matches the adjusted_* columns are rescaled to. The default is
+        DEFAULT_TARGET_GAMES.
+    columns : Iterable[str], optional
+        Output columns, only the source columns they need are read. The
+        default is every column of the pandas backend, after the row number
+        column INDEX_COLUMN.
+    seasons, competitions : Iterable[str], optional
+        Only clean these seasons and competitions, filtered in the scan. The
+        default is every row.
+
+    Returns
+    -------
+    pl.LazyFrame
+        The plan, to collect() or to stream with sink_preprocessed().
+
+    """
+    pl = _require_polars()
+    if teams is None:
+        teams = TeamIndex.load()
+    scan = pl.scan_csv(path, schema_overrides = _polars_schema(pl), encoding = "utf8",
+                       row_index_name = INDEX_COLUMN)
+    if seasons is not None:
+        scan = scan.filter(pl.col("season").is_in(list(seasons)))
+    if competitions is not None:
+        scan = scan.filter(pl.col("competition").is_in(list(competitions)))
+    source_columns = [name for name in scan.collect_schema().names() if name != INDEX_COLUMN]
+    scan = scan.with_columns(pl.col("goal_diff").str.strip_prefix("+").cast(pl.Int16))
+
+    # Adjusted columns
+    if isinstance(target_games, Mapping):
+        target = (pl.col("competition").replace_strict(dict(target_games), default = DEFAULT_TARGET_GAMES,
+                                                        return_dtype = pl.Float64))
+    else:
+        target = pl.lit(float(target_games))
+    adjusted = [_adjusted(pl, name, metric, target) for name, metric in ADJUSTED_METRICS.items()]
+
+    # Canonical names, once per distinct squad
+    def canonical_name(name):
+        team_id = None if name is None else teams.team_id(name)
+        return name if team_id is None else teams.canonical[team_id]
+    canonical = pl.col("squad").map_batches(_on_distinct(canonical_name, pl.String), return_dtype = pl.String,
+                                            is_elementwise = True)
+    team_id = pl.col("squad").map_batches(_on_distinct(teams.team_id, pl.String), return_dtype = pl.String,
+                                          is_elementwise = True)
+    plan = scan.with_columns(*adjusted, canonical.alias("squad"), team_id.alias("team_id"),
+                             _notes_struct(pl).alias("parsed"))
+
+    # Flags: the notes and one join against the corrections table
+    flags = list(FLAG_COLUMNS)
+    if corrections is not None and len(corrections):
+        corrected = pl.from_pandas(corrections[CORRECTION_KEYS + flags].astype(
+            {key: str for key in CORRECTION_KEYS})).lazy().rename({flag: f"corrected {flag}" for flag in flags})
+        plan = plan.join(corrected, on = CORRECTION_KEYS, how = "left", validate = "m:1",
+                         maintain_order = "left")
+    else:
+        plan = plan.with_columns(*[pl.lit(None, dtype = pl.Boolean).alias(f"corrected {flag}")
+                                   for flag in flags])
+    corrected = {flag: pl.col(f"corrected {flag}").fill_null(False) for flag in flags}
+    parsed = pl.col("parsed").struct
+    competition, route = parsed.field("competition"), parsed.field("route")
+    conference = competition == EUROPEAN_COMPETITIONS.index("UEFA Europa Conference League")
+    plan = plan.with_columns(
+        _yes_no(pl, (competition == EUROPEAN_COMPETITIONS.index("UEFA Champions League"))
+                | (route == ROUTES.index("Champions League win"))
+                | corrected[FLAG_COLUMNS[0]]).alias(FLAG_COLUMNS[0]),
+        _yes_no(pl, ~conference & ((competition == EUROPEAN_COMPETITIONS.index("UEFA Europa League"))
+                                   | (route == ROUTES.index("Europa League win"))
+                                   | corrected[FLAG_COLUMNS[1]])).alias(FLAG_COLUMNS[1]),
+        _yes_no(pl, parsed.field("relegated") | corrected[FLAG_COLUMNS[2]]).alias(FLAG_COLUMNS[2]),
+        _yes_no(pl, conference).alias(NOTES_COLUMNS[0]),
+        route.replace_strict(list(range(len(ROUTES))), ROUTES, default = None,
+                             return_dtype = pl.String).alias(NOTES_COLUMNS[1]),
+        _yes_no(pl, parsed.field("playoff")).alias(NOTES_COLUMNS[2]),
+    )
+    return plan.select(columns_of_pandas_backend(source_columns) if columns is None
+                       else list(columns))
+
+
+def columns_of_pandas_backend(source_columns: List[str]) -> List[str]:
+    """Columns of the cleaned dataset, in the pandas backend order, from the source columns."""
+    columns = [INDEX_COLUMN]
+    for column in source_columns:
+        if column == "notes":
+            continue
+        columns.append(column)
+        if column == "squad":
+            columns.append("team_id")
+    return columns + list(ADJUSTED_METRICS) + list(FLAG_COLUMNS) + list(NOTES_COLUMNS)
+
+
+def clean_polars(path: str = DEFAULT_DATASET_PATH,
+                 corrections: Optional[pd.DataFrame] = None,
+                 teams: Optional[TeamIndex] = None,
+                 target_games: Union[int, Mapping[str, int]] = DEFAULT_TARGET_GAMES) -> pd.DataFrame:
+    """
+    Clean the teams stats file with the Polars plan and return it as pandas.
+
+    Parameters are those of clean_lazy(). The result has the values, columns,
+    row labels and dtypes of clean_dataset() on read_teams_stats(path), so that
+    it writes the same CSV.
+    """
+    pl = _require_polars()
+    if teams is None:
+        teams = TeamIndex.load()
+    frame = clean_lazy(path, corrections, teams, target_games).collect()
+    dataset = frame.drop(INDEX_COLUMN).to_pandas(use_pyarrow_extension_array = False)
+    dataset.index = pd.RangeIndex(len(dataset)) if frame.is_empty() else pd.Index(
+        frame[INDEX_COLUMN].to_numpy().astype(np.int64))
+    # Categories of the pandas stages: sorted source values, canonical names of the
+    # sorted source squads and the route order
+    raw_squads = (pl.scan_csv(path, schema_overrides = _polars_schema(pl), encoding = "utf8")
+                  .select(pl.col("squad").drop_nulls().unique().sort()).collect()["squad"].to_list())
+    squad, team_id = teams.canonicalize(pd.Series(pd.Categorical(raw_squads)))
+    dtypes = {name: dtype for name, dtype in SCHEMA.items() if name in dataset.columns}
+    dtypes.update(squad = squad.dtype, team_id = team_id.dtype)
+    dtypes[NOTES_COLUMNS[1]] = pd.CategoricalDtype(ROUTES)
+    dataset = dataset.astype(dtypes)
+    dataset["rank"] = dataset["rank"].astype(object)
+    return dataset
+
+
+def sink_preprocessed(output_path: str, path: str = DEFAULT_DATASET_PATH,
+                      corrections: Optional[pd.DataFrame] = None,
+                      teams: Optional[TeamIndex] = None,
+                      target_games: Union[int, Mapping[str, int]] = DEFAULT_TARGET_GAMES):
+    """Stream the cleaned dataset of clean_lazy() to a CSV file in the pandas to_csv() format."""
+    plan = clean_lazy(path, corrections, teams, target_games)
+    # Polars quotes the empty name of the row number column, pandas does not
+    with open(output_path, "wb") as file:
+        file.write((",".join(plan.collect_schema().names()) + "\n").encode("utf-8"))
+        plan.sink_csv(file, include_header = False, engine = "streaming")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Parser of the notes column.
+
+The notes describe the outcome of a team season in a few forms that vary
+between leagues and seasons:
+    → UEFA Champions League via league finish
+    → UEFA Europa League via cup win
+    → UEFA Champions League via Europa League win
+    → UEFA Europa Conference League via league finish
+    → German 1/2 Relegation/Promotion Play-offs
+    Relegated
+    Relegated, → UEFA Europa League via cup win
+
+Compiled patterns extract the European competition, the route to it, the
+relegation and the relegation playoff. A column holds few distinct notes, so
+the patterns only run once per distinct note and the results are taken to the
+rows through the category codes, in one pass over the column.
+"""
+
+# Import libraries
+import re
+
+import numpy as np
+import pandas as pd
+
+EUROPEAN_COMPETITIONS = ["UEFA Champions League", "UEFA Europa League", "UEFA Europa Conference League"]
+ROUTES = ["league finish", "cup win", "Champions League win", "Europa League win", "playoff"]
+
+QUALIFICATION_PATTERN = re.compile(r"→\s*(?P<competition>UEFA (?:Champions|Europa Conference|Europa) League)"
+                                   r"\s+via\s+(?P<route>league finish|cup win|Champions League win"
+                                   r"|Europa League win)")
+PLAYOFF_PATTERN = re.compile(r"Relegation/Promotion Play-?offs?\b")
+RELEGATED_PATTERN = re.compile(r"(?:^|,)\s*Relegated\s*(?:,|$)")
+
+
+def _parse_note(note: str) -> tuple:
+    # Codes of the competition and route categories (-1 for none), relegated, playoff
+    qualification = QUALIFICATION_PATTERN.search(note)
+    playoff = PLAYOFF_PATTERN.search(note) is not None
+    competition = EUROPEAN_COMPETITIONS.index(qualification["competition"]) if qualification else -1
+    route = ROUTES.index(qualification["route"]) if qualification else (ROUTES.index("playoff")
+                                                                          if playoff else -1)
+    return competition, route, RELEGATED_PATTERN.search(note) is not None, playoff
+
+
+def parse_notes(notes: pd.Series) -> pd.DataFrame:
+    """
+    Extract the season outcome of every note.
+
+    Parameters
+    ----------
+    notes : pd.Series
+        The notes column, categorical or text, with missing values where a team
+        season has no note.
+
+    Returns
+    -------
+    pd.DataFrame
+        With the index of the notes:
+        - competition: categorical European competition the team qualified for;
+        - route: categorical way the team got there (league finish, cup win,
+          Champions League win, Europa League win) or "playoff" for a
+          relegation/promotion playoff;
+        - relegated, conference_league, relegation_playoff: booleans.
+
+    """
+    if isinstance(notes.dtype, pd.CategoricalDtype):
+        codes, distinct = notes.cat.codes.to_numpy(), notes.cat.categories
+    else:
+        codes, distinct = pd.factorize(notes)
+    # One row per distinct note plus a last row for the missing notes, which have code -1
+    parsed = np.array([_parse_note(str(note)) for note in distinct] + [(-1, -1, False, False)],
+                      dtype = np.int64)[codes]
+    competition = pd.Categorical.from_codes(parsed[:, 0], EUROPEAN_COMPETITIONS)
+    return pd.DataFrame({"competition": competition,
+                         "route": pd.Categorical.from_codes(parsed[:, 1], ROUTES),
+                         "relegated": parsed[:, 2].astype(bool),
+                         "conference_league": parsed[:, 0] == EUROPEAN_COMPETITIONS.index(
+                             "UEFA Europa Conference League"),
+                         "relegation_playoff": parsed[:, 3].astype(bool),
+                         },
+                        index = notes.index)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Partitioned execution of the row-local cleaning stages on a process pool.
+
+Standardization, renames and the notes flags only look at the row they
+transform, so every competition/season partition can be processed on its own.
+Partitions are batched into a few tasks of similar size per worker and the
+results are put back in the original row order, which makes the output
+identical to a serial run.
+"""
+
+# Import libraries
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+PARTITION_COLUMNS = ("competition", "season")
+
+
+def _batches(partitions: list, tasks: int) -> list:
+    # Largest partitions first, each into the task with the fewest rows so far
+    heap = [(0, task) for task in range(tasks)]
+    batches = [[] for _ in range(tasks)]
+    for positions in sorted(partitions, key = len, reverse = True):
+        rows, task = heapq.heappop(heap)
+        batches[task].append(positions)
+        heapq.heappush(heap, (rows + len(positions), task))
+    return [np.sort(np.concatenate(batch)) for batch in batches if batch]
+
+
+def map_partitions(function: Callable[..., pd.DataFrame], dataset: pd.DataFrame,
+                   workers: Optional[int] = None,
+                   partition_columns: Iterable[str] = PARTITION_COLUMNS,
+                   tasks_per_worker: int = 4, **kwargs) -> pd.DataFrame:
+    """
+    Apply a row-local function to every partition of the dataset in parallel.
+
+    Parameters
+    ----------
+    function : Callable[..., pd.DataFrame]
+        Module level function taking a DataFrame and returning one row per input
+        row with the same index.
+    dataset : pd.DataFrame
+        Dataset to transform.
+    workers : int, optional
+        Number of worker processes. The default is None, which uses every CPU.
+        With 1 worker the function runs in this process on the whole dataset.
+    partition_columns : Iterable[str], optional
+        Columns defining the partitions. The default is PARTITION_COLUMNS.
+    tasks_per_worker : int, optional
+        Number of tasks the partitions are batched into per worker. The default
+        is 4.
+    **kwargs
+        Passed to the function.
+
+    Returns
+    -------
+    pd.DataFrame
+        The concatenated results in the order of the dataset rows.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(dataset) == 0:
+        return function(dataset, **kwargs)
+
+    partitions = dataset.groupby(list(partition_columns), sort = False, observed = True,
+                                 dropna = False).indices
+    tasks = _batches(list(partitions.values()), min(len(partitions), workers * tasks_per_worker))
+    with ProcessPoolExecutor(max_workers = min(workers, len(tasks))) as pool:
+        futures = [pool.submit(function, dataset.iloc[positions], **kwargs) for positions in tasks]
+        parts = [future.result() for future in futures]
+
+    order = np.argsort(np.concatenate(tasks), kind = "stable")
+    return pd.concat(parts).iloc[order]
@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+"""
+The cleaning pipeline as named stages with an on-disk result cache.
+
+Each stage result is stored under a key made from the hash of the input files
+it reads, its parameters, the source code of the modules it runs and the keys
+of the stages it depends on. The modules are found from the code: the modules
+of the stage function and of the big5_leagues modules, functions and classes
+it uses, then every big5_leagues module they import, transitively, so a helper
+module is never left out of the key. Re-running after an edit only recomputes the
+stages whose key changed and the stages downstream of them: editing the
+qualification flags reuses the cached load and standardized frames.
+
+The cleaning runs on one of BACKENDS: "pandas" runs the standardize, renames
+and flags stages, "polars" replaces them with a single flags stage running the
+lazy plan of big5_leagues.lazy from the source file. Both give the same
+preprocessed dataset.
+
+With a fixtures_path setting, the load stage aggregates the matches of a
+fixtures file into team season rows with big5_leagues.fixtures, and the other
+stages run on them as on the teams stats file.
+"""
+
+# Import libraries
+import ast
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from big5_leagues import (cleaning, cube, export, features, fixtures, incremental, ingestion, lazy,
+                          qualification, quality, standardization, teams)
+from big5_leagues.eda import descriptive_statistics_table, eda, missing_values_table
+from big5_leagues.incremental import (DEFAULT_PREPROCESSED_PATH, DEFAULT_STATISTICS_PATH,
+                                      DEFAULT_TABLES_DIRECTORY)
+from big5_leagues.instrumentation import DEFAULT_REPORT_PATH, Instrumentation
+from big5_leagues.parallel import map_partitions
+
+DEFAULT_CACHE_DIRECTORY = ".cache/pipeline"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+PACKAGE = "big5_leagues"
+# Never part of a stage key: the command line and this module, which import every other module. The
+# source of the stage functions defined here is hashed on its own.
+ENTRY_POINTS = (f"{PACKAGE}.cli", f"{PACKAGE}.__main__", __name__)
+
+
+class Stage(NamedTuple):
+    """
+    One named step of the pipeline.
+
+    Attributes
+    ----------
+    name : str
+        Stage name, also used to refer to its result.
+    function : Callable
+        Called with the results of the input stages, in order, followed by the
+        parameters as keyword arguments.
+    inputs : tuple of str
+        Names of the stages whose results the function takes.
+    params : tuple of str
+        Names of the pipeline settings passed to the function.
+    files : tuple of str
+        Settings holding paths of files the stage reads. The content of the files
+        is part of the cache key.
+    modules : tuple of str
+        Names of modules whose source code is part of the cache key, on top of
+        the modules found from the function, see stage_modules(). Their
+        big5_leagues imports are followed too.
+    version : str
+        Bump to invalidate the cached results by hand.
+    partitioned : bool
+        The stage only transforms rows one at a time, so it can be run per
+        competition/season partition on several processes.
+
+    """
+    name: str
+    function: Callable
+    inputs: Tuple[str, ...] = ()
+    params: Tuple[str, ...] = ()
+    files: Tuple[str, ...] = ()
+    modules: Tuple[str, ...] = ()
+    version: str = "1"
+    partitioned: bool = False
+
+
+class StageCache:
+    """
+    Pickled stage results in a directory, bounded in size.
+
+    When the directory grows over max_bytes, the least recently used results are
+    removed first. Reading a result marks it as used.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = []
+        self.misses = []
+        os.makedirs(directory, exist_ok = True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+        os.utime(path)
+        return True, value
+
+    def put(self, key: str, value: Any):
+        # Write to a temporary file first so an interrupted run never leaves a partial result
+        descriptor, temporary = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            pickle.dump(value, file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._path(key))
+        self.evict(keep = key)
+
+    def evict(self, keep: Optional[str] = None):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                status = os.stat(os.path.join(self.directory, name))
+                entries.append((status.st_mtime, status.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == f"{keep}.pkl":
+                continue
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+# Stage functions
+def _load(dataset_path: str) -> pd.DataFrame:
+    return ingestion.read_teams_stats(dataset_path)
+
+
+def _load_fixtures(fixtures_path: str, deductions_path: str) -> pd.DataFrame:
+    return fixtures.fixtures_to_teams_stats(fixtures_path, quality.load_deductions(deductions_path))
+
+
+def _eda(dataset: pd.DataFrame) -> dict:
+    data_eda = eda(dataset, graphs = False,
+                   metrics = ["data_descriptive_stats", "data_count_null", "data_correlation_matrix"])
+    return dict(data_eda)
+
+
+def _descriptive_stats(data_eda: dict) -> pd.DataFrame:
+    return descriptive_statistics_table(data_eda["data_descriptive_stats"])
+
+
+def _missing_values(data_eda: dict, dataset: pd.DataFrame) -> pd.DataFrame:
+    return missing_values_table(data_eda["data_count_null"], dataset.shape[0])
+
+
+def _quality(dataset: pd.DataFrame, deductions_path: str) -> pd.DataFrame:
+    return quality.check_quality(dataset, deductions = quality.load_deductions(deductions_path))
+
+
+def _standardize(dataset: pd.DataFrame, target_games) -> pd.DataFrame:
+    return standardization.standardize(dataset, target_games = target_games)
+
+
+def _renames(dataset: pd.DataFrame, aliases_path: str) -> pd.DataFrame:
+    return cleaning.apply_renames(dataset, teams.TeamIndex.load(aliases_path))
+
+
+def _flags(dataset: pd.DataFrame, corrections_path: str, aliases_path: str) -> pd.DataFrame:
+    corrections = qualification.load_corrections(corrections_path, teams.TeamIndex.load(aliases_path))
+    return cleaning.apply_notes_flags(dataset, corrections)
+
+
+def _features(dataset: pd.DataFrame, feature_metrics, feature_windows) -> pd.DataFrame:
+    return features.trajectory_features(dataset, feature_metrics, feature_windows)
+
+
+def _polars_flags(dataset_path: str, corrections_path: str, aliases_path: str, target_games) -> pd.DataFrame:
+    aliases = teams.TeamIndex.load(aliases_path)
+    return lazy.clean_polars(dataset_path, qualification.load_corrections(corrections_path, aliases), aliases,
+                             target_games)
+
+
+STAGES = (Stage("load", _load, params = ("dataset_path",), files = ("dataset_path",),
+                modules = ("big5_leagues.ingestion",)),
+          Stage("eda", _eda, inputs = ("load",), modules = ("big5_leagues.eda",)),
+          Stage("descriptive_stats", _descriptive_stats, inputs = ("eda",),
+                modules = ("big5_leagues.eda",)),
+          Stage("missing_values", _missing_values, inputs = ("eda", "load"),
+                modules = ("big5_leagues.eda",)),
+          Stage("quality", _quality, inputs = ("load",), params = ("deductions_path",),
+                files = ("deductions_path",), modules = ("big5_leagues.quality",)),
+          Stage("running_statistics", incremental.RunningStatistics.from_frame, inputs = ("load",),
+                modules = ("big5_leagues.incremental", "big5_leagues.sketches")),
+          Stage("standardize", _standardize, inputs = ("load",), params = ("target_games",),
+                modules = ("big5_leagues.standardization",), partitioned = True),
+          Stage("renames", _renames, inputs = ("standardize",), params = ("aliases_path",),
+                files = ("aliases_path",), modules = ("big5_leagues.cleaning", "big5_leagues.teams"),
+                partitioned = True),
+          Stage("flags", _flags, inputs = ("renames",), params = ("corrections_path", "aliases_path"),
+                files = ("corrections_path", "aliases_path"),
+                modules = ("big5_leagues.qualification", "big5_leagues.notes", "big5_leagues.cleaning",
+                           "big5_leagues.teams"),
+                partitioned = True),
+          Stage("cube", cube.build_cube, inputs = ("flags",), modules = ("big5_leagues.cube",)),
+          Stage("features", _features, inputs = ("flags",),
+                params = ("feature_metrics", "feature_windows"), modules = ("big5_leagues.features",)),
+          )
+
+# The same stages with standardize, renames and flags fused into one flags stage running the Polars plan
+_POLARS_FLAGS = Stage("flags", _polars_flags,
+                      params = ("dataset_path", "corrections_path", "aliases_path", "target_games"),
+                      files = ("dataset_path", "corrections_path", "aliases_path"),
+                      modules = ("big5_leagues.lazy", "big5_leagues.notes", "big5_leagues.qualification",
+                                 "big5_leagues.standardization", "big5_leagues.teams"))
+POLARS_STAGES = tuple(_POLARS_FLAGS if stage.name == "flags" else stage for stage in STAGES
+                      if stage.name not in ("standardize", "renames"))
+
+BACKENDS = {"pandas": STAGES, "polars": POLARS_STAGES}
+
+# The pandas stages loading the team seasons from the matches of a fixtures file
+_FIXTURES_LOAD = Stage("load", _load_fixtures, params = ("fixtures_path", "deductions_path"),
+                       files = ("fixtures_path", "deductions_path"),
+                       modules = ("big5_leagues.fixtures", "big5_leagues.ingestion", "big5_leagues.quality",
+                                  "big5_leagues.synthetic"))
+FIXTURES_STAGES = tuple(_FIXTURES_LOAD if stage.name == "load" else stage for stage in STAGES)
+
+DEFAULT_SETTINGS = {"dataset_path": ingestion.DEFAULT_DATASET_PATH,
+                    "corrections_path": qualification.DEFAULT_CORRECTIONS_PATH,
+                    "deductions_path": quality.DEFAULT_DEDUCTIONS_PATH,
+                    "aliases_path": teams.DEFAULT_ALIASES_PATH,
+                    "fixtures_path": None,
+                    "target_games": standardization.DEFAULT_TARGET_GAMES,
+                    "feature_metrics": features.DEFAULT_METRICS,
+                    "feature_windows": features.DEFAULT_WINDOWS,
+                    }
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _module_source(name: str) -> str:
+    return inspect.getsource(importlib.import_module(name))
+
+
+def _imported_modules(name: str) -> set:
+    # big5_leagues modules imported by a module, at the top or inside its functions
+    imported = set()
+    for node in ast.walk(ast.parse(_module_source(name))):
+        if isinstance(node, ast.Import):
+            imported |= {alias.name for alias in node.names}
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            imported.add(node.module)
+            if node.module == PACKAGE:
+                # from big5_leagues import cleaning imports a module
+                imported |= {f"{PACKAGE}.{alias.name}" for alias in node.names}
+    return {module for module in imported
+            if module.startswith(f"{PACKAGE}.") and importlib.util.find_spec(module) is not None}
+
+
+def _function_modules(function: Callable) -> set:
+    # Module of the function and the big5_leagues modules of the globals its code refers to
+    function = inspect.unwrap(getattr(function, "__func__", function))
+    names = set()
+    codes = [function.__code__]
+    while codes:
+        code = codes.pop()
+        names |= set(code.co_names)
+        codes += [constant for constant in code.co_consts if inspect.iscode(constant)]
+    modules = {function.__module__}
+    for name in names:
+        value = function.__globals__.get(name)
+        modules.add(value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None))
+    return {module for module in modules if isinstance(module, str) and module.startswith(f"{PACKAGE}.")}
+
+
+def stage_modules(stage: Stage) -> Tuple[str, ...]:
+    """
+    Modules whose source code is part of the cache key of a stage.
+
+    Parameters
+    ----------
+    stage : Stage
+        The stage.
+
+    Returns
+    -------
+    tuple of str
+        The modules of the stage and of its function, with the big5_leagues
+        modules they import, transitively, but the ENTRY_POINTS, in sorted
+        order.
+
+    """
+    pending = (set(stage.modules) | _function_modules(stage.function)) - set(ENTRY_POINTS)
+    resolved = set()
+    while pending:
+        module = pending.pop()
+        resolved.add(module)
+        pending |= _imported_modules(module) - resolved - set(ENTRY_POINTS)
+    return tuple(sorted(resolved))
+
+
+def _code_hash(stage: Stage) -> str:
+    sources = [inspect.getsource(stage.function)]
+    sources += [f"# {module}\n{_module_source(module)}" for module in stage_modules(stage)]
+    return hashlib.sha256("\n".join(sources).encode("utf-8")).hexdigest()
+
+
+def stage_key(stage: Stage, settings: Mapping[str, Any], input_keys: Mapping[str, str]) -> str:
+    description = {"stage": stage.name,
+                   "version": stage.version,
+                   "code": _code_hash(stage),
+                   "params": {param: repr(settings[param]) for param in stage.params},
+                   "files": {param: _file_hash(settings[param]) for param in stage.files},
+                   "inputs": [input_keys[name] for name in stage.inputs],
+                   }
+    return hashlib.sha256(json.dumps(description, sort_keys = True).encode("utf-8")).hexdigest()
+
+
+def _call(instrumentation: Optional[Instrumentation], name: str, function: Callable, *args, **kwargs):
+    if instrumentation is None:
+        return function(*args, **kwargs)
+    return instrumentation.run(name, function, *args, **kwargs)
+
+
+def run_stages(settings: Optional[Mapping[str, Any]] = None,
+               cache: Optional[StageCache] = None,
+               stages: Tuple[Stage, ...] = STAGES,
+               workers: int = 1,
+               instrumentation: Optional[Instrumentation] = None) -> Dict[str, Any]:
+    """
+    Run the pipeline stages, reusing cached results whose key did not change.
+
+    Parameters
+    ----------
+    settings : Mapping[str, Any], optional
+        Overrides of DEFAULT_SETTINGS.
+    cache : StageCache, optional
+        Where stage results are stored. The default is None, which runs every
+        stage without caching.
+    stages : tuple of Stage, optional
+        Stages in an order where every stage comes after its inputs. The default
+        is STAGES.
+    workers : int, optional
+        Number of processes the partitioned stages are spread across. The
+        results do not depend on it, so it is not part of the cache keys. The
+        default is 1.
+    instrumentation : Instrumentation, optional
+        Records the time, memory and rows of every stage. The default is None.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The result of every stage by name.
+
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    results = {}
+    keys = {}
+    for stage in stages:
+        keys[stage.name] = stage_key(stage, settings, keys)
+        inputs = [results[name] for name in stage.inputs]
+        if cache is not None:
+            start = time.perf_counter()
+            hit, value = cache.get(keys[stage.name])
+            if hit:
+                cache.hits.append(stage.name)
+                if instrumentation is not None:
+                    instrumentation.record_cached(stage.name, inputs, value, time.perf_counter() - start)
+                results[stage.name] = value
+                continue
+            cache.misses.append(stage.name)
+        params = {param: settings[param] for param in stage.params}
+        if stage.partitioned and workers != 1:
+            value = _call(instrumentation, stage.name, map_partitions, stage.function, *inputs,
+                          workers = workers, **params)
+        else:
+            value = _call(instrumentation, stage.name, stage.function, *inputs, **params)
+        if cache is not None:
+            cache.put(keys[stage.name], value)
+        results[stage.name] = value
+    return results
+
+
+def export_results(results: Mapping[str, Any],
+                   tables_directory: str = DEFAULT_TABLES_DIRECTORY,
+                   preprocessed_path: str = DEFAULT_PREPROCESSED_PATH,
+                   statistics_path: str = DEFAULT_STATISTICS_PATH,
+                   formats: Iterable[str] = ("csv",),
+                   instrumentation: Optional[Instrumentation] = None,
+                   cube_directory: Optional[str] = None,
+                   features_path: Optional[str] = None):
+    """
+    Write the EDA and data quality tables, the running statistics, the preprocessed dataset,
+    the dashboard fact tables and the trajectory features.
+
+    Parameters
+    ----------
+    results : Mapping[str, Any]
+        Stage results returned by run_stages().
+    tables_directory : str, optional
+        Directory of the EDA tables.
+    preprocessed_path : str, optional
+        CSV file of the preprocessed dataset. Columnar exports are written next
+        to it with the .parquet and .feather extensions.
+    statistics_path : str, optional
+        Running statistics file.
+    formats : Iterable[str], optional
+        Formats of the preprocessed dataset among "csv", "parquet" and "feather".
+        The default is ("csv",).
+    instrumentation : Instrumentation, optional
+        Records every write as a write_* stage. The default is None.
+    cube_directory : str, optional
+        Directory of the dashboard fact tables. The default is None, which
+        writes them to a dashboard_cube directory next to the preprocessed
+        dataset.
+    features_path : str, optional
+        CSV file of the trajectory features. The default is None, which writes
+        Trajectory_Features.csv next to the preprocessed dataset.
+
+    """
+    unknown = set(formats) - {"csv", "parquet", "feather"}
+    if unknown:
+        raise ValueError(f"Unknown export formats: {sorted(unknown)}")
+    _call(instrumentation, "write_descriptive_stats", results["descriptive_stats"].to_csv,
+          os.path.join(tables_directory, "Descriptive_Statistics_Table.csv"), index = True)
+    _call(instrumentation, "write_missing_values", results["missing_values"].to_csv,
+          os.path.join(tables_directory, "Missing_Values_Table.csv"), index = True)
+    _call(instrumentation, "write_quality", results["quality"].to_csv,
+          os.path.join(tables_directory, "Data_Quality_Violations_Table.csv"), index = True)
+    _call(instrumentation, "write_running_statistics", results["running_statistics"].save,
+          statistics_path)
+    _call(instrumentation, "write_correlation_matrix", results["eda"]["data_correlation_matrix"].to_csv,
+          os.path.join(tables_directory, "Correlation_Matrix_Table.csv"), index = True)
+    if "csv" in formats:
+        _call(instrumentation, "write_csv", results["flags"].to_csv, preprocessed_path, index = True)
+    if "parquet" in formats:
+        _call(instrumentation, "write_parquet", export.export_parquet, results["flags"],
+              export.columnar_path(preprocessed_path, "parquet"))
+    if "feather" in formats:
+        _call(instrumentation, "write_feather", export.export_feather, results["flags"],
+              export.columnar_path(preprocessed_path, "feather"))
+    if cube_directory is None:
+        cube_directory = cube.cube_directory(preprocessed_path)
+    _call(instrumentation, "write_cube", cube.write_cube, results["cube"], cube_directory)
+    if features_path is None:
+        features_path = features.features_path(preprocessed_path)
+    _call(instrumentation, "write_features", features.write_features, results["features"], features_path)
+
+
+def run_pipeline(settings: Optional[Mapping[str, Any]] = None,
+                 tables_directory: str = DEFAULT_TABLES_DIRECTORY,
+                 preprocessed_path: str = DEFAULT_PREPROCESSED_PATH,
+                 statistics_path: str = DEFAULT_STATISTICS_PATH,
+                 cache_directory: Optional[str] = DEFAULT_CACHE_DIRECTORY,
+                 workers: int = 1,
+                 formats: Iterable[str] = ("csv",),
+                 report_path: Optional[str] = DEFAULT_REPORT_PATH,
+                 memory: str = "tracemalloc",
+                 profile_stages: Iterable[str] = (),
+                 cube_directory: Optional[str] = None,
+                 backend: str = "pandas",
+                 features_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every stage and write the outputs, as the cleaning script does.
+
+    Parameters
+    ----------
+    settings : Mapping[str, Any], optional
+        Overrides of DEFAULT_SETTINGS (dataset_path, corrections_path,
+        deductions_path, aliases_path, fixtures_path, target_games,
+        feature_metrics, feature_windows). A fixtures_path loads the team
+        seasons from a fixtures file instead of dataset_path, with the pandas
+        backend.
+    tables_directory, preprocessed_path, statistics_path : str, optional
+        Where the outputs are written, see export_results().
+    cache_directory : str, optional
+        Directory of the stage cache. None runs every stage without caching.
+    workers : int, optional
+        Number of processes for the partitioned stages. The default is 1.
+    formats : Iterable[str], optional
+        Formats of the preprocessed dataset. The default is ("csv",).
+    report_path : str, optional
+        JSON file of the per-stage time, memory and rows report. None skips the
+        instrumentation. The default is DEFAULT_REPORT_PATH.
+    memory : str, optional
+        How the report measures memory, "tracemalloc" or "rss", see
+        big5_leagues.instrumentation. The default is "tracemalloc".
+    profile_stages : Iterable[str], optional
+        Stages whose cProfile statistics are dumped to .cache/profiles. The
+        default is none.
+    cube_directory : str, optional
+        Directory of the dashboard fact tables. The default is None, next to
+        the preprocessed dataset.
+    backend : str, optional
+        Backend of the cleaning stages, a key of BACKENDS. The polars backend
+        runs in its own threads and ignores workers. The default is "pandas".
+    features_path : str, optional
+        CSV file of the trajectory features. The default is None, next to the
+        preprocessed dataset.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The result of every stage by name.
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    stages = BACKENDS[backend]
+    if (settings or {}).get("fixtures_path") is not None:
+        if backend != "pandas":
+            raise ValueError("Fixtures are only loaded by the pandas backend")
+        stages = FIXTURES_STAGES
+    profile_stages = tuple(profile_stages)
+    instrumentation = None
+    if report_path is not None or profile_stages:
+        instrumentation = Instrumentation(memory = memory, profile_stages = profile_stages)
+    cache = None if cache_directory is None else StageCache(cache_directory)
+    results = run_stages(settings, cache = cache, stages = stages, workers = workers,
+                         instrumentation = instrumentation)
+    export_results(results, tables_directory = tables_directory, preprocessed_path = preprocessed_path,
+                   statistics_path = statistics_path, formats = formats,
+                   instrumentation = instrumentation, cube_directory = cube_directory,
+                   features_path = features_path)
+    if report_path is not None:
+        instrumentation.write(report_path)
+    return results
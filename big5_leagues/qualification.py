@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+UEFA Champions League, UEFA Europa League and Relegation flags.
+
+The notes column has a lot of incorrect data: the teams that qualify for the UEFA
+Champions League, Europa League, and are Relegated, are not well specified across
+the 11 seasons. The missing outcomes were fetched from FlashFootball
+(https://www.flashfootball.com/) and are kept in a corrections table keyed by
+(season, competition, squad). Adding a correction only means adding a row to
+that table. Its squads may be spelled as in any source, they are mapped to the
+canonical names of the alias table before the join.
+"""
+
+# Import libraries
+import warnings
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.notes import parse_notes
+from big5_leagues.teams import TeamIndex
+
+FLAG_COLUMNS = ("UEFA Champions League", "UEFA Europa League", "Relegation")
+# Outcomes only known from the notes, not from the corrections table
+NOTES_COLUMNS = ("UEFA Europa Conference League", "Qualification Route", "Relegation Playoff")
+CORRECTION_KEYS = ["season", "competition", "squad"]
+DEFAULT_CORRECTIONS_PATH = "datasets/FlashFootball_Corrections.csv"
+
+
+def load_corrections(path: str = DEFAULT_CORRECTIONS_PATH,
+                     teams: Optional[TeamIndex] = None) -> pd.DataFrame:
+    """
+    Load the FlashFootball corrections table.
+
+    Parameters
+    ----------
+    path : str, optional
+        CSV file with the season, competition and squad keys and a Yes/No column
+        per flag. The default is DEFAULT_CORRECTIONS_PATH.
+    teams : TeamIndex, optional
+        Alias table the squads are canonicalized with. A squad missing from it
+        would never match a row, so it raises a warning with the closest known
+        teams. The default is None, which keeps the squads as written.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (season, competition, squad) with a boolean column per flag.
+
+    """
+    corrections = pd.read_csv(path, dtype = str, encoding = "utf-8")
+    if teams is not None:
+        unknown = teams.report_unknown(corrections["squad"])
+        if unknown:
+            warnings.warn(f"Squads of {path} missing from the alias table, with the closest teams: "
+                          f"{unknown}")
+        corrections["squad"] = teams.canonicalize(corrections["squad"])[0]
+    duplicated = corrections.duplicated(CORRECTION_KEYS)
+    if duplicated.any():
+        raise ValueError("Duplicated corrections for: "
+                         f"{corrections.loc[duplicated, CORRECTION_KEYS].values.tolist()}")
+    for flag in FLAG_COLUMNS:
+        corrections[flag] = corrections[flag].eq("Yes")
+    return corrections
+
+
+def add_qualification_flags(dataset: pd.DataFrame, corrections: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the three Yes/No flag columns from the notes and the corrections.
+
+    A flag is "Yes" when the note mentions the outcome, as the competition the
+    team qualified for or as the route to it (a Europa League win), or the
+    corrections table lists it. A note of a Conference League qualification
+    always sets the Europa League flag to "No". The notes also give the
+    NOTES_COLUMNS: the Conference League qualification, the route to the
+    European competition and the relegation playoffs.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Team season statistics with the notes column.
+    corrections : pd.DataFrame
+        Corrections table returned by load_corrections().
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the dataset with the flag columns and the NOTES_COLUMNS appended.
+
+    """
+    # Every note is parsed once
+    parsed = parse_notes(dataset["notes"])
+    competition = parsed["competition"].to_numpy()
+    route = parsed["route"].to_numpy()
+    # One hashed join of every row against the corrections table
+    corrected = dataset[CORRECTION_KEYS].merge(corrections, how = "left", on = CORRECTION_KEYS,
+                                              validate = "many_to_one")
+    corrected = corrected[list(FLAG_COLUMNS)].eq(True).to_numpy()
+
+    champions_league = ((competition == "UEFA Champions League") | (route == "Champions League win")
+                        | corrected[:, 0])
+    europa_league = ~parsed["conference_league"].to_numpy() & (
+        (competition == "UEFA Europa League") | (route == "Europa League win") | corrected[:, 1])
+    relegation = parsed["relegated"].to_numpy() | corrected[:, 2]
+
+    flags = {flag: pd.Series(np.where(values, "Yes", "No"), index = dataset.index)
+             for flag, values in zip(FLAG_COLUMNS, (champions_league, europa_league, relegation))}
+    flags[NOTES_COLUMNS[0]] = pd.Series(np.where(parsed["conference_league"], "Yes", "No"),
+                                        index = dataset.index)
+    flags[NOTES_COLUMNS[1]] = parsed["route"]
+    flags[NOTES_COLUMNS[2]] = pd.Series(np.where(parsed["relegation_playoff"], "Yes", "No"),
+                                        index = dataset.index)
+    return dataset.assign(**flags)
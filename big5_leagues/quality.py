@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Data quality rules of the teams stats dataset.
+
+Each rule is declared as a pandas expression that holds on valid rows, or as
+the key columns that must identify a single row. The rules are checked in one
+pass: every expression is evaluated to a boolean mask over the whole column
+arrays, the masks are stacked into one violations matrix (rows x rules) and
+the violations of every rule are counted at once. Nothing loops over rows, so
+the checks stay fast on millions of rows.
+
+Rows where a rule cannot be evaluated because a value is missing are not
+counted as violations, they are reported in the rows_skipped column.
+
+Points deducted by the leagues (e.g. Parma in 2014-2015) are listed in a
+deductions table keyed by (season, competition, squad), so that the points
+rule allows for them.
+"""
+
+# Import libraries
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEDUCTION_KEYS = ["season", "competition", "squad"]
+DEFAULT_DEDUCTIONS_PATH = "datasets/Points_Deductions.csv"
+# Row labels of the first violations listed in the violation table
+EXAMPLES = 5
+
+
+class Rule(NamedTuple):
+    """
+    A data quality rule.
+
+    Attributes
+    ----------
+    name : str
+        Rule name, used as the row of the violation table.
+    description : str
+        What the rule checks, in words.
+    expression : str, optional
+        Expression passed to DataFrame.eval() that is True on valid rows.
+    unique : tuple of str, optional
+        Columns whose values must identify a single row. Every row of a
+        duplicated key is a violation.
+
+    """
+    name: str
+    description: str
+    expression: Optional[str] = None
+    unique: Tuple[str, ...] = ()
+
+
+RULES = (Rule("results_sum_to_games", "wins + draws + losses == games",
+              expression = "wins + draws + losses == games"),
+         Rule("points_from_results", "points == 3*wins + draws, less the known deductions",
+              expression = "points == 3 * wins + draws - points_deduction"),
+         Rule("goal_diff_from_goals", "goal_diff == goals_for - goals_against",
+              expression = "goal_diff == goals_for - goals_against"),
+         Rule("pens_made_within_attempts", "pens_made <= pens_att",
+              expression = "pens_made <= pens_att"),
+         Rule("saves_within_shots_against", "saves <= shots_on_target_against",
+              expression = "saves <= shots_on_target_against"),
+         Rule("clean_sheets_within_games", "clean_sheets <= games",
+              expression = "clean_sheets <= games"),
+         Rule("assists_within_goals", "assists <= goals_for",
+              expression = "assists <= goals_for"),
+         Rule("cards_missing_together", "cards_yellow and cards_red are missing on the same rows",
+              expression = "cards_yellow.isna() == cards_red.isna()"),
+         Rule("one_row_per_rank", "one row per (season, competition, rank)",
+              unique = ("season", "competition", "rank")),
+         )
+
+
+def load_deductions(path: str = DEFAULT_DEDUCTIONS_PATH) -> pd.DataFrame:
+    """
+    Load the points deductions table.
+
+    Parameters
+    ----------
+    path : str, optional
+        CSV file with the season, competition and squad keys and the number of
+        points deducted. The default is DEFAULT_DEDUCTIONS_PATH.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (season, competition, squad) with the points_deduction column.
+
+    """
+    deductions = pd.read_csv(path, dtype = {key: str for key in DEDUCTION_KEYS}, encoding = "utf-8")
+    duplicated = deductions.duplicated(DEDUCTION_KEYS)
+    if duplicated.any():
+        raise ValueError("Duplicated deductions for: "
+                         f"{deductions.loc[duplicated, DEDUCTION_KEYS].values.tolist()}")
+    return deductions
+
+
+def _with_deductions(dataset: pd.DataFrame, deductions: Optional[pd.DataFrame]) -> pd.DataFrame:
+    points_deduction = np.zeros(len(dataset), dtype = np.int64)
+    if deductions is not None and set(DEDUCTION_KEYS) <= set(dataset.columns):
+        # Only the rows of a squad with a deduction are joined, the few of them are
+        # found with isin(), which works on the categories of a categorical column
+        candidates = np.flatnonzero(dataset["squad"].isin(deductions["squad"]).to_numpy())
+        deducted = dataset[DEDUCTION_KEYS].iloc[candidates].astype(str).merge(
+            deductions, how = "left", on = DEDUCTION_KEYS, validate = "many_to_one")
+        points_deduction[candidates] = deducted["points_deduction"].fillna(0).to_numpy(dtype = np.int64)
+    return dataset.assign(points_deduction = points_deduction)
+
+
+def rule_masks(dataset: pd.DataFrame, rules: Iterable[Rule] = RULES,
+               deductions: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Evaluate every rule on every row.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Team season statistics.
+    rules : Iterable[Rule], optional
+        Rules to check. The default is RULES.
+    deductions : pd.DataFrame, optional
+        Table returned by load_deductions(). The default is None, which checks
+        the points without deductions.
+
+    Returns
+    -------
+    pd.DataFrame
+        One nullable boolean column per rule with the dataset index: True where
+        the row violates the rule, <NA> where it could not be checked.
+
+    """
+    data = _with_deductions(dataset, deductions)
+    masks = {}
+    for rule in rules:
+        if (rule.expression is None) == (not rule.unique):
+            raise ValueError(f"Rule {rule.name} needs either an expression or unique columns")
+        if rule.unique:
+            masks[rule.name] = data.duplicated(list(rule.unique), keep = False).to_numpy()
+            continue
+        valid = data.eval(rule.expression, engine = "python")
+        masks[rule.name] = ~pd.array(valid, dtype = "boolean")
+    return pd.DataFrame(masks, index = dataset.index).astype("boolean")
+
+
+def violation_table(masks: pd.DataFrame, rules: Iterable[Rule] = RULES) -> pd.DataFrame:
+    """
+    Count the violations of every rule.
+
+    Parameters
+    ----------
+    masks : pd.DataFrame
+        Violations returned by rule_masks().
+    rules : Iterable[Rule], optional
+        The rules the masks were evaluated for, for their descriptions. The
+        default is RULES.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by rule name, with the description, the rows checked and
+        skipped, the number and percentage of violations and the labels of the
+        first violating rows.
+
+    """
+    descriptions = {rule.name: rule.description for rule in rules}
+    # One pass over the stacked rows x rules matrices
+    violations = masks.to_numpy(dtype = bool, na_value = False)
+    skipped = masks.isna().to_numpy()
+    violation_count = violations.sum(axis = 0)
+    checked = len(masks) - skipped.sum(axis = 0)
+    examples = []
+    for position in range(masks.shape[1]):
+        labels = masks.index[np.flatnonzero(violations[:, position])[:EXAMPLES]]
+        examples.append(";".join(map(str, labels)))
+    with np.errstate(all = "ignore"):
+        rate = np.round(np.where(checked > 0, violation_count / checked * 100, np.nan), 2)
+    return pd.DataFrame({"description": [descriptions.get(name, "") for name in masks.columns],
+                         "rows_checked": checked,
+                         "rows_skipped": len(masks) - checked,
+                         "violations": violation_count,
+                         "violation_rate (%)": rate,
+                         "first_violations": examples},
+                        index = pd.Index(masks.columns, name = "rule"))
+
+
+def check_quality(dataset: pd.DataFrame, rules: Iterable[Rule] = RULES,
+                  deductions: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Check the rules on the dataset and return the violation table."""
+    rules = tuple(rules)
+    return violation_table(rule_masks(dataset, rules, deductions), rules)
@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+"""
+Indexed query service over the preprocessed dataset.
+
+The dataset is loaded once. For each of the INDEX_COLUMNS (squad,
+competition, season and the Champions League, Europa League and Relegation
+flags) an index maps every value to the sorted positions of its rows. A query
+looks its equality and range filters on those columns up in the indexes,
+intersects the positions starting from the smallest set and only evaluates
+the other filters on the remaining rows, so it never scans the whole dataset.
+
+A query filters, then either projects columns or groups and aggregates:
+    {"filters": {"competition": "Serie A", "Relegation": "Yes",
+                 "season": {">=": "2014-2015"}},
+     "columns": ["season", "squad", "points"],
+     "sort": ["season"], "limit": 50}
+    {"filters": {"squad": "Paris SG"},
+     "group_by": ["competition"], "aggregates": {"points": ["sum", "mean"]}}
+
+A filter value is a scalar (equality), a list (any of the values) or a
+mapping of operators (==, !=, <, <=, >, >=, in) to values. String values of a
+numeric column, as every value of GET /query, are converted to its dtype.
+
+Results are kept in a least recently used cache keyed by the query, as
+frames for query() and already encoded for the HTTP service. Every
+query compares the modification time and size of the dataset file with the
+loaded ones; when the file changed (e.g. after big5-leagues append) the
+dataset and indexes are reloaded and the cache is cleared.
+
+The HTTP service answers, from one process with a thread per request:
+    GET  /health                           rows, file and cache statistics
+    GET  /query?squad=Paris+SG&columns=season,points
+                                           equality filters, comma separated lists
+    POST /query                            a JSON query as above
+Run from the repository root:
+    big5-leagues serve --port 8000
+"""
+
+# Import libraries
+import json
+import operator
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.incremental import DEFAULT_PREPROCESSED_PATH
+
+INDEX_COLUMNS = ("squad", "competition", "season", "UEFA Champions League", "UEFA Europa League",
+                 "Relegation")
+OPERATORS = {"==": operator.eq,
+             "!=": operator.ne,
+             "<": operator.lt,
+             "<=": operator.le,
+             ">": operator.gt,
+             ">=": operator.ge,
+             "in": lambda values, value: values.isin(value),
+             }
+AGGREGATIONS = ("count", "sum", "mean", "median", "min", "max", "std", "nunique")
+QUERY_KEYS = ("filters", "columns", "group_by", "aggregates", "sort", "descending", "limit")
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    status = os.stat(path)
+    return status.st_mtime_ns, status.st_size
+
+
+def _conditions(column: str, condition: Any) -> List[Tuple[str, Any]]:
+    # (operator, value) pairs of the filter of one column
+    if isinstance(condition, Mapping):
+        unknown = set(condition) - set(OPERATORS)
+        if unknown:
+            raise ValueError(f"Unknown operators for {column}: {sorted(unknown)}")
+        return [(name, list(value) if name == "in" else value) for name, value in condition.items()]
+    if isinstance(condition, (list, tuple)):
+        return [("in", list(condition))]
+    return [("==", condition)]
+
+
+def _typed(column: str, dtype: Any, conditions: List[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+    # Conditions with their string values converted to the dtype of a numeric column, as GET /query
+    # passes every value as a string
+    if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return conditions
+    typed = []
+    for name, value in conditions:
+        items = value if name == "in" else [value]
+        if any(isinstance(item, str) for item in items):
+            try:
+                items = pd.Series(items, dtype = object).astype(dtype).tolist()
+            except (ValueError, TypeError) as error:
+                raise ValueError(f"Filter value {value!r} of {column} is not {dtype}") from error
+        typed.append((name, items if name == "in" else items[0]))
+    return typed
+
+
+def _as_list(value: Any) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+class QueryEngine:
+    """
+    The preprocessed dataset with secondary indexes and a result cache.
+
+    Parameters
+    ----------
+    path : str, optional
+        Preprocessed dataset, a CSV file or the Parquet/Feather export. The
+        default is DEFAULT_PREPROCESSED_PATH.
+    index_columns : Iterable[str], optional
+        Columns to index. The default is INDEX_COLUMNS.
+    cache_size : int, optional
+        Number of query results kept. The default is DEFAULT_CACHE_SIZE.
+
+    """
+
+    def __init__(self, path: str = DEFAULT_PREPROCESSED_PATH,
+                 index_columns: Iterable[str] = INDEX_COLUMNS,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.index_columns = tuple(index_columns)
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()
+        self._signature = None
+        self.reload()
+
+    def _read(self) -> pd.DataFrame:
+        extension = os.path.splitext(self.path)[1].lower()
+        if extension == ".parquet":
+            return pd.read_parquet(self.path)
+        if extension == ".feather":
+            return pd.read_feather(self.path)
+        return pd.read_csv(self.path, index_col = 0)
+
+    def reload(self):
+        """Load the dataset, rebuild the indexes and clear the cache."""
+        with self._lock:
+            signature = _file_signature(self.path)
+            dataset = self._read()
+            # Positions of the rows of every value, in ascending order; missing values are not indexed
+            indexes = {column: {value: positions.astype(np.int64) for value, positions in
+                                dataset.groupby(column, sort = False, observed = True).indices.items()}
+                       for column in self.index_columns if column in dataset.columns}
+            self.dataset, self.indexes, self._signature = dataset, indexes, signature
+            self._cache.clear()
+            self.loads += 1
+
+    def _check_file(self):
+        # Reload when the file was rewritten or appended to since it was loaded
+        if _file_signature(self.path) != self._signature:
+            with self._lock:
+                if _file_signature(self.path) != self._signature:
+                    self.reload()
+
+    @staticmethod
+    def _index_positions(index: Dict[Any, np.ndarray], conditions: List[Tuple[str, Any]]) -> np.ndarray:
+        # Rows of an indexed column matching every condition, from the distinct values only
+        values = pd.Series(list(index), dtype = object)
+        mask = np.ones(len(values), dtype = bool)
+        for name, value in conditions:
+            mask &= np.asarray(OPERATORS[name](values, value), dtype = bool)
+        matched = [index[value] for value in values[mask]]
+        if not matched:
+            return np.empty(0, dtype = np.int64)
+        return np.sort(np.concatenate(matched)) if len(matched) > 1 else matched[0]
+
+    def _filter(self, dataset: pd.DataFrame, indexes: Mapping[str, Dict[Any, np.ndarray]],
+                filters: Mapping[str, Any]) -> np.ndarray:
+        # Positions of the rows matching every filter
+        unknown = set(filters) - set(dataset.columns)
+        if unknown:
+            raise ValueError(f"Unknown filter columns: {sorted(unknown)}")
+        conditions = {column: _typed(column, dataset[column].dtype, _conditions(column, condition))
+                      for column, condition in filters.items()}
+        indexed = [self._index_positions(indexes[column], conditions[column])
+                   for column in conditions if column in indexes]
+        positions = None
+        for candidates in sorted(indexed, key = len):
+            positions = candidates if positions is None else np.intersect1d(positions, candidates,
+                                                                            assume_unique = True)
+        if positions is None:
+            positions = np.arange(len(dataset))
+        for column in conditions:
+            if column in indexes or not len(positions):
+                continue
+            values = dataset[column].take(positions)
+            mask = np.ones(len(positions), dtype = bool)
+            for name, value in conditions[column]:
+                mask &= pd.array(OPERATORS[name](values, value), dtype = "boolean").to_numpy(
+                    dtype = bool, na_value = False)
+            positions = positions[mask]
+        return positions
+
+    def _run(self, dataset: pd.DataFrame, indexes: Mapping[str, Dict[Any, np.ndarray]], filters, columns,
+             group_by, aggregates, sort, descending, limit) -> pd.DataFrame:
+        positions = self._filter(dataset, indexes, filters or {})
+        group_by, columns, sort = _as_list(group_by), _as_list(columns), _as_list(sort)
+        if group_by or aggregates:
+            named = {}
+            for column, functions in (aggregates or {"squad": ["count"]}).items():
+                for function in _as_list(functions):
+                    if function not in AGGREGATIONS:
+                        raise ValueError(f"Unknown aggregation {function}, use one of {AGGREGATIONS}")
+                    named[f"{column}_{function}"] = (column, function)
+            needed = list(dict.fromkeys((group_by or []) + [column for column, _ in named.values()]))
+        else:
+            needed = list(dict.fromkeys((columns or list(dataset.columns)) + (sort or [])))
+        missing = set(needed) - set(dataset.columns)
+        if missing:
+            raise ValueError(f"Unknown columns: {sorted(missing)}")
+        # Only the columns the result needs are taken from the matching rows
+        result = dataset[needed].take(positions)
+        if group_by:
+            result = result.groupby(group_by, sort = True, observed = True).agg(**named).reset_index()
+        elif aggregates:
+            result = pd.DataFrame({name: [result[column].agg(function)]
+                                   for name, (column, function) in named.items()})
+        if sort:
+            result = result.sort_values(sort, ascending = not descending, kind = "stable")
+        if columns and not (group_by or aggregates):
+            result = result[columns]
+        if limit is not None:
+            result = result.head(int(limit))
+        return result
+
+    def _cached(self, key: Tuple[str, str], compute: Callable) -> Any:
+        # Value of the key from the cache, or compute(dataset, indexes) stored in the cache
+        self._check_file()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            # The dataset and its indexes as loaded now, a reload replaces both together
+            dataset, indexes, signature = self.dataset, self.indexes, self._signature
+
+        value = compute(dataset, indexes)
+        with self._lock:
+            # A result computed on a dataset replaced in the meantime is not cached
+            if signature == self._signature:
+                self._cache[key] = value
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last = False)
+        return value
+
+    @staticmethod
+    def _key(query: Mapping[str, Any]) -> str:
+        return json.dumps({name: _as_list(value) if name in ("columns", "group_by", "sort") else value
+                           for name, value in query.items()}, sort_keys = True, default = str)
+
+    def query(self, filters: Optional[Mapping[str, Any]] = None,
+              columns: Optional[Iterable[str]] = None,
+              group_by: Optional[Iterable[str]] = None,
+              aggregates: Optional[Mapping[str, Any]] = None,
+              sort: Optional[Iterable[str]] = None,
+              descending: bool = False,
+              limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Filter the rows, then project columns or aggregate groups.
+
+        Parameters
+        ----------
+        filters : Mapping[str, Any], optional
+            Conditions by column, a scalar for equality, a list for any of the
+            values or a mapping of OPERATORS to values. The default is every row.
+        columns : Iterable[str], optional
+            Columns returned when the query does not aggregate. The default is
+            every column.
+        group_by : Iterable[str], optional
+            Columns the filtered rows are grouped by.
+        aggregates : Mapping[str, Any], optional
+            Aggregations by column, a name or list of names among AGGREGATIONS.
+            Result columns are named <column>_<aggregation>. The default, when
+            grouping, counts the rows of every group.
+        sort : Iterable[str], optional
+            Columns the result is sorted by.
+        descending : bool, optional
+            Sort in descending order. The default is False.
+        limit : int, optional
+            Maximum number of rows returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            The result, a copy that the caller may modify.
+
+        """
+        query = {"filters": filters, "columns": columns, "group_by": group_by, "aggregates": aggregates,
+                 "sort": sort, "descending": descending, "limit": limit}
+        return self._cached(("frame", self._key(query)),
+                            lambda dataset, indexes: self._run(dataset, indexes, **query)).copy()
+
+    def query_json(self, **query) -> bytes:
+        """Result of query(**query) encoded by result_json(), cached as encoded."""
+        query = query_from_json(query)
+        query = {name: query.get(name) for name in QUERY_KEYS}
+        query["descending"] = bool(query["descending"])
+        return self._cached(("json", self._key(query)),
+                            lambda dataset, indexes: result_json(self._run(dataset, indexes, **query)))
+
+    def statistics(self) -> Dict[str, Any]:
+        """Rows, indexes and cache counters, as returned by GET /health."""
+        return {"path": self.path,
+                "rows": len(self.dataset),
+                "indexes": {column: len(index) for column, index in self.indexes.items()},
+                "loads": self.loads,
+                "cache": {"size": len(self._cache), "max_size": self.cache_size,
+                          "hits": self.hits, "misses": self.misses},
+                }
+
+
+def _is_names(value: Any) -> bool:
+    # A name or a list of names
+    return isinstance(value, str) or isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def query_from_json(body: Mapping[str, Any]) -> Dict[str, Any]:
+    """Check the keys and shapes of a JSON query and return the keyword arguments of QueryEngine.query()."""
+    if not isinstance(body, Mapping):
+        raise ValueError("A query is a JSON object")
+    unknown = set(body) - set(QUERY_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown query keys: {sorted(unknown)}, use {list(QUERY_KEYS)}")
+    for name in ("filters", "aggregates"):
+        if body.get(name) is not None and not isinstance(body[name], Mapping):
+            raise ValueError(f"{name} is a JSON object by column")
+    for name in ("columns", "group_by", "sort"):
+        if body.get(name) is not None and not _is_names(body[name]):
+            raise ValueError(f"{name} is a list of column names")
+    for column, functions in (body.get("aggregates") or {}).items():
+        if not _is_names(functions):
+            raise ValueError(f"The aggregates of {column} are a name or list of names among {AGGREGATIONS}")
+    limit = body.get("limit")
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int)):
+        raise ValueError("limit is an integer")
+    return dict(body)
+
+
+def query_from_parameters(parameters: Mapping[str, List[str]]) -> Dict[str, Any]:
+    """Keyword arguments of QueryEngine.query() from the parameters of GET /query."""
+    query = {"filters": {}}
+    for name, values in parameters.items():
+        value = values[-1]
+        if name in ("columns", "group_by", "sort"):
+            query[name] = value.split(",")
+        elif name == "limit":
+            query[name] = int(value)
+        elif name == "descending":
+            query[name] = value.lower() in ("1", "true", "yes")
+        else:
+            items = value.split(",")
+            query["filters"][name] = items if len(items) > 1 else value
+    return query
+
+
+def result_json(result: pd.DataFrame) -> bytes:
+    """Encode a query result as {"count", "columns", "rows"}, missing values as null."""
+    rows = result.to_json(orient = "values", date_format = "iso")
+    columns = json.dumps([str(column) for column in result.columns])
+    return f'{{"count": {len(result)}, "columns": {columns}, "rows": {rows}}}'.encode("utf-8")
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """HTTP handler of the query service, the engine is the server's."""
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _answer(self, query: Mapping[str, Any]):
+        try:
+            body = self.server.engine.query_json(**query)
+        except (ValueError, KeyError, TypeError) as error:
+            self._send(400, json.dumps({"error": str(error)}).encode("utf-8"))
+            return
+        except Exception as error:
+            # Any other failure is answered too, the client never sees a dropped connection
+            self._send(500, json.dumps({"error": f"{type(error).__name__}: {error}"}).encode("utf-8"))
+            return
+        self._send(200, body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send(200, json.dumps(self.server.engine.statistics()).encode("utf-8"))
+        elif url.path == "/query":
+            try:
+                query = query_from_parameters(parse_qs(url.query))
+            except ValueError as error:
+                self._send(400, json.dumps({"error": str(error)}).encode("utf-8"))
+                return
+            self._answer(query)
+        else:
+            self._send(404, b'{"error": "Not found, use /query or /health"}')
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/query":
+            self._send(404, b'{"error": "Not found, use POST /query"}')
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            query = query_from_json(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as error:
+            self._send(400, json.dumps({"error": str(error)}).encode("utf-8"))
+            return
+        self._answer(query)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded HTTP server of a QueryEngine."""
+
+    daemon_threads = True
+    # Connections waiting to be accepted, the default of 5 drops bursts of concurrent clients
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], engine: QueryEngine, verbose: bool = False):
+        super().__init__(address, QueryHandler)
+        self.engine = engine
+        self.verbose = verbose
+
+
+def make_server(engine: QueryEngine, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                verbose: bool = False) -> QueryServer:
+    """
+    Create the HTTP server of a query engine, a thread per request.
+
+    Parameters
+    ----------
+    engine : QueryEngine
+        Engine answering the queries.
+    host : str, optional
+        Address to listen on. The default is DEFAULT_HOST, local requests only.
+    port : int, optional
+        Port to listen on, 0 for any free port. The default is DEFAULT_PORT.
+    verbose : bool, optional
+        Log every request to stderr. The default is False.
+
+    Returns
+    -------
+    QueryServer
+        Call serve_forever() to answer requests, shutdown() from another
+        thread to stop.
+
+    """
+    return QueryServer((host, port), engine, verbose = verbose)
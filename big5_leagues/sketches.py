@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Mergeable summaries of a column in bounded memory.
+
+Each summary is updated with one chunk of values at a time and two summaries
+of different rows merge into the summary of all the rows, whatever the order,
+so chunks of a file can be summarized on separate processes:
+
+- QuantileSketch counts the values exactly up to max_values distinct values,
+  then switches to logarithmic buckets whose representative is within a
+  relative accuracy of every value in it (as in DDSketch), so the quantiles
+  are exact on small data and within the accuracy beyond;
+- HyperLogLog estimates the number of distinct values from the longest runs of
+  leading zeros of their hashes, in 2^precision one byte registers;
+- TopK keeps the most frequent values with the Misra-Gries counters: when
+  there are more than capacity counters, the smallest count is subtracted from
+  all of them. Any value more frequent than rows / (capacity + 1) is kept and
+  its count is low by at most the error.
+"""
+
+# Import libraries
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ACCURACY = 0.01
+DEFAULT_PRECISION = 14
+DEFAULT_CAPACITY = 64
+
+# Values closer to zero than this share the bucket of zero
+MIN_MAGNITUDE = 1e-9
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64 bit hashes of the non-missing values, numbers hashed as floats so that 5 and 5.0 match."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Every category is hashed once
+        codes = values.cat.codes.to_numpy()
+        categories = pd.util.hash_array(values.cat.categories.to_numpy(dtype = object))
+        return categories[codes[codes >= 0]]
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return pd.util.hash_array(values.to_numpy(dtype = float))
+    return pd.util.hash_array(values.to_numpy(dtype = object))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    # Number of bits of unsigned integers below 2^53, which floats hold exactly
+    return np.frexp(values.astype(float))[1]
+
+
+class QuantileSketch:
+    """
+    Value counts of a numeric column, bucketed past a number of distinct values.
+
+    Parameters
+    ----------
+    max_values : int, optional
+        Number of distinct values counted exactly before the counts are
+        bucketed. The default is None, which always counts exactly.
+    accuracy : float, optional
+        Relative accuracy of the bucket representatives. The default is
+        DEFAULT_ACCURACY.
+
+    """
+
+    def __init__(self, max_values: Optional[int] = None, accuracy: float = DEFAULT_ACCURACY):
+        self.max_values = max_values
+        self.accuracy = accuracy
+        self.counts = {}
+        self.bucketed = False
+
+    def _buckets(self, values: np.ndarray) -> np.ndarray:
+        # Representative of the logarithmic bucket of every value, 0 for the values close to 0
+        gamma = (1 + self.accuracy) / (1 - self.accuracy)
+        magnitude = np.abs(values)
+        with np.errstate(divide = "ignore"):
+            index = np.ceil(np.log(magnitude) / np.log(gamma))
+        representative = np.sign(values) * 2 * gamma ** index / (gamma + 1)
+        return np.where(magnitude < MIN_MAGNITUDE, 0.0, representative)
+
+    def _add(self, values: np.ndarray, counts: np.ndarray):
+        if self.bucketed:
+            values = self._buckets(values)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        if not self.bucketed and self.max_values is not None and len(self.counts) > self.max_values:
+            self.bucket()
+
+    def bucket(self):
+        """Replace the exact counts by the bucket counts."""
+        values = np.fromiter(self.counts, dtype = float, count = len(self.counts))
+        counts = np.fromiter(self.counts.values(), dtype = np.int64, count = len(self.counts))
+        buckets, positions = np.unique(self._buckets(values), return_inverse = True)
+        totals = np.bincount(positions, weights = counts).astype(np.int64)
+        self.counts = dict(zip(buckets.tolist(), totals.tolist()))
+        self.bucketed = True
+
+    def update(self, values: np.ndarray) -> "QuantileSketch":
+        """Add values, without missing ones."""
+        distinct, counts = np.unique(values, return_counts = True)
+        self._add(distinct, counts)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add the counts of another sketch with the same accuracy."""
+        if other.bucketed and not self.bucketed:
+            self.bucket()
+        values = np.fromiter(other.counts, dtype = float, count = len(other.counts))
+        self._add(values, np.fromiter(other.counts.values(), dtype = np.int64, count = len(other.counts)))
+        return self
+
+    def quantile(self, quantile: float) -> float:
+        """Quantile with linear interpolation between the closest ranks, as in Series.quantile()."""
+        if not self.counts:
+            return np.nan
+        values = np.array(sorted(self.counts))
+        cumulative = np.cumsum([self.counts[value] for value in values])
+        rank = quantile * (cumulative[-1] - 1)
+        lower = values[np.searchsorted(cumulative, np.floor(rank), side = "right")]
+        upper = values[np.searchsorted(cumulative, np.ceil(rank), side = "right")]
+        return lower + (upper - lower) * (rank - np.floor(rank))
+
+    def items(self) -> list:
+        """(value, count) pairs in value order."""
+        return sorted(self.counts.items())
+
+    @classmethod
+    def from_items(cls, items: Iterable, max_values: Optional[int] = None,
+                   accuracy: float = DEFAULT_ACCURACY, bucketed: bool = False) -> "QuantileSketch":
+        sketch = cls(max_values, accuracy)
+        sketch.counts = dict((value, count) for value, count in items)
+        sketch.bucketed = bucketed
+        return sketch
+
+
+class HyperLogLog:
+    """
+    Approximate number of distinct values.
+
+    Parameters
+    ----------
+    precision : int, optional
+        The sketch has 2^precision registers and a relative standard error of
+        about 1.04 / 2^(precision / 2), from 11 to 18. The default is
+        DEFAULT_PRECISION.
+
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        if not 11 <= precision <= 18:
+            raise ValueError(f"The precision must be from 11 to 18, not {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype = np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add 64 bit hashes, see hash_values()."""
+        bits = 64 - self.precision
+        registers = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Position of the first 1 bit after the register bits
+        ranks = (bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, registers, ranks)
+        return self
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        """Add the non-missing values of a column."""
+        return self.update_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Add the values of another sketch with the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("Only HyperLogLog sketches with the same precision can be merged")
+        np.maximum(self.registers, other.registers, out = self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """Estimated number of distinct values."""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size ** 2 / np.sum(np.exp2(-self.registers.astype(float)))
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * size and empty:
+            # Linear counting of the empty registers is more accurate for few values
+            estimate = size * np.log(size / empty)
+        return int(round(estimate))
+
+
+class TopK:
+    """
+    Most frequent values of a column with Misra-Gries counters.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        Maximum number of counters. The default is DEFAULT_CAPACITY.
+
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+
+    def _add(self, counts: Mapping):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            threshold = sorted(self.counts.values(), reverse = True)[self.capacity]
+            self.counts = {value: count - threshold for value, count in self.counts.items()
+                           if count > threshold}
+            self.error += threshold
+
+    def update(self, values: pd.Series) -> "TopK":
+        """Add the non-missing values of a column."""
+        counts = values.value_counts(sort = False)
+        self._add(counts[counts > 0].to_dict())
+        return self
+
+    def merge(self, other: "TopK") -> "TopK":
+        """Add the counters of another summary."""
+        self.error += other.error
+        self._add(other.counts)
+        return self
+
+    def value_counts(self, limit: Optional[int] = None) -> pd.Series:
+        """Counts of the kept values, most frequent first, each low by at most the error."""
+        counts = pd.Series(self.counts, dtype = np.int64).sort_values(ascending = False, kind = "stable")
+        return counts if limit is None else counts.head(limit)
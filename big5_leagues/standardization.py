@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Standardizing season totals to a common number of matches.
+
+Germany has 18 teams in the top flight while the remaining leagues have 20 teams,
+and the French league played a maximum of 28 matches during the 2019-2020 season.
+Every adjusted_* column rescales a season total to the same number of matches
+(38 by default) so that teams can be compared without that bias.
+"""
+
+# Import libraries
+from typing import Mapping, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TARGET_GAMES = 38
+
+
+class AdjustedMetric(NamedTuple):
+    """
+    Recipe for one adjusted_* column.
+
+    Attributes
+    ----------
+    terms : tuple of (str, int)
+        Source columns and their weights. Each source column is rescaled to the
+        target number of matches before the weighted terms are added up.
+    decimals : int
+        Number of decimals kept when rounding. Rounding is half-to-even, like
+        the builtin round().
+    per_match : bool
+        Divide the weighted sum by the target number of matches.
+
+    """
+    terms: Tuple[Tuple[str, int], ...]
+    decimals: int = 0
+    per_match: bool = False
+
+
+def _total(column: str) -> AdjustedMetric:
+    return AdjustedMetric(((column, 1),))
+
+
+# Adjusted columns in the order they are added to the dataset
+ADJUSTED_METRICS = {"adjusted_wins": _total("wins"),
+                    "adjusted_draws": _total("draws"),
+                    "adjusted_losses": _total("losses"),
+                    "adjusted_goals_for": _total("goals_for"),
+                    "adjusted_goals_against": _total("goals_against"),
+                    "adjusted_goal_diff": AdjustedMetric((("goals_for", 1), ("goals_against", -1)),
+                                                         decimals = 2),
+                    "adjusted_assists": _total("assists"),
+                    "adjusted_pens_made": _total("pens_made"),
+                    "adjusted_pens_att": _total("pens_att"),
+                    "adjusted_shots_on_target_against": _total("shots_on_target_against"),
+                    "adjusted_saves": _total("saves"),
+                    "adjusted_clean_sheets": _total("clean_sheets"),
+                    "adjusted_shots_on_target": _total("shots_on_target"),
+                    "adjusted_points": AdjustedMetric((("wins", 3), ("draws", 1))),
+                    "adjusted_points_per_match": AdjustedMetric((("wins", 3), ("draws", 1)),
+                                                                decimals = 2, per_match = True),
+                    }
+
+
+def _round_half_even(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    Round like the builtin round() does on floats.
+
+    np.round() scales by 10**decimals before rounding, so a value that sits right
+    on a tie can be pushed to the other side of it. Those few near-ties are
+    re-rounded with the builtin round() to give exactly the same result.
+    """
+    if decimals == 0:
+        return np.rint(values)
+    scaled = values * 10.0 ** decimals
+    rounded = np.round(values, decimals)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for position in np.flatnonzero(near_tie):
+        rounded[position] = round(float(values[position]), decimals)
+    return rounded
+
+
+def _target_games(dataset: pd.DataFrame,
+                  target_games: Union[int, Mapping[str, int]],
+                  league_column: str) -> np.ndarray:
+    if isinstance(target_games, Mapping):
+        target = dataset[league_column].astype(object).map(target_games)
+        return target.fillna(DEFAULT_TARGET_GAMES).to_numpy(dtype = float)
+    return np.full(len(dataset), float(target_games))
+
+
+def standardize(dataset: pd.DataFrame,
+                metrics: Mapping[str, AdjustedMetric] = ADJUSTED_METRICS,
+                target_games: Union[int, Mapping[str, int]] = DEFAULT_TARGET_GAMES,
+                games_column: str = "games",
+                league_column: str = "competition") -> pd.DataFrame:
+    """
+    Add the adjusted_* columns to the dataset with whole-column operations.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Team season statistics.
+    metrics : Mapping[str, AdjustedMetric], optional
+        Adjusted columns to create. The default is ADJUSTED_METRICS.
+    target_games : int or Mapping[str, int], optional
+        Number of matches every season is rescaled to, either one number for all
+        rows or a number per league. Leagues missing from the mapping use
+        DEFAULT_TARGET_GAMES. The default is 38.
+    games_column : str, optional
+        Column holding the number of matches played. The default is "games".
+    league_column : str, optional
+        Column holding the league, used when target_games is a mapping. The
+        default is "competition".
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the dataset with the adjusted columns appended.
+
+    """
+    sources = list(dict.fromkeys(column for metric in metrics.values()
+                                 for column, _ in metric.terms))
+    games = dataset[games_column].to_numpy(dtype = float, na_value = np.nan)
+    target = _target_games(dataset, target_games, league_column)
+    # Every source column scaled in one pass: (total / games) * target
+    scaled = dataset[sources].to_numpy(dtype = float, na_value = np.nan)
+    scaled = scaled / games[:, None] * target[:, None]
+    position = {column: index for index, column in enumerate(sources)}
+
+    adjusted = {}
+    for name, metric in metrics.items():
+        values = None
+        for column, weight in metric.terms:
+            term = scaled[:, position[column]]
+            if weight != 1:
+                term = weight * term
+            values = term if values is None else values + term
+        if metric.per_match:
+            values = values / target
+        values = _round_half_even(values, metric.decimals)
+        if metric.decimals == 0:
+            values = (pd.array(values, dtype = "Int64") if np.isnan(values).any()
+                      else values.astype(np.int64))
+        adjusted[name] = pd.Series(values, index = dataset.index)
+    return dataset.assign(**adjusted)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+One pass EDA of teams stats files larger than memory.
+
+eda() needs the whole file in a DataFrame, and its data_unique and
+data_category_count metrics keep every distinct value of every column. The
+streaming EDA reads the file in chunks of lines and keeps a StreamingSummary
+per chunk:
+
+- RunningStatistics for the exact counts, missing values, minimum, maximum,
+  mean, variance and pairwise correlations, with quantile sketches whose
+  counts are bucketed past max_values distinct values;
+- a HyperLogLog sketch of the distinct values of every column;
+- TopK counters of the most frequent values of the text columns.
+
+The memory depends on the chunk size and the sketch sizes, not on the rows.
+Summaries of different chunks merge, so the chunks can be summarized on
+several processes, each reading its own byte range of the file. The summary
+writes the Descriptive_Statistics_Table, Missing_Values_Table and
+Correlation_Matrix_Table of the full EDA; on the real file, whose columns have
+few distinct values, they are the same up to the rounding of the last digits of
+the correlations.
+
+Lines are split at line breaks, so quoted values must not hold line breaks,
+which is the case of the teams stats files.
+
+Run from the repository root:
+    big5-leagues eda "path/to/large teams stats.csv" --workers 4
+"""
+
+# Import libraries
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.incremental import DEFAULT_TABLES_DIRECTORY, RunningStatistics, write_eda_tables
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH, read_teams_stats
+from big5_leagues.sketches import DEFAULT_CAPACITY, DEFAULT_PRECISION, HyperLogLog, TopK
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 ** 2
+DEFAULT_MAX_VALUES = 4096
+
+
+class StreamingSummary:
+    """
+    Mergeable summary of chunks of a dataset with the columns of its first chunk.
+
+    Parameters
+    ----------
+    columns : Iterable[str]
+        Columns of the dataset.
+    numeric_columns : Iterable[str]
+        Columns with the statistics of describe() and corr().
+    shift : np.ndarray, optional
+        Reference value of every numeric column, see RunningStatistics.
+    max_values : int, optional
+        Distinct values of a numeric column counted exactly for its quantiles.
+        The default is DEFAULT_MAX_VALUES.
+    precision : int, optional
+        Precision of the distinct count sketches. The default is
+        DEFAULT_PRECISION.
+    capacity : int, optional
+        Counters of the most frequent values of every text column. The default
+        is DEFAULT_CAPACITY.
+
+    """
+
+    def __init__(self, columns: Iterable[str], numeric_columns: Iterable[str],
+                 shift: Optional[np.ndarray] = None, max_values: Optional[int] = DEFAULT_MAX_VALUES,
+                 precision: int = DEFAULT_PRECISION, capacity: int = DEFAULT_CAPACITY):
+        self.statistics = RunningStatistics(columns, numeric_columns, shift, max_values)
+        self.distinct = {column: HyperLogLog(precision) for column in self.statistics.columns}
+        self.top = {column: TopK(capacity) for column in self.statistics.columns
+                    if column not in set(self.statistics.numeric_columns)}
+
+    @classmethod
+    def like(cls, other: "StreamingSummary") -> "StreamingSummary":
+        """Empty summary that merges with other."""
+        statistics = other.statistics
+        return cls(statistics.columns, statistics.numeric_columns, statistics.shift, statistics.max_values,
+                   next(iter(other.distinct.values())).precision if other.distinct else DEFAULT_PRECISION,
+                   next(iter(other.top.values())).capacity if other.top else DEFAULT_CAPACITY)
+
+    def update(self, dataset: pd.DataFrame) -> "StreamingSummary":
+        """Add the rows of a chunk."""
+        self.statistics.update(dataset)
+        for column, sketch in self.distinct.items():
+            sketch.update(dataset[column])
+        for column, counters in self.top.items():
+            counters.update(dataset[column])
+        return self
+
+    def merge(self, other: "StreamingSummary") -> "StreamingSummary":
+        """Add the summary of other rows."""
+        self.statistics.merge(other.statistics)
+        for column, sketch in self.distinct.items():
+            sketch.merge(other.distinct[column])
+        for column, counters in self.top.items():
+            counters.merge(other.top[column])
+        return self
+
+    # Tables
+    def descriptive_stats(self) -> pd.DataFrame:
+        """Table of describe() on the numeric columns, quantiles from the sketches."""
+        return self.statistics.descriptive_stats()
+
+    def count_null_series(self) -> pd.Series:
+        """Missing values of every column."""
+        return self.statistics.count_null_series()
+
+    def correlation_matrix(self) -> pd.DataFrame:
+        """Table of corr() with pairwise complete rows."""
+        return self.statistics.correlation_matrix()
+
+    def distinct_count(self) -> pd.Series:
+        """Estimated distinct values of every column, as nunique()."""
+        return pd.Series({column: sketch.estimate() for column, sketch in self.distinct.items()})
+
+    def category_count(self, limit: Optional[int] = None) -> Dict[str, pd.Series]:
+        """Most frequent values of every text column, as value_counts()."""
+        return {column: counters.value_counts(limit) for column, counters in self.top.items()}
+
+
+def chunk_ranges(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Split a CSV file into byte ranges of whole lines.
+
+    Parameters
+    ----------
+    path : str
+        CSV file with a header line.
+    chunk_bytes : int, optional
+        Approximate size of every range. The default is DEFAULT_CHUNK_BYTES.
+
+    Returns
+    -------
+    Tuple[bytes, List[Tuple[int, int]]]
+        The header line and the (start, end) offsets of the ranges after it.
+
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        header = file.readline()
+        ranges = []
+        start = file.tell()
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            # Up to the end of the line the range would end in
+            file.readline()
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def read_range(path: str, header: bytes, start: int, end: int,
+               columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Rows of a byte range of a CSV file, with the ingestion schema."""
+    with open(path, "rb") as file:
+        file.seek(start)
+        lines = file.read(end - start)
+    return read_teams_stats(io.BytesIO(header + lines), columns)
+
+
+def _summarize_range(path: str, header: bytes, start: int, end: int,
+                     empty: StreamingSummary) -> StreamingSummary:
+    # Task of a worker: the summary of one range, from an empty summary with the merge settings
+    return empty.update(read_range(path, header, start, end, empty.statistics.columns))
+
+
+def stream_eda(path: str = DEFAULT_DATASET_PATH,
+               chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+               workers: int = 1,
+               max_values: Optional[int] = DEFAULT_MAX_VALUES,
+               precision: int = DEFAULT_PRECISION,
+               capacity: int = DEFAULT_CAPACITY) -> StreamingSummary:
+    """
+    Summarize a teams stats file chunk by chunk.
+
+    Parameters
+    ----------
+    path : str, optional
+        CSV file. The default is DEFAULT_DATASET_PATH.
+    chunk_bytes : int, optional
+        Size of the chunks read at once. The default is DEFAULT_CHUNK_BYTES.
+    workers : int, optional
+        Processes summarizing the chunks after the first. The chunks are
+        submitted in windows of 2 * workers: each process reads one chunk at
+        a time and at most 2 * workers summaries wait to be merged. The
+        default is 1.
+    max_values, precision, capacity : optional
+        Sketch sizes, see StreamingSummary.
+
+    Returns
+    -------
+    StreamingSummary
+        The summary of every row of the file.
+
+    """
+    header, ranges = chunk_ranges(path, chunk_bytes)
+    if not ranges:
+        ranges = [(len(header), len(header))]
+    # The first chunk fixes the columns and the shift of the sums of every summary
+    first = read_range(path, header, *ranges[0])
+    numeric = first.select_dtypes("number")
+    summary = StreamingSummary(first.columns, numeric.columns, numeric.mean().fillna(0).to_numpy(dtype = float),
+                               max_values, precision, capacity)
+    summary.update(first)
+    del first, numeric
+    if workers == 1:
+        for start, end in ranges[1:]:
+            summary.merge(_summarize_range(path, header, start, end, StreamingSummary.like(summary)))
+        return summary
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        # Submitted in windows of 2 * workers chunks, merged before the next window
+        for window in range(1, len(ranges), 2 * workers):
+            futures = [pool.submit(_summarize_range, path, header, start, end, StreamingSummary.like(summary))
+                       for start, end in ranges[window:window + 2 * workers]]
+            for future in futures:
+                summary.merge(future.result())
+    return summary
+
+
+def write_streaming_tables(summary: StreamingSummary, tables_directory: str = DEFAULT_TABLES_DIRECTORY):
+    """Write the Descriptive_Statistics_Table, Missing_Values_Table and Correlation_Matrix_Table."""
+    write_eda_tables(summary.statistics, tables_directory)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic team season tables with the schema of the Big 5 teams stats file.
+
+The generator builds whole league seasons: every team gets a strength, its
+results, goals and shots follow from it, the table is ranked by points and the
+notes mark the European places and the relegated teams. Beyond the five real
+leagues, extra synthetic leagues and older seasons are added until the
+requested number of rows is reached, so tables from 10^3 to 10^7 rows are
+generated with whole-array operations.
+
+generate_fixtures() plays the same league seasons match by match, as a double
+round robin, for the match-level ingestion of big5_leagues.fixtures.
+"""
+
+# Import libraries
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from big5_leagues.ingestion import COLUMNS, SCHEMA
+
+LEAGUES = {"Premier League": 20,
+           "La Liga": 20,
+           "Serie A": 20,
+           "Fußball-Bundesliga": 18,
+           "Ligue 1": 20,
+           }
+FIRST_SEASON = 2010
+SEASONS_PER_LEAGUE = 60
+CLUBS_PER_LEAGUE = 32
+
+# Share of missing values per column, close to the Big 5 teams stats file
+DEFAULT_NULL_RATES = {"cards_yellow": 0.086,
+                      "cards_red": 0.086,
+                      "games_complete": 0.853,
+                      "unused_subs": 0.364,
+                      }
+
+NOTES = {"champions_league": "→ UEFA Champions League via league finish",
+         "europa_league": "→ UEFA Europa League via league finish",
+         "relegated": "Relegated",
+         }
+
+
+def _league_seasons(rows: int) -> pd.DataFrame:
+    # The real leagues first, then blocks of synthetic 20 team leagues. Every league
+    # plays the 2010-2011 to 2020-2021 seasons and then goes back in time.
+    season_starts = [FIRST_SEASON + season if season <= 10 else FIRST_SEASON + 10 - season
+                     for season in range(SEASONS_PER_LEAGUE)]
+    league_seasons = []
+    total = 0
+    block = 0
+    while total < rows:
+        leagues = (list(LEAGUES.items()) if block == 0 else
+                   [(f"Synthetic League {block * len(LEAGUES) + index + 1}", 20)
+                    for index in range(len(LEAGUES))])
+        for start in season_starts:
+            for competition, teams in leagues:
+                league_seasons.append((competition, f"{start}-{start + 1}", teams))
+                total += teams
+            if total >= rows:
+                break
+        block += 1
+    return pd.DataFrame(league_seasons, columns = ["competition", "season", "teams"])
+
+
+def generate_teams_stats(rows: int, null_rates: Optional[Mapping[str, float]] = None,
+                         seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic team season table.
+
+    Parameters
+    ----------
+    rows : int
+        Number of rows to generate. Whole league seasons are generated and the
+        last one is cut to the requested size.
+    null_rates : Mapping[str, float], optional
+        Share of missing values per column. The default is None, which uses
+        DEFAULT_NULL_RATES.
+    seed : int, optional
+        Seed of the random generator. The default is 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        Team season statistics with the columns of the Big 5 teams stats file
+        and the dtypes of the ingestion SCHEMA.
+
+    """
+    rng = np.random.default_rng(seed)
+    null_rates = DEFAULT_NULL_RATES if null_rates is None else null_rates
+    league_seasons = _league_seasons(rows)
+    teams = league_seasons["teams"].to_numpy()
+    group = np.repeat(np.arange(len(league_seasons)), teams)
+    size = len(group)
+
+    # Team of every row: a different subset of the league's clubs each season
+    first_row = np.concatenate([[0], np.cumsum(teams)[:-1]])
+    position = np.arange(size) - first_row[group]
+    clubs = np.argsort(rng.random((len(league_seasons), CLUBS_PER_LEAGUE)), axis = 1)
+    club = clubs[group, position]
+    # Text columns are built from the codes of the few league seasons, never from row strings
+    competitions = pd.Categorical(league_seasons["competition"])
+    seasons = pd.Categorical(league_seasons["season"])
+    competition = pd.Categorical.from_codes(competitions.codes[group], competitions.categories)
+    # Club names are unique per league
+    squad = pd.Categorical.from_codes(competition.codes.astype(np.int64) * CLUBS_PER_LEAGUE + club,
+                                      [f"{league} Club {index + 1}" for league in competition.categories
+                                       for index in range(CLUBS_PER_LEAGUE)])
+
+    # Results follow from the team strength
+    strength = rng.normal(0, 1, size)
+    games = 2 * (teams[group] - 1)
+    shortened = rng.random(len(league_seasons)) < 0.01
+    games = np.where(shortened[group], np.round(games * 0.75).astype(int), games)
+    win = 1 / (1 + np.exp(-0.9 * strength)) * 0.75
+    draw = np.full(size, 0.25)
+    results = rng.multinomial(games, np.column_stack([win, draw, 1 - win - draw]))
+    wins, draws, losses = results.T
+    goals_for = rng.poisson(games * np.exp(0.3 + 0.25 * strength))
+    goals_against = rng.poisson(games * np.exp(0.3 - 0.2 * strength))
+    points = 3 * wins + draws
+
+    # Rank inside every league season by points, then goal difference, then goals scored,
+    # sorting once on a single packed key
+    key = group.astype(np.int64) << 30
+    key += (1023 - np.clip(points, 0, 1023)) << 20
+    key += (511 - np.clip(goals_for - goals_against, -512, 511)) << 10
+    key += 1023 - np.clip(goals_for, 0, 1023)
+    order = np.argsort(key)
+    rank = np.empty(size, dtype = np.int64)
+    rank[order] = np.arange(size) - first_row[group[order]] + 1
+    notes = np.full(size, -1, dtype = np.int8)
+    notes[rank <= 4] = 0
+    notes[rank == 5] = 1
+    notes[rank > teams[group] - 3] = 2
+
+    shots_on_target = goals_for * 3 + rng.poisson(games)
+    shots_on_target_against = goals_against * 3 + rng.poisson(games)
+    pens_att = rng.poisson(5.5, size)
+    columns = {
+        "competition": competition,
+        "season": pd.Categorical.from_codes(seasons.codes[group], seasons.categories),
+        "rank": rank,
+        "squad": squad,
+        "games": games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "goals_for": goals_for,
+        "goals_against": goals_against,
+        "goal_diff": goals_for - goals_against,
+        "points": points,
+        "notes": pd.Categorical.from_codes(notes, list(NOTES.values())),
+        "players_used": rng.integers(19, 43, size),
+        "assists": rng.binomial(goals_for, 0.67),
+        "pens_made": rng.binomial(pens_att, 0.78),
+        "pens_att": pens_att,
+        "cards_yellow": rng.poisson(1.6 * games),
+        "cards_red": rng.poisson(0.07 * games),
+        "shots_on_target_against": shots_on_target_against,
+        "saves": shots_on_target_against - goals_against,
+        "clean_sheets": rng.binomial(games, 1 / (1 + np.exp(1.1 - 0.5 * strength))),
+        "shots_on_target": shots_on_target,
+        "games_starts": games * 11,
+        "games_complete": (games * 11 * rng.uniform(0.6, 0.8, size)).round(),
+        "games_subs": games * 3 - rng.poisson(games / 3),
+        "unused_subs": (games * rng.uniform(3, 9, size)).round(),
+        "points_per_match": np.round(points / games, 2),
+    }
+
+    # Counts use the small nullable integers of the ingestion schema, like read_teams_stats()
+    dataset = {}
+    for column in COLUMNS:
+        values = columns[column]
+        missing = rng.random(size) < null_rates.get(column, 0)
+        dtype = SCHEMA[column]
+        if dtype.startswith("Int"):
+            values = pd.arrays.IntegerArray(values.astype(dtype.lower()), missing)
+        elif dtype == "float64":
+            values = np.where(missing, np.nan, values)
+        dataset[column] = values[:rows]
+    return pd.DataFrame(dataset)
+
+
+def generate_fixtures(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate synthetic fixtures, one row per match.
+
+    Parameters
+    ----------
+    rows : int
+        Number of matches to generate. Whole league seasons, where every team
+        plays every other team home and away, are generated and the last one is
+        cut to the requested size.
+    seed : int, optional
+        Seed of the random generator. The default is 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        The competition, season, home_team and away_team of every match, with
+        the home_ and away_ goals, cards_yellow, cards_red, shots_on_target,
+        pens_made and pens_att.
+
+    """
+    rng = np.random.default_rng(seed)
+    # A team plays at least 17 home matches a season
+    league_seasons = _league_seasons(-(-rows // 17))
+    teams = league_seasons["teams"].to_numpy()
+    matches = teams * (teams - 1)
+    group = np.repeat(np.arange(len(league_seasons)), matches)
+    size = len(group)
+
+    # Home and away positions of every match of a league season, built once per league size
+    first_match = np.concatenate([[0], np.cumsum(matches)[:-1]])
+    home = np.empty(size, dtype = np.int64)
+    away = np.empty(size, dtype = np.int64)
+    for count in np.unique(teams):
+        positions = np.array([(i, j) for i in range(count) for j in range(count) if i != j])
+        rows_of_size = np.flatnonzero(teams[group] == count)
+        match = rows_of_size - first_match[group[rows_of_size]]
+        home[rows_of_size], away[rows_of_size] = positions[match].T
+
+    # Club and strength of every position of a league season
+    clubs = np.argsort(rng.random((len(league_seasons), CLUBS_PER_LEAGUE)), axis = 1)
+    strength = rng.normal(0, 1, (len(league_seasons), CLUBS_PER_LEAGUE))
+    competitions = pd.Categorical(league_seasons["competition"])
+    seasons = pd.Categorical(league_seasons["season"])
+    names = [f"{league} Club {index + 1}" for league in competitions.categories
+             for index in range(CLUBS_PER_LEAGUE)]
+    league_code = competitions.codes.astype(np.int64)[group]
+    home_club, away_club = clubs[group, home], clubs[group, away]
+    home_strength, away_strength = strength[group, home], strength[group, away]
+
+    home_goals = rng.poisson(np.exp(0.35 + 0.25 * home_strength - 0.2 * away_strength))
+    away_goals = rng.poisson(np.exp(0.1 + 0.25 * away_strength - 0.2 * home_strength))
+    columns = {"competition": pd.Categorical.from_codes(league_code, competitions.categories),
+               "season": pd.Categorical.from_codes(seasons.codes[group], seasons.categories),
+               "home_team": pd.Categorical.from_codes(league_code * CLUBS_PER_LEAGUE + home_club, names),
+               "away_team": pd.Categorical.from_codes(league_code * CLUBS_PER_LEAGUE + away_club, names),
+               "home_goals": home_goals,
+               "away_goals": away_goals,
+               }
+    for side, goals in (("home", home_goals), ("away", away_goals)):
+        pens_att = rng.poisson(0.15, size)
+        columns[f"{side}_cards_yellow"] = rng.poisson(1.6, size)
+        columns[f"{side}_cards_red"] = rng.poisson(0.07, size)
+        columns[f"{side}_shots_on_target"] = goals + rng.poisson(3, size)
+        columns[f"{side}_pens_made"] = rng.binomial(pens_att, 0.78)
+        columns[f"{side}_pens_att"] = pens_att
+    return pd.DataFrame({column: values[:rows] for column, values in columns.items()})
+
+
+def write_teams_stats(dataset: pd.DataFrame, path: str):
+    """Write a generated table as CSV in the format of the source file ("+41" goal differences)."""
+    goal_diff = dataset["goal_diff"].map("{:+d}".format)
+    dataset.assign(goal_diff = goal_diff.where(dataset["goal_diff"] != 0, "0")).to_csv(path, index = False)
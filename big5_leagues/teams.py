@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical team names and IDs.
+
+Sources spell the same club differently: the dataset has Paris S-G,
+M'Gladbach and Eint Frankfurt where other sites write Paris Saint-Germain,
+Borussia Mönchengladbach or Eintracht Frankfurt. An alias table maps every
+known spelling to a canonical team ID and name, one row per alias:
+    team_id,canonical,alias
+    paris-sg,Paris SG,Paris S-G
+    paris-sg,Paris SG,Paris Saint-Germain
+A spelling is looked up as written first, then by its normalized form
+(accents, case and punctuation removed), so "Saint Etienne" finds
+Saint-Étienne. Adding a spelling only means adding a row to the table.
+
+The squad column holds few distinct names, so the lookup runs once per
+category and the rows only get new codes. Names missing from the table keep
+their spelling and get no team ID; suggest() ranks the known teams by the
+character trigrams their normalized aliases share with the name, from an
+inverted index built once with the table, to help extend it when a new
+source is merged.
+"""
+
+# Import libraries
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ALIASES_PATH = "datasets/Team_Aliases.csv"
+ALIAS_COLUMNS = ["team_id", "canonical", "alias"]
+SUGGESTIONS = 3
+
+
+def normalize_name(name: str) -> str:
+    """Lower case words of a team name without accents or punctuation, "&" as "and"."""
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    name = name.casefold().replace("&", " and ")
+    return " ".join(re.findall(r"[a-z0-9]+", name))
+
+
+def _trigrams(normalized: str) -> set:
+    # Character trigrams of every word, padded so that short words and word starts count
+    return {word[position:position + 3] for word in (f"  {word} " for word in normalized.split())
+            for position in range(len(word) - 2)}
+
+
+class TeamIndex:
+    """
+    Alias table of the team names with an index of the normalized aliases.
+
+    Parameters
+    ----------
+    aliases : pd.DataFrame
+        One row per spelling with the team_id, canonical and alias columns.
+        Every team ID has one canonical name, which should also be listed as
+        an alias.
+
+    """
+
+    def __init__(self, aliases: pd.DataFrame):
+        missing = set(ALIAS_COLUMNS) - set(aliases.columns)
+        if missing:
+            raise ValueError(f"The alias table has no {sorted(missing)} columns")
+        aliases = aliases[ALIAS_COLUMNS].astype(str)
+        canonical = aliases.drop_duplicates(["team_id", "canonical"])
+        duplicated = canonical["team_id"].duplicated(keep = False)
+        if duplicated.any():
+            raise ValueError(f"Team IDs with several canonical names: "
+                             f"{sorted(set(canonical.loc[duplicated, 'team_id']))}")
+        self.canonical = dict(zip(canonical["team_id"], canonical["canonical"]))
+        # Every canonical name is an alias of its team
+        aliases = pd.concat([canonical.assign(alias = canonical["canonical"]), aliases],
+                            ignore_index = True).drop_duplicates()
+        aliases = aliases.assign(normalized = aliases["alias"].map(normalize_name))
+        for column in ("alias", "normalized"):
+            teams = aliases.drop_duplicates([column, "team_id"])
+            ambiguous = teams[column].duplicated(keep = False)
+            if ambiguous.any():
+                raise ValueError(f"Aliases of several teams: {sorted(set(teams.loc[ambiguous, column]))}")
+        self.aliases = aliases.reset_index(drop = True)
+        self._by_alias = dict(zip(aliases["alias"], aliases["team_id"]))
+        self._by_normalized = dict(zip(aliases["normalized"], aliases["team_id"]))
+
+        # Inverted index: trigram -> positions of the normalized aliases containing it
+        self._normalized = aliases.drop_duplicates("normalized")
+        self._sizes = []
+        self._postings = defaultdict(list)
+        for position, normalized in enumerate(self._normalized["normalized"]):
+            trigrams = _trigrams(normalized)
+            self._sizes.append(len(trigrams))
+            for trigram in trigrams:
+                self._postings[trigram].append(position)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_ALIASES_PATH) -> "TeamIndex":
+        """Read the alias table from a CSV file with the team_id, canonical and alias columns."""
+        return cls(pd.read_csv(path, dtype = str, encoding = "utf-8", keep_default_na = False))
+
+    def team_id(self, name: str) -> Optional[str]:
+        """ID of the team spelled name, None when unknown."""
+        team_id = self._by_alias.get(name)
+        if team_id is None:
+            team_id = self._by_normalized.get(normalize_name(name))
+        return team_id
+
+    def unknown(self, names: Iterable[str]) -> List[str]:
+        """The distinct names, in order, that are not in the alias table."""
+        return [name for name in dict.fromkeys(names) if pd.notna(name) and self.team_id(name) is None]
+
+    def suggest(self, name: str, limit: int = SUGGESTIONS) -> List[Tuple[str, str, float]]:
+        """
+        Known teams whose aliases look most like a name.
+
+        Parameters
+        ----------
+        name : str
+            Spelling to match, typically one returned by unknown().
+        limit : int, optional
+            Maximum number of teams returned. The default is SUGGESTIONS.
+
+        Returns
+        -------
+        List[Tuple[str, str, float]]
+            (team_id, canonical name, score) of the best matching teams, the
+            score being the Jaccard similarity of the trigrams of the name and
+            of the closest alias of the team, best first.
+
+        """
+        trigrams = _trigrams(normalize_name(name))
+        shared = Counter(position for trigram in trigrams for position in self._postings.get(trigram, ()))
+        best = {}
+        team_ids = self._normalized["team_id"].to_numpy()
+        for position, count in shared.items():
+            score = count / (len(trigrams) + self._sizes[position] - count)
+            team_id = team_ids[position]
+            best[team_id] = max(score, best.get(team_id, 0.0))
+        ranked = sorted(best.items(), key = lambda item: (-item[1], item[0]))[:limit]
+        return [(team_id, self.canonical[team_id], round(score, 3)) for team_id, score in ranked]
+
+    def canonicalize(self, squad: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Canonical names and team IDs of a squad column.
+
+        Parameters
+        ----------
+        squad : pd.Series
+            Team names, categorical or text.
+
+        Returns
+        -------
+        Tuple[pd.Series, pd.Series]
+            The canonical names, with the dtype of squad, and the team IDs,
+            missing for the names not in the alias table. A categorical squad
+            gives categorical results built from its categories only.
+
+        """
+        categorical = squad if isinstance(squad.dtype, pd.CategoricalDtype) else squad.astype("category")
+        categories = categorical.cat.categories
+        team_ids = [self.team_id(name) for name in categories]
+        names = [name if team_id is None else self.canonical[team_id]
+                 for name, team_id in zip(categories, team_ids)]
+        # Spellings of the same team merge into one category
+        name_codes, canonical_names = pd.factorize(pd.Index(names, dtype = categories.dtype))
+        codes = categorical.cat.codes.to_numpy()
+        row_codes = np.where(codes >= 0, name_codes[codes], -1)
+        name_ids = dict(zip(names, team_ids))
+        id_codes, distinct_ids = pd.factorize(pd.Index([name_ids[name] for name in canonical_names],
+                                                       dtype = object))
+        distinct_ids = distinct_ids.astype(categories.dtype)
+        canonical = pd.Series(pd.Categorical.from_codes(row_codes, canonical_names), index = squad.index,
+                              name = squad.name)
+        team_id = pd.Series(pd.Categorical.from_codes(np.where(row_codes >= 0, id_codes[row_codes], -1),
+                                                      distinct_ids),
+                            index = squad.index, name = "team_id")
+        if categorical is not squad:
+            return canonical.astype(squad.dtype), team_id.astype(squad.dtype)
+        return canonical, team_id
+
+    def report_unknown(self, names: Iterable[str], limit: int = SUGGESTIONS) -> Dict[str, list]:
+        """Suggestions for every name not in the alias table."""
+        return {name: self.suggest(name, limit) for name in self.unknown(names)}
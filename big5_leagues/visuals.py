@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Headless rendering of the EDA visuals to files.
+
+eda(graphs=True) shows a histogram of every column, the correlation heatmap and
+a pairplot of every numeric column. To produce the same visuals in batch jobs:
+
+- figures are drawn on the non-interactive Agg backend and saved to files;
+- the figures are rendered in parallel worker processes;
+- only small aggregates are sent to the workers. Histograms are counted on the
+  whole dataset in this process. Above max_rows, the pairplot uses a random
+  sample of the rows or, with pairplot_mode="histogram", 2D histograms
+  counted on every row;
+- the caller chooses the pairplot columns, since the pairplot grows with the
+  square of their number.
+
+The plotting libraries are only imported when a figure is rendered.
+"""
+
+# Import libraries
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_ROWS = 10000
+HISTOGRAM_BINS = 10
+PAIRPLOT_BINS = 30
+# Above this number of columns the heatmap cells are too small for the values
+MAX_ANNOTATED_COLUMNS = 25
+PAIRPLOT_MODES = ("sample", "histogram")
+
+
+def _use_agg():
+    # Figures are only saved, never shown, so an interactive backend already loaded
+    # in this process is left alone
+    import matplotlib
+
+    if "matplotlib.pyplot" not in sys.modules:
+        matplotlib.use("Agg")
+
+
+def _bin_codes(values: np.ndarray, bins: int):
+    # Bin number of every value, -1 where missing, and the bin edges
+    present = ~np.isnan(values)
+    if not present.any():
+        return np.full(len(values), -1), np.linspace(0, 1, bins + 1)
+    edges = np.histogram_bin_edges(values[present], bins = bins)
+    codes = np.clip(np.searchsorted(edges, values, side = "right") - 1, 0, bins - 1)
+    return np.where(present, codes, -1), edges
+
+
+def histogram_counts(numeric: pd.DataFrame, bins: int = HISTOGRAM_BINS) -> Dict[str, tuple]:
+    """Counts and bin edges of every column, as drawn by DataFrame.hist()."""
+    counts = {}
+    for column in numeric.columns:
+        codes, edges = _bin_codes(numeric[column].to_numpy(dtype = float, na_value = np.nan), bins)
+        counts[column] = (np.bincount(codes[codes >= 0], minlength = bins), edges)
+    return counts
+
+
+def pair_histograms(numeric: pd.DataFrame, bins: int = PAIRPLOT_BINS) -> Dict[tuple, tuple]:
+    """
+    2D histograms of every pair of columns over the rows where both are present.
+
+    Every column is binned once; a pair is then counted with a single bincount
+    of the combined bin numbers.
+    """
+    binned = {column: _bin_codes(numeric[column].to_numpy(dtype = float, na_value = np.nan), bins)
+              for column in numeric.columns}
+    histograms = {}
+    for x in numeric.columns:
+        for y in numeric.columns:
+            (x_codes, x_edges), (y_codes, y_edges) = binned[x], binned[y]
+            present = (x_codes >= 0) & (y_codes >= 0)
+            counts = np.bincount(x_codes[present] * bins + y_codes[present], minlength = bins * bins)
+            histograms[x, y] = (counts.reshape(bins, bins), x_edges, y_edges)
+    return histograms
+
+
+# Figures, drawn in the worker processes (in this process with 1 worker)
+def _draw_histograms(counts: Dict[str, tuple], path: str):
+    import matplotlib.pyplot as plt
+
+    columns = math.ceil(math.sqrt(len(counts)))
+    rows = math.ceil(len(counts) / columns)
+    figure, axes = plt.subplots(rows, columns, figsize = (25, 20), squeeze = False)
+    for ax, (column, (column_counts, edges)) in zip(axes.flat, counts.items()):
+        ax.stairs(column_counts, edges, fill = True)
+        ax.set_title(column)
+        ax.grid(True)
+    for ax in axes.flat[len(counts):]:
+        ax.set_visible(False)
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def _draw_heatmap(correlation_matrix: pd.DataFrame, path: str):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    figure = plt.figure(figsize = (15, 10))
+    sns.heatmap(correlation_matrix, annot = len(correlation_matrix) <= MAX_ANNOTATED_COLUMNS,
+                cmap = 'coolwarm')
+    figure.savefig(path, bbox_inches = "tight")
+    plt.close(figure)
+
+
+def _draw_pairplot(data: pd.DataFrame, path: str):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    grid = sns.pairplot(data) # Graph of correlation across each numerical feature
+    grid.figure.savefig(path)
+    plt.close(grid.figure)
+
+
+def _draw_pair_histograms(histograms: Dict[tuple, tuple], columns: list, path: str):
+    import matplotlib.pyplot as plt
+
+    size = len(columns)
+    figure, axes = plt.subplots(size, size, figsize = (2.5 * size, 2.5 * size), squeeze = False)
+    for row, y in enumerate(columns):
+        for position, x in enumerate(columns):
+            ax = axes[row, position]
+            counts, x_edges, y_edges = histograms[x, y]
+            if x == y:
+                ax.stairs(counts.sum(axis = 1), x_edges, fill = True)
+            else:
+                ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap = "viridis")
+            if row == size - 1:
+                ax.set_xlabel(x)
+            if position == 0:
+                ax.set_ylabel(y)
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def render_eda_figures(dataset: pd.DataFrame, directory: str,
+                       pairplot_columns: Optional[Iterable[str]] = None,
+                       correlation_matrix: Optional[pd.DataFrame] = None,
+                       max_rows: int = DEFAULT_MAX_ROWS,
+                       pairplot_mode: str = "sample",
+                       workers: Optional[int] = None,
+                       file_format: str = "png",
+                       seed: int = 0) -> Dict[str, str]:
+    """
+    Render the EDA visuals to files on the Agg backend.
+
+    Parameters
+    ----------
+    dataset : pd.DataFrame
+        Dataset to draw.
+    directory : str
+        Directory the figures are written to, created if missing.
+    pairplot_columns : Iterable[str], optional
+        Numeric columns of the pairplot. The default is None, which uses every
+        numeric column as eda() does.
+    correlation_matrix : pd.DataFrame, optional
+        Correlation matrix already computed by eda(). The default is None, which
+        computes it.
+    max_rows : int, optional
+        Above this number of rows the pairplot is not drawn from every row. The
+        default is DEFAULT_MAX_ROWS.
+    pairplot_mode : str, optional
+        "sample" draws the pairplot from max_rows random rows, "histogram"
+        draws 2D histograms of every row. The default is "sample".
+    workers : int, optional
+        Number of processes the figures are rendered on. The default is None,
+        which uses one process per figure. With 1 worker the figures are
+        rendered in this process.
+    file_format : str, optional
+        Image format passed to savefig(). The default is "png".
+    seed : int, optional
+        Seed of the pairplot row sample. The default is 0.
+
+    Returns
+    -------
+    Dict[str, str]
+        Path of every figure by name: histograms, correlation_heatmap, pairplot.
+
+    """
+    if pairplot_mode not in PAIRPLOT_MODES:
+        raise ValueError(f"pairplot_mode must be one of {PAIRPLOT_MODES}")
+    numeric = dataset.select_dtypes("number")
+    columns = list(numeric.columns if pairplot_columns is None else pairplot_columns)
+    missing = set(columns) - set(numeric.columns)
+    if missing:
+        raise KeyError(f"Pairplot columns are not numeric columns of the dataset: {sorted(missing)}")
+    if correlation_matrix is None:
+        correlation_matrix = numeric.corr()
+
+    os.makedirs(directory, exist_ok = True)
+    paths = {name: os.path.join(directory, f"{name}.{file_format}")
+             for name in ("histograms", "correlation_heatmap", "pairplot")}
+    tasks = [(_draw_histograms, histogram_counts(numeric), paths["histograms"]),
+             (_draw_heatmap, correlation_matrix, paths["correlation_heatmap"])]
+    if len(numeric) > max_rows and pairplot_mode == "histogram":
+        tasks.append((_draw_pair_histograms, pair_histograms(numeric[columns]), columns, paths["pairplot"]))
+    elif len(numeric) > max_rows:
+        tasks.append((_draw_pairplot, numeric[columns].sample(max_rows, random_state = seed).astype(float),
+                      paths["pairplot"]))
+    else:
+        tasks.append((_draw_pairplot, numeric[columns].astype(float), paths["pairplot"]))
+
+    workers = workers or len(tasks)
+    if workers == 1:
+        _use_agg()
+        for function, *args in tasks:
+            function(*args)
+    else:
+        with ProcessPoolExecutor(max_workers = min(workers, len(tasks)), initializer = _use_agg) as pool:
+            for future in [pool.submit(function, *args) for function, *args in tasks]:
+                future.result()
+    return paths
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Row functions of the cleaning script before the vectorized stages, kept as the
+reference the equivalence tests compare the stages with.
+
+The flag functions are the FlashFootball if-chains the corrections table was
+extracted from, as they were in the script.
+"""
+
+# Import libraries
+import pandas as pd
+
+from benchmarks.benchmark_standardization import apply_path
+
+
+def champions_league(row):
+    team = row["squad"]
+    league = row["competition"]
+    season = row["season"]
+    if isinstance(row["notes"], str):
+        if "Champions" in row["notes"].split():
+            return "Yes"
+
+    if season == "2010-2011" and league == "Premier League" and team in ["Manchester Utd", "Chelsea", "Arsenal", "Manchester City"]:
+        return "Yes"
+    elif season == "2011-2012" and league == "Premier League" and team in ["Manchester City", "Manchester Utd", "Arsenal", "Chelsea"]:
+        return "Yes"
+    elif season == "2012-2013" and league == "Premier League" and team in ["Manchester Utd", 'Chelsea', "Arsenal", "Manchester City"]:
+        return "Yes"
+    elif season == "2013-2014" and league == "Premier League" and team in ["Manchester City", "Liverpool", "Chelsea", "Arsenal"]:
+        return "Yes"
+    elif season == "2014-2015" and league == "Premier League" and team in ["Manchester Utd", "Chelsea", "Arsenal", "Manchester City"]:
+        return "Yes"
+    elif season == "2015-2016" and league == "Premier League" and team in ["Leicester City", "Arsenal", "Tottenham", "Manchester City"]:
+        return "Yes"
+    elif season == "2016-2017" and league == "Premier League" and team in ["Chelsea", "Tottenham", "Manchester City", "Liverpool", "Manchester Utd"]:
+        return "Yes"
+    elif season == "2017-2018" and league == "Premier League" and team in ["Manchester City", "Manchester Utd", "Tottenham", "Liverpool"]:
+        return "Yes"
+    elif season == "2018-2019" and league == "Premier League" and team in ["Manchester City", "Liverpool", "Chelsea", "Tottenham"]:
+        return "Yes"
+    elif season == "2019-2020" and league == "Premier League" and team in ["Liverpool", "Manchester City", "Manchester Utd", "Chelsea"]:
+        return "Yes"
+    elif season == "2020-2021" and league == "Premier League" and team in ["Manchester City", "Manchester Utd", "Liverpool", "Chelsea"]:
+        return "Yes"
+    elif season == "2020-2021" and league == "La Liga" and team == "Villarreal":
+        return "Yes"
+    else:
+        return "No"
+
+
+def europa_league(row):
+    team = row["squad"]
+    league = row["competition"]
+    season = row["season"]
+    if isinstance(row["notes"], str):
+        if "Conference" in row["notes"].split():
+            return "No"
+        elif "Europa" in row["notes"].split():
+            return "Yes"
+
+    if season == "2010-2011" and league == "Premier League" and team in ["Tottenham", "Stoke City", "Fulham", "Birmingham City"]:
+        return "Yes"
+    elif season == "2011-2012" and league == "Premier League" and team in ["Tottenham", "Newcastle Utd", "Liverpool"]:
+        return "Yes"
+    elif season == "2012-2013" and league == "Premier League" and team in ["Tottenham", "Swansea City"]:
+        return "Yes"
+    elif season == "2013-2014" and league == "Premier League" and team in ["Everton", "Tottenham", "Hull City"]:
+        return "Yes"
+    elif season == "2014-2015" and league == "Premier League" and team in ["Tottenham", "Liverpool", "Southampton", "West Ham"]:
+        return "Yes"
+    elif season == "2015-2016" and league == "Premier League" and team in ["Manchester Utd", "Southampton", "West Ham"]:
+        return "Yes"
+    elif season == "2016-2017" and league == "Premier League" and team in ["Arsenal", "Everton"]:
+        return "Yes"
+    elif season == "2017-2018" and league == "Premier League" and team in ["Chelsea", "Arsenal", "Burnley"]:
+        return "Yes"
+    elif season == "2018-2019" and league == "Premier League" and team in ["Arsenal", "Manchester Utd", "Wolves"]:
+        return "Yes"
+    elif season == "2019-2020" and league == "Premier League" and team in ["Leicester City", "Arsenal", "Tottenham"]:
+        return "Yes"
+    elif season == "2020-2021" and league == "Premier League" and team in ["Leicester City", "West Ham", "Tottenham"]:
+        return "Yes"
+    elif season == "2011-2012" and league == "Ligue 1" and team == "Lyon":
+        return "Yes"
+    elif season == "2012-2013" and league == "Ligue 1" and team == "Saint-Étienne":
+        return "Yes"
+    elif season == "2013-2014" and league == "Ligue 1" and team in ["Lyon", "Guingamp"]:
+        return "Yes"
+    elif season == "2014-2015" and league == "Ligue 1" and team in ["Marseille", "Saint-Étienne"]:
+        return "Yes"
+    elif season == "2015-2016" and league == "Ligue 1" and team in ["Nice", "Lille"]:
+        return "Yes"
+    elif season == "2016-2017" and league == "Ligue 1" and team in ["Lyon", "Marseille"]:
+        return "Yes"
+    elif season == "2017-2018" and league == "Ligue 1" and team in ["Rennes", "Bordeaux"]:
+        return "Yes"
+    elif season == "2018-2019" and league == "Ligue 1" and team in ["Rennes", "Strasbourg"]:
+        return "Yes"
+    elif season == "2020-2021" and league == "Ligue 1" and team == "Marseille":
+        return "Yes"
+    elif season == "2011-2012" and league == "Fußball-Bundesliga" and team == "Leverkusen":
+        return "Yes"
+    elif season == "2012-2013" and league == "Fußball-Bundesliga" and team == "Freiburg":
+        return "Yes"
+    elif season == "2013-2014" and league == "Fußball-Bundesliga" and team == "Wolfsburg":
+        return "Yes"
+    elif season == "2014-2015" and league == "Fußball-Bundesliga" and team == "Schalke 04":
+        return "Yes"
+    elif season == "2015-2016" and league == "Fußball-Bundesliga" and team == "Mainz 05":
+        return "Yes"
+    elif season == "2016-2017" and league == "Fußball-Bundesliga" and team == "Hertha BSC":
+        return "Yes"
+    elif season == "2017-2018" and league == "Fußball-Bundesliga" and team == "Eint Frankfurt":
+        return "Yes"
+    elif season == "2018-2019" and league == "Fußball-Bundesliga" and team == "Wolfsburg":
+        return "Yes"
+    elif season == "2019-2020" and league == "Fußball-Bundesliga" and team == "Leverkusen":
+        return "Yes"
+    elif season == "2020-2021" and league == "Fußball-Bundesliga" and team == "Leverkusen":
+        return "Yes"
+    elif season == "2010-2011" and league == "Serie A" and team == "Roma":
+        return "Yes"
+    elif season == "2011-2012" and league == "Serie A" and team == "Napoli":
+        return "Yes"
+    elif season == "2013-2014" and league == "Serie A" and team == "Fiorentina":
+        return "Yes"
+    elif season == "2014-2015" and league == "Serie A" and team == "Napoli":
+        return "Yes"
+    elif season == "2015-2016" and league == "Serie A" and team == "Fiorentina":
+        return "Yes"
+    elif season == "2016-2017" and league == "Serie A" and team == "Lazio":
+        return "Yes"
+    elif season == "2017-2018" and league == "Serie A" and team == "Milan":
+        return "Yes"
+    elif season == "2018-2019" and league == "Serie A" and team == "Lazio":
+        return "Yes"
+    elif season == "2019-2020" and league == "Serie A" and team == "Napoli":
+        return "Yes"
+    elif season == "2020-2021" and league == "Serie A" and team == "Lazio":
+        return "Yes"
+    elif season == "2010-2011" and league == "La Liga" and team == "Athletic Club":
+        return "Yes"
+    elif season == "2012-2013" and league == "La Liga" and team == "Valencia":
+        return "Yes"
+    elif season == "2014-2015" and league == "La Liga" and team == "Villarreal":
+        return "Yes"
+    elif season == "2015-2016" and league == "La Liga" and team == "Celta Vigo":
+        return "Yes"
+    elif season == "2016-2017" and league == "La Liga" and team == "Real Sociedad":
+        return "Yes"
+    elif season == "2017-2018" and league == "La Liga" and team == "Betis":
+        return "Yes"
+    elif season == "2018-2019" and league == "La Liga" and team == "Sevilla":
+        return "Yes"
+    elif season == "2019-2020" and league == "La Liga" and team == "Villarreal":
+        return "Yes"
+    elif season == "2020-2021" and league == "La Liga" and team == "Betis":
+        return "Yes"
+    else:
+        return "No"
+
+
+def relegation(row):
+    team = row["squad"]
+    league = row["competition"]
+    season = row["season"]
+    if isinstance(row["notes"], str):
+        if "Relegated" in row["notes"].split():
+            return "Yes"
+
+    if season == "2010-2011" and league == "Premier League" and team in ["Birmingham City", "Blackpool", "West Ham"]:
+        return "Yes"
+    elif season == "2011-2012" and league == "Premier League" and team in ["Bolton", "Blackburn", "Wolves"]:
+        return "Yes"
+    elif season == "2012-2013" and league == "Premier League" and team in ["Wigan Athletic", "Reading", "QPR"]:
+        return "Yes"
+    elif season == "2013-2014" and league == "Premier League" and team in ["Norwich City", "Fulham", "Cardiff City"]:
+        return "Yes"
+    elif season == "2014-2015" and league == "Premier League" and team in ["Hull City", "Burnley", "QPR"]:
+        return "Yes"
+    elif season == "2015-2016" and league == "Premier League" and team in ["Newcastle Utd", "Norwich City", "Aston Villa"]:
+        return "Yes"
+    elif season == "2016-2017" and league == "Premier League" and team in ["Hull City", "Middlesbrough", "Sunderland"]:
+        return "Yes"
+    elif season == "2017-2018" and league == "Premier League" and team in ["Swansea City", "Stoke City", "West Brom"]:
+        return "Yes"
+    elif season == "2018-2019" and league == "Premier League" and team in ["Cardiff City", "Fulham", "Huddersfield"]:
+        return "Yes"
+    elif season == "2019-2020" and league == "Premier League" and team in ["Bournemouth", "Watford", "Norwich City"]:
+        return "Yes"
+    elif season == "2020-2021" and league == "Premier League" and team in ["Fulham", "West Brom", "Sheffield Utd"]:
+        return "Yes"
+    elif season == "2016-2017" and league == "Ligue 1" and team in ["Lorient", "Bastia"]:
+        return "Yes"
+    elif season == "2017-2018" and league == "Ligue 1" and team == "Toulouse":
+        return "Yes"
+    elif season == "2018-2019" and league == "Ligue 1" and team == "Dijon":
+        return "Yes"
+    elif season == "2020-2021" and league == "Ligue 1" and team == "Nantes":
+        return "Yes"
+    elif season == "2010-2011" and league == "Fußball-Bundesliga" and team == "M'Gladbach":
+        return "Yes"
+    elif season == "2011-2012" and league == "Fußball-Bundesliga" and team == "Hertha BSC":
+        return "Yes"
+    elif season == "2012-2013" and league == "Fußball-Bundesliga" and team == "Hoffenheim":
+        return "Yes"
+    elif season == "2013-2014" and league == "Fußball-Bundesliga" and team == "Hamburger SV":
+        return "Yes"
+    elif season == "2014-2015" and league == "Fußball-Bundesliga" and team == "Hamburger SV":
+        return "Yes"
+    elif season == "2015-2016" and league == "Fußball-Bundesliga" and team == "Eint Frankfurt":
+        return "Yes"
+    elif season == "2016-2017" and league == "Fußball-Bundesliga" and team == "Wolfsburg":
+        return "Yes"
+    elif season == "2017-2018" and league == "Fußball-Bundesliga" and team == "Wolfsburg":
+        return "Yes"
+    elif season == "2018-2019" and league == "Fußball-Bundesliga" and team == "Stuttgart":
+        return "Yes"
+    elif season == "2019-2020" and league == "Fußball-Bundesliga" and team == "Werder Bremen":
+        return "Yes"
+    elif season == "2020-2021" and league == "Fußball-Bundesliga" and team == "Köln":
+        return "Yes"
+    elif season == "2011-2012" and league == "Serie A" and team == "Lecce":
+        return "Yes"
+    elif season == "2012-2013" and league == "Serie A" and team == "Siena":
+        return "Yes"
+    elif season == "2014-2015" and league == "Serie A" and team == "Parma":
+        return "Yes"
+    elif season == "2018-2019" and league == "Serie A" and team == "Chievo":
+        return "Yes"
+    elif season == "2014-2015" and league == "La Liga" and team in ["Elche", "Almería"]:
+        return "Yes"
+    else:
+        return "No"
+
+
+def legacy_flags(dataset: pd.DataFrame) -> pd.DataFrame:
+    # The flag columns as the script computed them, row by row
+    return pd.DataFrame({"UEFA Champions League": dataset.apply(champions_league, axis = 1),
+                         "UEFA Europa League": dataset.apply(europa_league, axis = 1),
+                         "Relegation": dataset.apply(relegation, axis = 1),
+                         }, index = dataset.index)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Equivalence tests of the cleaning stages: the vectorized standardization
+against the row-wise apply path, the corrections table against the
+FlashFootball if-chains and the partitioned run against the serial one, on
+the shipped dataset and on a small synthetic frame.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import pandas as pd
+import pytest
+
+from big5_leagues.cleaning import clean_dataset
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH
+from big5_leagues.pipeline import STAGES, run_stages
+from big5_leagues.qualification import DEFAULT_CORRECTIONS_PATH, FLAG_COLUMNS, load_corrections
+from big5_leagues.standardization import standardize
+from big5_leagues.synthetic import generate_teams_stats, write_teams_stats
+from big5_leagues.teams import TeamIndex
+from tests.legacy import apply_path, legacy_flags
+
+CLEANING_STAGES = tuple(stage for stage in STAGES if stage.name in ("load", "standardize", "renames", "flags"))
+
+
+def _synthetic() -> pd.DataFrame:
+    # A few league seasons, the first rows keyed as corrections so that the table joins
+    dataset = generate_teams_stats(600, seed = 1)
+    corrections = pd.read_csv(DEFAULT_CORRECTIONS_PATH, dtype = str, encoding = "utf-8")
+    keys = corrections[["season", "competition", "squad"]].head(60)
+    dataset[keys.columns] = dataset[keys.columns].astype(str)
+    dataset.loc[:len(keys) - 1, keys.columns] = keys.to_numpy()
+    return dataset
+
+
+@pytest.fixture(scope = "module")
+def shipped() -> pd.DataFrame:
+    return pd.read_csv(DEFAULT_DATASET_PATH, encoding = "utf-8")
+
+
+@pytest.fixture(scope = "module")
+def synthetic() -> pd.DataFrame:
+    return _synthetic()
+
+
+@pytest.mark.parametrize("name", ["shipped", "synthetic"])
+def test_standardize_matches_apply(name, request):
+    dataset = request.getfixturevalue(name)
+    pd.testing.assert_frame_equal(standardize(dataset), apply_path(dataset))
+
+
+@pytest.mark.parametrize("name", ["shipped", "synthetic"])
+def test_corrections_match_if_chains(name, request):
+    dataset = request.getfixturevalue(name)
+    teams = TeamIndex.load()
+    cleaned = clean_dataset(dataset, load_corrections(teams = teams), teams = teams)
+    # The if-chains ran after the only rename of the script
+    expected = legacy_flags(dataset.assign(squad = dataset["squad"].replace({"Paris S-G": "Paris SG"})))
+    pd.testing.assert_frame_equal(cleaned[list(FLAG_COLUMNS)], expected)
+    assert (expected == "Yes").any().all()
+
+
+@pytest.mark.parametrize("name", ["shipped", "synthetic"])
+def test_partitioned_matches_serial(name, tmp_path):
+    path = DEFAULT_DATASET_PATH
+    if name == "synthetic":
+        path = str(tmp_path / "synthetic.csv")
+        write_teams_stats(_synthetic(), path)
+    settings = {"dataset_path": path}
+    serial = run_stages(settings, stages = CLEANING_STAGES)
+    partitioned = run_stages(settings, stages = CLEANING_STAGES, workers = 2)
+    for stage in ("standardize", "renames", "flags"):
+        pd.testing.assert_frame_equal(partitioned[stage], serial[stage])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the dashboard fact tables: the rolled up means and standard
+deviations and the columns of the ratio measures.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from big5_leagues.cube import ALL, HIERARCHIES, MEASURES, _measure_values, build_cube
+from big5_leagues.incremental import DEFAULT_PREPROCESSED_PATH
+
+
+@pytest.fixture(scope = "module")
+def dataset() -> pd.DataFrame:
+    return pd.read_csv(DEFAULT_PREPROCESSED_PATH, index_col = 0)
+
+
+def test_levels_match_groupby(dataset):
+    cube = build_cube(dataset)
+    for hierarchy in HIERARCHIES:
+        keys = list(hierarchy.keys)
+        for measure in MEASURES:
+            table = cube[f"{hierarchy.name}_{measure.page}_Statistics"]
+            values = pd.Series(_measure_values(dataset, measure), index = dataset.index)
+            for depth in range(len(keys) + 1):
+                rolled_up = ((table[keys[depth:]] == ALL).all(axis = 1)
+                             & (table[keys[:depth]] != ALL).all(axis = 1))
+                if depth:
+                    groups = [dataset[key].astype(str) for key in keys[:depth]]
+                    expected = values.groupby(groups).agg(["mean", "std"])
+                else:
+                    expected = values.agg(["mean", "std"]).to_frame().T
+                for statistic in ("mean", "std"):
+                    written = table.loc[rolled_up, f"{measure.name}_{statistic}"].to_numpy(float)
+                    np.testing.assert_allclose(written, expected[statistic].to_numpy(float), rtol = 1e-10)
+
+
+def test_std_of_large_values():
+    # Sums of squares of values near 1e9 cancel, the combined squared deviations do not
+    rows = 200000
+    large = pd.DataFrame({"competition": np.repeat(["A", "B"], rows), "season": "2010-2011", "squad": "Club"})
+    for measure in MEASURES:
+        large[measure.column or measure.name] = 0
+    large["points"] = 1e9 + np.tile([0.0, 1.0], rows)
+    table = build_cube(large)["League_General_Statistics"]
+    expected = [large["points"].std()] + large.groupby("competition")["points"].std().tolist()
+    np.testing.assert_allclose(table["points_std"], expected, rtol = 1e-9)
+
+
+def test_ratio_measures_have_no_total(dataset):
+    table = build_cube(dataset)["League_General_Statistics"]
+    for measure in ("points_per_match", "adjusted_points_per_match"):
+        assert measure not in table.columns
+        assert {f"{measure}_mean", f"{measure}_std", f"{measure}_count"} <= set(table.columns)
+    assert (table["points_per_match_count"] == table["team_seasons"]).all()
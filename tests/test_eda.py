@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the lazy EDA metrics.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import pandas as pd
+import pytest
+
+from big5_leagues.eda import EDAResult
+
+
+def test_metrics_from_a_generator():
+    dataset = pd.DataFrame({"points": [80, 71, None], "squad": ["Chelsea", "Arsenal", "Chelsea"]})
+    result = EDAResult(dataset, (metric for metric in ["data_count_null", "data_unique"]))
+    assert list(result) == ["data_count_null", "data_unique"]
+    assert result["data_count_null"]["points"] == 1
+
+
+def test_unknown_metric():
+    with pytest.raises(KeyError):
+        EDAResult(pd.DataFrame(), iter(["data_head", "data_unknown"]))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the match-level ingestion: the tie-breakers of the ranks.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import pandas as pd
+
+from big5_leagues.fixtures import fixtures_to_teams_stats
+
+# Alaves and Betis end level on 7 points: Alaves won their head-to-head,
+# Betis has the better goal difference
+MATCHES = [("Alaves", "Betis", 1, 0),
+           ("Betis", "Alaves", 0, 0),
+           ("Betis", "Celta", 5, 0),
+           ("Celta", "Betis", 0, 5),
+           ("Alaves", "Celta", 1, 0),
+           ("Celta", "Alaves", 1, 0),
+           ]
+
+
+def _fixtures(competition: str) -> pd.DataFrame:
+    fixtures = pd.DataFrame(MATCHES, columns = ["home_team", "away_team", "home_goals", "away_goals"])
+    return fixtures.assign(competition = competition, season = "2020-2021")
+
+
+def _table(competition: str) -> pd.DataFrame:
+    return fixtures_to_teams_stats(_fixtures(competition)).set_index("squad")
+
+
+def test_la_liga_head_to_head_before_goal_difference():
+    table = _table("La Liga")
+    assert table.loc["Alaves", "points"] == table.loc["Betis", "points"]
+    assert table.loc["Alaves", "goal_diff"] < table.loc["Betis", "goal_diff"]
+    assert table["rank"].to_dict() == {"Alaves": 1, "Betis": 2, "Celta": 3}
+
+
+def test_premier_league_goal_difference():
+    table = _table("Premier League")
+    assert table["rank"].to_dict() == {"Betis": 1, "Alaves": 2, "Celta": 3}
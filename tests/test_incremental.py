@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the season append: the outputs it rebuilds and its all or nothing
+writes.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import os
+
+import pandas as pd
+import pytest
+
+from big5_leagues import features
+from big5_leagues.cube import build_cube, cube_directory
+from big5_leagues.features import features_path, trajectory_features
+from big5_leagues.incremental import append_season
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH, read_teams_stats
+from big5_leagues.pipeline import run_pipeline
+
+LAST_SEASON = "2020-2021"
+
+
+@pytest.fixture
+def outputs(tmp_path) -> dict:
+    # Every output of a full run on all seasons but the last one
+    source = pd.read_csv(DEFAULT_DATASET_PATH, encoding = "utf-8")
+    head_path = str(tmp_path / "head.csv")
+    source[source["season"] != LAST_SEASON].to_csv(head_path, index = False)
+    tables = tmp_path / "tables"
+    tables.mkdir()
+    paths = {"preprocessed": str(tmp_path / "preprocessed.csv"),
+             "statistics": str(tables / "Running_Statistics.json"),
+             "tables": str(tables)}
+    run_pipeline({"dataset_path": head_path}, tables_directory = paths["tables"],
+                 preprocessed_path = paths["preprocessed"], statistics_path = paths["statistics"],
+                 cache_directory = None, report_path = None)
+    return paths
+
+
+def _new_rows() -> pd.DataFrame:
+    dataset = read_teams_stats()
+    return dataset[dataset["season"] == LAST_SEASON]
+
+
+def _contents(directory: str) -> dict:
+    contents = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            with open(os.path.join(root, name), "rb") as file:
+                contents[os.path.join(root, name)] = file.read()
+    return contents
+
+
+def test_append_rebuilds_cube_and_features(outputs):
+    append_season(_new_rows(), outputs["preprocessed"], outputs["statistics"], outputs["tables"])
+    dataset = pd.read_csv(outputs["preprocessed"], index_col = 0)
+    assert (dataset["season"] == LAST_SEASON).sum() == len(_new_rows())
+    # Same files as the cube and features commands write from the appended dataset
+    expected = {os.path.join(cube_directory(outputs["preprocessed"]), f"{name}.csv"): table
+                for name, table in build_cube(dataset).items()}
+    expected[features_path(outputs["preprocessed"])] = trajectory_features(dataset)
+    for path, table in expected.items():
+        with open(path, encoding = "utf-8", newline = "") as file:
+            assert file.read() == table.to_csv(index = False)
+
+
+def test_failed_append_leaves_outputs(outputs, monkeypatch):
+    directory = os.path.dirname(outputs["preprocessed"])
+    before = _contents(directory)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(features, "trajectory_features", fail)
+    with pytest.raises(RuntimeError):
+        append_season(_new_rows(), outputs["preprocessed"], outputs["statistics"], outputs["tables"])
+    assert _contents(directory) == before
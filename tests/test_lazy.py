@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the Polars backend: the cleaned frame of the lazy plan against the
+pandas stages, values and dtypes, on the shipped dataset and on a synthetic
+file.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import pandas as pd
+import pytest
+
+from big5_leagues.ingestion import DEFAULT_DATASET_PATH
+from big5_leagues.pipeline import BACKENDS, run_stages
+from big5_leagues.synthetic import write_teams_stats
+from tests.test_cleaning import _synthetic
+
+pytest.importorskip("polars")
+
+
+@pytest.mark.parametrize("name", ["shipped", "synthetic"])
+def test_backends_give_the_same_frame(name, tmp_path):
+    path = DEFAULT_DATASET_PATH
+    if name == "synthetic":
+        path = str(tmp_path / "synthetic.csv")
+        write_teams_stats(_synthetic(), path)
+    flags = {}
+    for backend, stages in BACKENDS.items():
+        stages = tuple(stage for stage in stages if stage.name in ("load", "standardize", "renames", "flags"))
+        flags[backend] = run_stages({"dataset_path": path}, stages = stages)["flags"]
+    pd.testing.assert_frame_equal(flags["polars"], flags["pandas"])
+    assert flags["polars"]["rank"].dtype == object
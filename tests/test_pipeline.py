@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the stage cache keys: the modules whose source is part of them.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+from big5_leagues import cleaning, pipeline
+from big5_leagues.pipeline import DEFAULT_SETTINGS, ENTRY_POINTS, STAGES, Stage, stage_key, stage_modules
+
+
+def _edit(monkeypatch, module: str):
+    # Source of the module as if a line had been added to it
+    source = pipeline._module_source
+
+    monkeypatch.setattr(pipeline, "_module_source",
+                        lambda name: source(name) + ("\n# edited\n" if name == module else ""))
+
+
+def test_modules_found_from_the_function():
+    stage = Stage("flags", cleaning.apply_notes_flags)
+    assert {"big5_leagues.cleaning", "big5_leagues.qualification", "big5_leagues.notes",
+            "big5_leagues.teams"} <= set(stage_modules(stage))
+
+
+def test_modules_of_every_stage():
+    for stages in (*pipeline.BACKENDS.values(), pipeline.FIXTURES_STAGES):
+        for stage in stages:
+            modules = stage_modules(stage)
+            assert set(stage.modules) <= set(modules)
+            assert not set(modules) & set(ENTRY_POINTS)
+
+
+def test_key_follows_imports(monkeypatch):
+    # A stage that declares no module still depends on the modules its function imports
+    stage = Stage("flags", cleaning.apply_notes_flags)
+    key = stage_key(stage, DEFAULT_SETTINGS, {})
+    _edit(monkeypatch, "big5_leagues.notes")
+    assert stage_key(stage, DEFAULT_SETTINGS, {}) != key
+    monkeypatch.undo()
+    _edit(monkeypatch, "big5_leagues.cube")
+    assert stage_key(stage, DEFAULT_SETTINGS, {}) == key
+
+
+def test_flags_key_follows_notes(monkeypatch):
+    stage = next(stage for stage in STAGES if stage.name == "flags")
+    keys = {"renames": "0" * 64}
+    key = stage_key(stage, DEFAULT_SETTINGS, keys)
+    _edit(monkeypatch, "big5_leagues.notes")
+    assert stage_key(stage, DEFAULT_SETTINGS, keys) != key
+
+
+def test_running_statistics_key_follows_sketches(monkeypatch):
+    stage = next(stage for stage in STAGES if stage.name == "running_statistics")
+    keys = {"load": "0" * 64}
+    key = stage_key(stage, DEFAULT_SETTINGS, keys)
+    _edit(monkeypatch, "big5_leagues.sketches")
+    assert stage_key(stage, DEFAULT_SETTINGS, keys) != key
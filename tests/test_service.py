@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the query service: filters, aggregates, cache invalidation and the
+answers of the HTTP handler to bad requests.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+# Import libraries
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from big5_leagues.service import QueryEngine, make_server
+
+
+def _dataset() -> pd.DataFrame:
+    return pd.DataFrame({"competition": ["Serie A", "Serie A", "Serie A", "La Liga", "La Liga"],
+                         "season": ["2019-2020", "2019-2020", "2020-2021", "2019-2020", "2020-2021"],
+                         "rank": pd.array([1, 2, 1, 1, 2], dtype = "Int8"),
+                         "squad": ["Juventus", "Inter", "Inter", "Real Madrid", "Barcelona"],
+                         "points": [83, 82, 91, 87, 79],
+                         "points_per_match": [2.18, 2.16, 2.39, 2.29, 2.08],
+                         "Relegation": ["No", "No", "No", "No", "No"],
+                         })
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    path = str(tmp_path / "dataset.csv")
+    _dataset().to_csv(path)
+    return path
+
+
+@pytest.fixture
+def server(path):
+    server = make_server(QueryEngine(path), port = 0)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _request(url: str, body = None) -> tuple:
+    data = None if body is None else body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data = data), timeout = 10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_numeric_filter_of_get(url):
+    status, result = _request(f"{url}/query?rank=1&columns=squad&sort=squad")
+    assert status == 200
+    assert result["rows"] == [["Inter"], ["Juventus"], ["Real Madrid"]]
+    status, result = _request(f"{url}/query?points_per_match=2.16&columns=squad")
+    assert result["rows"] == [["Inter"]]
+
+
+def test_numeric_filter_not_converted(url):
+    status, result = _request(f"{url}/query?rank=first")
+    assert status == 400
+    assert "rank" in result["error"]
+
+
+def test_in_filter(url, path):
+    status, result = _request(f"{url}/query?squad=Inter,Barcelona&columns=squad,season&sort=season,squad")
+    assert status == 200
+    assert result["rows"] == [["Inter", "2019-2020"], ["Barcelona", "2020-2021"], ["Inter", "2020-2021"]]
+    engine = QueryEngine(path)
+    result = engine.query(filters = {"rank": {"in": ["2"]}, "points": {">": 80}}, columns = ["squad"])
+    assert result["squad"].tolist() == ["Inter"]
+
+
+def test_group_by_aggregates(url):
+    query = {"filters": {"season": {">=": "2019-2020"}}, "group_by": ["competition"],
+             "aggregates": {"points": ["sum", "max"], "squad": "nunique"}}
+    status, result = _request(f"{url}/query", query)
+    assert status == 200
+    assert result["columns"] == ["competition", "points_sum", "points_max", "squad_nunique"]
+    assert result["rows"] == [["La Liga", 166, 87, 2], ["Serie A", 256, 91, 2]]
+
+
+def test_cache_invalidated_by_file_change(path):
+    engine = QueryEngine(path)
+    assert len(engine.query(filters = {"competition": "La Liga"})) == 2
+    assert len(engine.query(filters = {"competition": "La Liga"})) == 2
+    assert (engine.hits, engine.misses) == (1, 1)
+
+    dataset = _dataset()
+    dataset.loc[len(dataset)] = ["La Liga", "2021-2022", 1, "Real Madrid", 86, 2.26, "No"]
+    mtime = os.stat(path).st_mtime_ns
+    dataset.to_csv(path)
+    os.utime(path, ns = (mtime + 10 ** 9, mtime + 10 ** 9))
+    assert len(engine.query(filters = {"competition": "La Liga"})) == 3
+    assert engine.loads == 2
+    assert engine.statistics()["cache"]["size"] == 1
+
+
+@pytest.mark.parametrize("body", [b"not json",
+                                  b"[]",
+                                  {"unknown": 1},
+                                  {"filters": [1]},
+                                  {"filters": {"unknown": 1}},
+                                  {"filters": {"rank": {"~": 1}}},
+                                  {"aggregates": ["points"]},
+                                  {"aggregates": {"points": "product"}},
+                                  {"aggregates": {"points": 1}},
+                                  {"columns": "squad,unknown"},
+                                  {"columns": [1]},
+                                  {"group_by": {"squad": 1}},
+                                  {"sort": [["points"]]},
+                                  {"limit": "ten"},
+                                  ])
+def test_bad_body(url, body):
+    status, result = _request(f"{url}/query", body)
+    assert status == 400
+    assert result["error"]
+
+
+def test_internal_error(server, url, monkeypatch):
+    def fail(**query):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(server.engine, "query_json", fail)
+    status, result = _request(f"{url}/query", {})
+    assert status == 500
+    assert result["error"] == "RuntimeError: broken"